@@ -7,12 +7,19 @@ This script:
 2. Sets up HNSW vector indexes for semantic search
 3. Validates the TiDB Cloud connection and Google Gemini API
 
+The backfill command copies the legacy per-course tables (vector_collection_course_{id})
+into the shared vector_embeddings table. It is resumable: progress is checkpointed after
+every batch and rows are upserted, so an interrupted run can simply be started again.
+
 Usage:
     python migrate_to_tidb.py
+    python migrate_to_tidb.py backfill [--batch-size 1000] [--drop-source] [--restart]
 """
 
 import sys
 import os
+import json
+import argparse
 from pathlib import Path
 
 # Add the src directory to the Python path
@@ -20,8 +27,9 @@ sys.path.append(str(Path(__file__).parent / "src"))
 
 import asyncio
 from sqlalchemy import text
-from src.db.database import engine, Base
+from src.db.database import engine, Base, get_db_context
 from src.db.models import VectorEmbedding, VectorIndex
+from src.db.models.db_vector import EMBEDDING_DIMENSION
 from src.services.vector_service import VectorService
 from src.config.settings import SQLALCHEMY_DATABASE_URL, GOOGLE_API_KEY
 import logging
@@ -30,6 +38,11 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SHARED_TABLE = VectorEmbedding.__tablename__
+SHARED_INDEX = f"vec_idx_{SHARED_TABLE}_cosine"
+LEGACY_TABLE_PREFIX = "vector_collection_course_"
+BACKFILL_STATE_FILE = Path(__file__).parent / ".vector_backfill_state.json"
+
 
 async def test_tidb_connection():
     """Test the TiDB Cloud database connection."""
@@ -76,9 +89,33 @@ async def test_google_gemini_api():
         return False
 
 
+def _column_type(conn, table_name, column_name):
+    return conn.execute(
+        text(
+            "SELECT DATA_TYPE FROM information_schema.columns "
+            "WHERE table_schema = DATABASE() AND table_name = :table AND column_name = :column"
+        ),
+        {"table": table_name, "column": column_name},
+    ).scalar()
+
+
 async def create_vector_tables():
     """Create the vector embedding and index tables."""
     try:
+        with engine.begin() as conn:
+            column_type = _column_type(conn, SHARED_TABLE, "embedding_vector")
+            if column_type and column_type.lower() != "vector":
+                # Earlier versions created embedding_vector as JSON and never wrote to it
+                rows = conn.execute(text(f"SELECT COUNT(*) FROM {SHARED_TABLE}")).scalar()
+                if rows:
+                    logger.error(
+                        f"❌ {SHARED_TABLE}.embedding_vector is {column_type} and the table has {rows} rows; "
+                        "convert it to VECTOR manually"
+                    )
+                    return False
+                logger.info(f"🔁 Recreating empty {SHARED_TABLE} with a VECTOR column")
+                conn.execute(text(f"DROP TABLE {SHARED_TABLE}"))
+
         # Create all tables
         Base.metadata.create_all(bind=engine)
         logger.info("✅ Vector tables created successfully")
@@ -88,15 +125,52 @@ async def create_vector_tables():
         return False
 
 
+def _set_index_status(status):
+    """Record the shared HNSW index in vector_indexes"""
+    with get_db_context() as db:
+        index = db.query(VectorIndex).filter(VectorIndex.index_name == SHARED_INDEX).first()
+        if index is None:
+            index = VectorIndex(
+                index_name=SHARED_INDEX,
+                table_name=SHARED_TABLE,
+                column_name="embedding_vector",
+                distance_function="VEC_COSINE_DISTANCE",
+                vector_dimension=EMBEDDING_DIMENSION,
+            )
+            db.add(index)
+        index.status = status
+        db.commit()
+
+
 async def create_vector_indexes():
     """Create HNSW vector indexes for efficient similarity search."""
     try:
-        logger.info(
-            "⏭️  Skipping vector index creation - TiDBVectorClient handles this automatically"
-        )
+        with engine.connect() as conn:
+            existing = conn.execute(text(f"SHOW INDEX FROM {SHARED_TABLE}")).mappings().all()
+        if any(row["Key_name"] == SHARED_INDEX for row in existing):
+            _set_index_status("ready")
+            logger.info(f"✅ Vector index {SHARED_INDEX} already exists")
+            return True
+
+        _set_index_status("creating")
+        with engine.begin() as conn:
+            # TiDB builds vector indexes on the TiFlash replica
+            conn.execute(text(f"ALTER TABLE {SHARED_TABLE} SET TIFLASH REPLICA 1"))
+            conn.execute(
+                text(
+                    f"ALTER TABLE {SHARED_TABLE} ADD VECTOR INDEX {SHARED_INDEX} "
+                    "((VEC_COSINE_DISTANCE(embedding_vector))) USING HNSW"
+                )
+            )
+        _set_index_status("ready")
+        logger.info(f"✅ HNSW vector index {SHARED_INDEX} created")
         return True
     except Exception as e:
         logger.error(f"❌ Vector index creation failed: {e}")
+        try:
+            _set_index_status("failed")
+        except Exception:
+            pass
         return False
 
 
@@ -159,6 +233,120 @@ async def cleanup_test_data():
         return False
 
 
+def _load_backfill_state(restart):
+    if restart or not BACKFILL_STATE_FILE.exists():
+        return {"completed": [], "cursors": {}}
+    with open(BACKFILL_STATE_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_backfill_state(state):
+    # Write to a temp file first so an interruption never corrupts the checkpoint
+    tmp_file = BACKFILL_STATE_FILE.with_suffix(".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_file, BACKFILL_STATE_FILE)
+
+
+def _legacy_tables():
+    """Return (table name, course id) of every per-course vector table"""
+    with engine.connect() as conn:
+        names = conn.execute(
+            text(
+                "SELECT table_name FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name LIKE :pattern ORDER BY table_name"
+            ),
+            {"pattern": LEGACY_TABLE_PREFIX.replace("_", "\\_") + "%"},
+        ).scalars().all()
+    tables = []
+    for name in names:
+        course_id = name[len(LEGACY_TABLE_PREFIX):]
+        if course_id.isdigit():
+            tables.append((name, int(course_id)))
+    return tables
+
+
+def _backfill_table(table_name, course_id, state, batch_size):
+    """Copy one legacy table in id order, checkpointing the last copied id per batch"""
+    copy_batch = text(
+        f"""
+        INSERT INTO {SHARED_TABLE}
+            (course_id, chapter_id, content_id, content_type, text_content, embedding_vector, embedding_metadata)
+        SELECT :course_id,
+               CAST(JSON_EXTRACT(meta, '$.chapter_id') AS SIGNED),
+               id,
+               COALESCE(JSON_UNQUOTE(JSON_EXTRACT(meta, '$.type')), 'document'),
+               COALESCE(document, ''),
+               embedding,
+               meta
+        FROM {table_name}
+        WHERE id > :after AND id <= :last
+        ON DUPLICATE KEY UPDATE
+            chapter_id = VALUES(chapter_id),
+            content_type = VALUES(content_type),
+            text_content = VALUES(text_content),
+            embedding_vector = VALUES(embedding_vector),
+            embedding_metadata = VALUES(embedding_metadata)
+        """
+    )
+    next_ids = text(f"SELECT id FROM {table_name} WHERE id > :after ORDER BY id LIMIT :limit")
+
+    after = state["cursors"].get(table_name, "")
+    copied = 0
+    while True:
+        # The copy itself runs server side, only the ids of the batch come back
+        with engine.begin() as conn:
+            ids = conn.execute(next_ids, {"after": after, "limit": batch_size}).scalars().all()
+            if not ids:
+                break
+            conn.execute(copy_batch, {"course_id": course_id, "after": after, "last": ids[-1]})
+        after = ids[-1]
+        copied += len(ids)
+        state["cursors"][table_name] = after
+        _save_backfill_state(state)
+
+    with engine.connect() as conn:
+        source_rows = conn.execute(text(f"SELECT COUNT(*) FROM {table_name}")).scalar()
+        target_rows = conn.execute(
+            text(f"SELECT COUNT(*) FROM {SHARED_TABLE} WHERE course_id = :course_id"),
+            {"course_id": course_id},
+        ).scalar()
+    return copied, source_rows, target_rows
+
+
+async def backfill_vector_tables(batch_size=1000, drop_source=False, restart=False):
+    """Copy all legacy per-course vector tables into the shared vector_embeddings table."""
+    state = _load_backfill_state(restart)
+    tables = _legacy_tables()
+    logger.info(f"📋 Found {len(tables)} per-course vector tables, {len(state['completed'])} already migrated")
+
+    for table_name, course_id in tables:
+        if table_name in state["completed"]:
+            continue
+        try:
+            copied, source_rows, target_rows = _backfill_table(table_name, course_id, state, batch_size)
+        except Exception as e:
+            logger.error(f"❌ Backfill of {table_name} failed, rerun to resume: {e}")
+            return False
+
+        if target_rows < source_rows:
+            logger.error(
+                f"❌ {table_name}: {source_rows} source rows but only {target_rows} in {SHARED_TABLE}"
+            )
+            return False
+
+        if drop_source:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP TABLE {table_name}"))
+        state["completed"].append(table_name)
+        state["cursors"].pop(table_name, None)
+        _save_backfill_state(state)
+        logger.info(f"✅ {table_name} -> course {course_id}: copied {copied} rows ({source_rows} total)")
+
+    logger.info("🎉 Backfill completed; set VECTOR_BACKEND=tidb to serve from the shared table")
+    return True
+
+
 async def main():
     """Run the complete TiDB Cloud migration and setup."""
     logger.info("🚀 Starting TiDB Cloud migration...")
@@ -196,9 +384,31 @@ async def main():
     return True
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="TiDB Cloud vector search setup")
+    subparsers = parser.add_subparsers(dest="command")
+    backfill = subparsers.add_parser(
+        "backfill", help="copy per-course vector tables into the shared vector_embeddings table"
+    )
+    backfill.add_argument("--batch-size", type=int, default=1000, help="rows per INSERT ... SELECT")
+    backfill.add_argument(
+        "--drop-source", action="store_true", help="drop each per-course table once it is copied"
+    )
+    backfill.add_argument(
+        "--restart", action="store_true", help="ignore the saved checkpoint and start over"
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
     try:
-        success = asyncio.run(main())
+        if args.command == "backfill":
+            success = asyncio.run(
+                backfill_vector_tables(args.batch_size, args.drop_source, args.restart)
+            )
+        else:
+            success = asyncio.run(main())
         sys.exit(0 if success else 1)
     except KeyboardInterrupt:
         logger.info("Migration cancelled by user")
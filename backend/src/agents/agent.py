@@ -1,6 +1,7 @@
 """
 This file defines the base class for all agents.
 """
+import asyncio
 import json
 import logging
 from abc import ABC, abstractmethod
@@ -9,14 +10,26 @@ from typing import Any, Dict
 from google.genai import types
 
 from ..config import settings
+from ..services.fake_llm import configure_llm_backend
+from ..services.llm_response_cache import get_llm_response_cache
+from ..services.llm_scheduler import Priority, llm_scheduler, model_name
 
 if not settings.AGENT_DEBUG_MODE:
     logging.getLogger("google_adk.google.adk.models.google_llm").setLevel(logging.WARNING)
 
+# Gemini, or the record/replay/synthetic backend for offline runs and benchmarks
+configure_llm_backend()
+
+
+def runner_model(runner) -> str:
+    """Model name of the agent behind an ADK runner, the rate limit key of the scheduler"""
+    return model_name(getattr(getattr(runner, "agent", None), "model", None))
 
 
 class StandardAgent(ABC):
     """ This is the standard agent without structured output """
+    priority: Priority = Priority.COURSE_CREATION
+
     @abstractmethod
     def __init__(self, app_name: str, session_service):
         self.app_name = app_name
@@ -37,38 +50,56 @@ class StandardAgent(ABC):
         retry_delay: float = 2.0
         last_error = None
         
+        # Identical inputs of idempotent agents are answered from the response cache
+        response_cache = get_llm_response_cache()
+        cache_key = response_cache.key_for(self.runner.agent, state, content) if response_cache else None
+        if cache_key:
+            # SQLite lookups run off the event loop, like the other caches
+            cached = await asyncio.to_thread(response_cache.get, cache_key, self.runner.agent.name)
+            if cached is not None:
+                return cached
+
         for attempt in range(max_retries + 1):  # +1 for the initial attempt
             try:
                 if debug:
                     print(f"[Debug] Running agent with state: {json.dumps(state, indent=2)}")
 
-                # Create session
-                session = await self.session_service.create_session(
-                    app_name=self.app_name,
-                    user_id=user_id,
-                    state=state
-                )
-                session_id = session.id
-
-                # We iterate through events to find the final answer
-                async for event in self.runner.run_async(user_id=user_id, session_id=session_id, new_message=content):
-                    if debug:
-                        print(f"  [Event] Author: {event.author}, Type: {type(event).__name__}, Final: {event.is_final_response()}, Content: {event.content}")
-
-                    # is_final_response() marks the concluding message for the turn
-                    if event.is_final_response():
-                        if event.content and event.content.parts:
-                            # Assuming text response in the first part
-                            return {
-                                "status": "success",
-                                "explanation": event.content.parts[0].text  # TODO rename to output/content
-                            }
-                        elif event.actions and event.actions.escalate:  # Handle potential errors/escalations
-                            error_msg = f"Agent escalated: {event.error_message or 'No specific message.'}"
-                            if attempt >= max_retries:
-                                return {"status": "error", "message": error_msg}
-                            last_error = error_msg
-                            break  # Break out of event loop to trigger retry
+                # Wait for a slot of the shared LLM scheduler (concurrency, rate limit, priority)
+                async with llm_scheduler.slot(runner_model(self.runner), self.priority, user_id):
+                    # Each attempt runs in a fresh session, deleted with its events afterwards
+                    session = await self.session_service.create_session(
+                        app_name=self.app_name,
+                        user_id=user_id,
+                        state=state
+                    )
+                    session_id = session.id
+                    try:
+                        # We iterate through events to find the final answer
+                        async for event in self.runner.run_async(user_id=user_id, session_id=session_id, new_message=content):
+                            if debug:
+                                print(f"  [Event] Author: {event.author}, Type: {type(event).__name__}, Final: {event.is_final_response()}, Content: {event.content}")
+
+                            # is_final_response() marks the concluding message for the turn
+                            if event.is_final_response():
+                                if event.content and event.content.parts:
+                                    # Assuming text response in the first part
+                                    response = {
+                                        "status": "success",
+                                        "explanation": event.content.parts[0].text  # TODO rename to output/content
+                                    }
+                                    if cache_key:
+                                        await asyncio.to_thread(response_cache.put, cache_key, self.runner.agent.name, response)
+                                    return response
+                                elif event.actions and event.actions.escalate:  # Handle potential errors/escalations
+                                    error_msg = f"Agent escalated: {event.error_message or 'No specific message.'}"
+                                    if attempt >= max_retries:
+                                        return {"status": "error", "message": error_msg}
+                                    last_error = error_msg
+                                    break  # Break out of event loop to trigger retry
+                    finally:
+                        await self.session_service.delete_session(
+                            app_name=self.app_name, user_id=user_id, session_id=session_id
+                        )
                 
                 # If we get here, no final response was received
                 error_msg = "Agent did not give a final response. Unknown error occurred."
@@ -85,7 +116,6 @@ class StandardAgent(ABC):
                 
             # Only sleep if we're going to retry
             if attempt < max_retries:
-                import asyncio
                 await asyncio.sleep(retry_delay)
         
         # This should theoretically never be reached due to the raise/return above
@@ -97,6 +127,8 @@ class StandardAgent(ABC):
 
 class StructuredAgent(ABC):
     """ This is an agent that returns structured output. """
+    priority: Priority = Priority.COURSE_CREATION
+
     @abstractmethod
     def __init__(self, app_name: str, session_service):
         self.app_name = app_name
@@ -117,49 +149,67 @@ class StructuredAgent(ABC):
         retry_delay: float = 2.0
         last_error = None
         
+        # Identical inputs of idempotent agents are answered from the response cache
+        response_cache = get_llm_response_cache()
+        cache_key = response_cache.key_for(self.runner.agent, state, content) if response_cache else None
+        if cache_key:
+            # SQLite lookups run off the event loop, like the other caches
+            cached = await asyncio.to_thread(response_cache.get, cache_key, self.runner.agent.name)
+            if cached is not None:
+                return cached
+
         for attempt in range(max_retries + 1):  # +1 for the initial attempt
             try:
-                session = await self.session_service.create_session(
-                    app_name=self.app_name,
-                    user_id=user_id,
-                    state=state
-                )
-                session_id = session.id
-
-                async for event in self.runner.run_async(
+                # Wait for a slot of the shared LLM scheduler (concurrency, rate limit, priority)
+                async with llm_scheduler.slot(runner_model(self.runner), self.priority, user_id):
+                    # Each attempt runs in a fresh session, deleted with its events afterwards
+                    session = await self.session_service.create_session(
+                        app_name=self.app_name,
                         user_id=user_id,
-                        session_id=session_id,
-                        new_message=content
-                ):
-                    if debug:
-                        print(f"[Event] Author: {event.author}, Type: {type(event).__name__}, "
-                              f"Final: {event.is_final_response()}")
-
-                    if event.is_final_response():
-                        if event.content and event.content.parts:
-                            # Get the text from the Part object
-                            json_text = event.content.parts[0].text
-
-                            # Try parsing the json response into a dictionary
-                            try:
-                                dict_response = json.loads(json_text)
-                                dict_response['status'] = 'success'
-                                return dict_response
-                            except json.JSONDecodeError as e:
-                                error_msg = f"Error parsing JSON response: {e}"
-                                if attempt >= max_retries:
-                                    if debug:
-                                        print(error_msg)
-                                    raise
-                                last_error = error_msg
-                                break  # Break out of event loop to trigger retry
+                        state=state
+                    )
+                    session_id = session.id
+                    try:
+                        async for event in self.runner.run_async(
+                                user_id=user_id,
+                                session_id=session_id,
+                                new_message=content
+                        ):
+                            if debug:
+                                print(f"[Event] Author: {event.author}, Type: {type(event).__name__}, "
+                                      f"Final: {event.is_final_response()}")
+
+                            if event.is_final_response():
+                                if event.content and event.content.parts:
+                                    # Get the text from the Part object
+                                    json_text = event.content.parts[0].text
+
+                                    # Try parsing the json response into a dictionary
+                                    try:
+                                        dict_response = json.loads(json_text)
+                                        dict_response['status'] = 'success'
+                                        if cache_key:
+                                            await asyncio.to_thread(response_cache.put, cache_key, self.runner.agent.name, dict_response)
+                                        return dict_response
+                                    except json.JSONDecodeError as e:
+                                        error_msg = f"Error parsing JSON response: {e}"
+                                        if attempt >= max_retries:
+                                            if debug:
+                                                print(error_msg)
+                                            raise
+                                        last_error = error_msg
+                                        break  # Break out of event loop to trigger retry
                                 
-                        elif event.actions and event.actions.escalate:  # Handle potential errors/escalations
-                            error_msg = f"Agent escalated: {event.error_message or 'No specific message.'}"
-                            if attempt >= max_retries:
-                                return {"status": "error", "message": error_msg}
-                            last_error = error_msg
-                            break  # Break out of event loop to trigger retry
+                                elif event.actions and event.actions.escalate:  # Handle potential errors/escalations
+                                    error_msg = f"Agent escalated: {event.error_message or 'No specific message.'}"
+                                    if attempt >= max_retries:
+                                        return {"status": "error", "message": error_msg}
+                                    last_error = error_msg
+                                    break  # Break out of event loop to trigger retry
+                    finally:
+                        await self.session_service.delete_session(
+                            app_name=self.app_name, user_id=user_id, session_id=session_id
+                        )
                 
                 # If we get here, no final response was received
                 error_msg = "Agent did not give a final response. Unknown error occurred."
@@ -176,7 +226,6 @@ class StructuredAgent(ABC):
             
             # Only sleep if we're going to retry
             if attempt < max_retries:
-                import asyncio
                 await asyncio.sleep(retry_delay)
         
         # This should theoretically never be reached due to the raise/return above
@@ -17,8 +17,9 @@ from google.adk.runners import Runner
 from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioServerParameters
 from google.genai import types
 
-from ..agent import StructuredAgent
+from ..agent import StructuredAgent, runner_model
 from ..utils import load_instruction_from_file
+from ...services.llm_scheduler import Priority, llm_scheduler
 
 from google.adk.sessions import DatabaseSessionService
 from google.adk.runners import RunConfig
@@ -28,6 +29,7 @@ from google.adk.agents.run_config import StreamingMode
 class ChatAgent:
     app_name: str
     session_service: DatabaseSessionService
+    priority: Priority = Priority.CHAT
 
     def __init__(self, app_name: str, session_service: DatabaseSessionService):
         # Call the base class constructor
@@ -86,34 +88,36 @@ class ChatAgent:
                         state=state or {},
                     )
 
-                # We iterate through events and yield them as they come in
-                async for event in self.runner.run_async(
-                    user_id=user_id,
-                    session_id=session.id,
-                    new_message=content,
-                    run_config=RunConfig(streaming_mode=StreamingMode.SSE),
-                ):
-                    if debug:
-                        print(
-                            f"  [Event] Author: {event.author}, Type: {type(event).__name__}, Final: {event.is_final_response()}, Content: {event.content}"
-                        )
-
-                    # Check for text content in the event
-                    if event.content and event.content.parts:
-                        # Yield each text part
-                        for part in event.content.parts:
-                            if hasattr(part, "text") and part.text:
-                                yield part.text, event.is_final_response()
-
-                    # Handle final response or errors
-                    if event.is_final_response():
-                        if event.actions and event.actions.escalate:
-                            error_msg = f"Agent escalated: {event.error_message or 'No specific message.'}"
-                            if attempt >= max_retries:
-                                raise Exception(error_msg)
-                            last_error = error_msg
-                            break
-                        return  # Successfully completed
+                # Chat runs go first in the shared LLM scheduler
+                async with llm_scheduler.slot(runner_model(self.runner), self.priority, user_id):
+                    # We iterate through events and yield them as they come in
+                    async for event in self.runner.run_async(
+                        user_id=user_id,
+                        session_id=session.id,
+                        new_message=content,
+                        run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+                    ):
+                        if debug:
+                            print(
+                                f"  [Event] Author: {event.author}, Type: {type(event).__name__}, Final: {event.is_final_response()}, Content: {event.content}"
+                            )
+
+                        # Check for text content in the event
+                        if event.content and event.content.parts:
+                            # Yield each text part
+                            for part in event.content.parts:
+                                if hasattr(part, "text") and part.text:
+                                    yield part.text, event.is_final_response()
+
+                        # Handle final response or errors
+                        if event.is_final_response():
+                            if event.actions and event.actions.escalate:
+                                error_msg = f"Agent escalated: {event.error_message or 'No specific message.'}"
+                                if attempt >= max_retries:
+                                    raise Exception(error_msg)
+                                last_error = error_msg
+                                break
+                            return  # Successfully completed
 
                 # If we get here, no final response was received
                 error_msg = (
@@ -1,13 +1,17 @@
+import asyncio
+
 from .pdf_parser import PDFParser
 from .testing_agent import TestingFlashcardAgent
 from .learning_agent import LearningFlashcardAgent
 from .anki_generator import AnkiDeckGenerator
 from .schema import FlashcardConfig, FlashcardType, TaskStatus, FlashcardPreview
 from ..agent import StandardAgent
+from ...services.llm_scheduler import Priority
 
 
 class FlashcardAgent(StandardAgent):
     """Main flashcard generation coordinator."""
+    priority = Priority.FLASHCARDS
 
     def __init__(self, app_name: str, session_service):
         self.app_name = app_name
@@ -19,12 +23,16 @@ class FlashcardAgent(StandardAgent):
 
     async def analyze_pdf(self, pdf_path: str, config: FlashcardConfig) -> FlashcardPreview:
         """Analyze PDF and provide preview of flashcard generation."""
-        pdf_data = self.pdf_parser.extract_text_and_metadata(pdf_path)
+        if config.type == FlashcardType.TESTING:
+            # Page texts are not needed up front, only the first chunk is read for the sample
+            pdf_data = await asyncio.to_thread(self.pdf_parser.extract_outline, pdf_path)
+        else:
+            pdf_data = await self.pdf_parser.extract_text_and_metadata_async(pdf_path)
         chapters = self.pdf_parser.identify_chapters(pdf_data, config.chapter_mode.value, config.slides_per_chapter)
 
         # Estimate number of cards
         if config.type == FlashcardType.TESTING:
-            estimated_cards = min(1000, max(10, len(pdf_data["pages"]) * 2))
+            estimated_cards = min(1000, max(10, pdf_data["metadata"]["page_count"] * 2))
         else:
             estimated_cards = len(chapters) * 4  # ~4 cards per chapter
 
@@ -34,7 +42,7 @@ class FlashcardAgent(StandardAgent):
 
         if config.type == FlashcardType.TESTING:
             # Generate one sample question
-            sample_text = pdf_data["total_text"][:2000]
+            sample_text = await asyncio.to_thread(self.pdf_parser.first_chunk, pdf_path, 2000)
             questions = await self.testing_agent.generate_questions(sample_text, config.difficulty.value, 1)
             if questions:
                 sample_question = questions[0]
@@ -66,14 +74,23 @@ class FlashcardAgent(StandardAgent):
                     "activity": "Initializing PDF analysis and metadata extraction"
                 })
 
-            pdf_data = self.pdf_parser.extract_text_and_metadata(pdf_path)
-
-            if progress_callback:
-                progress_callback(TaskStatus.ANALYZING, 15, {
-                    "activity": f"Extracted {len(pdf_data['pages'])} pages, {len(pdf_data['total_text'])} characters",
-                    "pages_count": len(pdf_data['pages']),
-                    "text_length": len(pdf_data['total_text'])
-                })
+            if config.type == FlashcardType.TESTING:
+                # Questions are generated from a page stream, the full text is never held at once
+                pdf_data = await asyncio.to_thread(self.pdf_parser.extract_outline, pdf_path)
+                if progress_callback:
+                    progress_callback(TaskStatus.ANALYZING, 15, {
+                        "activity": f"Found {pdf_data['metadata']['page_count']} pages",
+                        "pages_count": pdf_data["metadata"]["page_count"],
+                    })
+            else:
+                pdf_data = await self.pdf_parser.extract_text_and_metadata_async(pdf_path)
+                if progress_callback:
+                    text_length = sum(page["char_count"] for page in pdf_data["pages"])
+                    progress_callback(TaskStatus.ANALYZING, 15, {
+                        "activity": f"Extracted {len(pdf_data['pages'])} pages, {text_length} characters",
+                        "pages_count": len(pdf_data['pages']),
+                        "text_length": text_length
+                    })
             
             chapters = self.pdf_parser.identify_chapters(pdf_data, config.chapter_mode.value, config.slides_per_chapter)
             
@@ -91,29 +108,28 @@ class FlashcardAgent(StandardAgent):
                 })
             
             if config.type == FlashcardType.TESTING:
-                # Calculate number of questions based on PDF content
                 total_pages = pdf_data["metadata"]["page_count"]
-                total_text_length = len(pdf_data["total_text"])
-                
-                # Dynamic calculation: base on pages and text length
-                questions_per_page = 2 if total_text_length / total_pages > 1000 else 1
-                calculated_questions = min(1000, max(5, total_pages * questions_per_page))
-                
+
                 if progress_callback:
                     progress_callback(TaskStatus.GENERATING, 40, {
-                        "activity": f"Generating {calculated_questions} questions from {total_pages} pages",
-                        "estimated_questions": calculated_questions,
+                        "activity": f"Generating questions from {total_pages} pages",
+                        "estimated_questions": min(1000, max(5, total_pages)),
                         "pages_count": total_pages,
                         "difficulty": config.difficulty.value
                     })
-                
-                questions = await self.testing_agent.generate_questions(
-                    pdf_data["total_text"], 
+
+                # Questions: 1 per page (2 for text-heavy pages), at least 5 and at most 1000.
+                # Generation starts with the first chunk while later pages are still being read.
+                pages = await asyncio.to_thread(self.pdf_parser.iter_pages, pdf_path)
+                questions = await self.testing_agent.generate_questions_from_pages(
+                    pages,
                     config.difficulty.value,
-                    calculated_questions,
-                    progress_callback
+                    total_pages=total_pages,
+                    max_questions=1000,
+                    min_questions=5,
+                    progress_callback=progress_callback,
                 )
-                
+
                 # Step 4: Package
                 if progress_callback:
                     progress_callback(TaskStatus.PACKAGING, 90, {
@@ -127,7 +143,7 @@ class FlashcardAgent(StandardAgent):
                 # Extract images for chapters
                 image_paths = []
                 for chapter in chapters:
-                    chapter_images = self.pdf_parser.extract_images_for_learning(pdf_path, chapter["pages"])
+                    chapter_images = await self.pdf_parser.extract_images_for_learning_async(pdf_path, chapter["pages"])
                     image_paths.extend(chapter_images)
                 
                 # Step 3: Generate learning cards
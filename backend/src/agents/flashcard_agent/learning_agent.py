@@ -9,10 +9,12 @@ from .instructions_txt import instructions
 from .schema import LearningCard
 from ..agent import StandardAgent
 from ..utils import create_text_query
+from ...services.llm_scheduler import Priority
 
 
 class LearningFlashcardAgent(StandardAgent):
     """Generates learning flashcards with images."""
+    priority = Priority.FLASHCARDS
 
     def __init__(self, app_name: str, session_service):
         # Call parent constructor to properly initialize StandardAgent
@@ -76,9 +78,6 @@ class LearningFlashcardAgent(StandardAgent):
         """Process a single chapter in parallel with rate limiting."""
         async with semaphore:
             try:
-                # Add small delay to avoid overwhelming the API
-                await asyncio.sleep(0.5 * chapter_index)
-
                 # Get chapter text
                 chapter_text = ""
                 if pdf_data and "pages" in pdf_data:
@@ -1,73 +1,109 @@
-import uuid
-from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional
 
 import fitz  # PyMuPDF
-from pdf2image import convert_from_path
+
+from ...config import settings
+from ...services.page_renderer import get_page_renderer
+from ...services.data_processors.chunker import iter_overlapping_chunks
+from ...services.pdf_extraction import fitz_lock, iter_page_texts
+from ...services.pdf_extraction_cache import get_pdf_extraction_cache
 
 
 class PDFParser:
     """Handles PDF parsing and content extraction."""
     
-    def __init__(self):
-        self.output_dir = Path("/tmp/flashcard_images")
-        self.output_dir.mkdir(exist_ok=True)
-    
     def extract_text_and_metadata(self, pdf_path: str) -> Dict[str, Any]:
         """Extract text content and metadata from PDF."""
-        doc = fitz.open(pdf_path)
-        
+        # Shared with course creation, a PDF uploaded there is not parsed again
+        extraction = get_pdf_extraction_cache().get_file(pdf_path)
+        return self._to_pdf_data(extraction)
+
+    async def extract_text_and_metadata_async(self, pdf_path: str) -> Dict[str, Any]:
+        """Async variant of extract_text_and_metadata, extraction runs off the event loop."""
+        extraction = await get_pdf_extraction_cache().get_file_async(pdf_path)
+        return self._to_pdf_data(extraction)
+
+    @staticmethod
+    def _to_pdf_data(extraction) -> Dict[str, Any]:
         # Extract basic metadata
         metadata = {
-            "title": doc.metadata.get("title", "Unknown"),
-            "author": doc.metadata.get("author", "Unknown"),
-            "page_count": len(doc)
+            "title": extraction.metadata.get("title", "Unknown"),
+            "author": extraction.metadata.get("author", "Unknown"),
+            "page_count": extraction.page_count
         }
-        
+
         # Extract text content by page
         pages = []
-        toc = doc.get_toc()  # Table of contents
-        
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            text = page.get_text()
+        toc = extraction.toc  # Table of contents
+
+        for page_num, text in enumerate(extraction.page_texts()):
             pages.append({
                 "page_num": page_num + 1,
                 "text": text,
                 "char_count": len(text)
             })
 
-        doc.close()
-
         return {
             "metadata": metadata,
             "pages": pages,
             "toc": toc,
-            "total_text": " ".join([p["text"] for p in pages])
         }
 
+    def extract_outline(self, pdf_path: str) -> Dict[str, Any]:
+        """Metadata and table of contents only; page texts are not parsed."""
+        extraction = get_pdf_extraction_cache().peek_file(pdf_path)
+        if extraction is not None:
+            metadata, toc, page_count = extraction.metadata, extraction.toc, extraction.page_count
+        else:
+            with fitz_lock:
+                doc = fitz.open(pdf_path)
+                try:
+                    metadata, toc, page_count = dict(doc.metadata or {}), doc.get_toc(), len(doc)
+                finally:
+                    doc.close()
+        return {
+            "metadata": {
+                "title": metadata.get("title", "Unknown"),
+                "author": metadata.get("author", "Unknown"),
+                "page_count": page_count
+            },
+            "toc": toc,
+        }
+
+    def iter_pages(self, pdf_path: str) -> Iterator[str]:
+        """Page texts one at a time; a PDF that is not cached yet is parsed page by page."""
+        extraction = get_pdf_extraction_cache().peek_file(pdf_path)
+        if extraction is not None:
+            return iter(extraction.page_texts())
+        return iter_page_texts(pdf_path, strip=settings.PDF_STRIP_BOILERPLATE)
+
+    def first_chunk(self, pdf_path: str, max_chars: int) -> str:
+        """Text of the first pages up to max_chars; the document is opened and closed on the calling thread."""
+        pages = self.iter_pages(pdf_path)
+        try:
+            return next(iter_overlapping_chunks(pages, max_chars, 0), "")
+        finally:
+            close = getattr(pages, "close", None)
+            if close is not None:
+                close()
+
     def extract_images_for_learning(self, pdf_path: str, chapter_pages: List[int]) -> List[str]:
-        """Convert specific PDF pages to images for learning flashcards."""
+        """Render specific PDF pages (0-indexed) to images for learning flashcards."""
         try:
-            # Convert specified pages to images
-            images = convert_from_path(
-                pdf_path,
-                first_page=min(chapter_pages),
-                last_page=max(chapter_pages),
-                dpi=150
-            )
-
-            image_paths = []
-            for i, img in enumerate(images):
-                img_path = self.output_dir / f"chapter_{uuid.uuid4().hex[:8]}.png"
-                img.save(img_path, "PNG")
-                image_paths.append(str(img_path))
-
-            return image_paths
+            # Rendered with PyMuPDF and cached per page, overlapping chapters reuse the images
+            return get_page_renderer().render(pdf_path, chapter_pages)
         except Exception as e:
             print(f"Error converting PDF pages to images: {e}")
             return []
-    
+
+    async def extract_images_for_learning_async(self, pdf_path: str, chapter_pages: List[int]) -> List[str]:
+        """Async variant of extract_images_for_learning, rendering runs off the event loop."""
+        try:
+            return await get_page_renderer().render_async(pdf_path, chapter_pages)
+        except Exception as e:
+            print(f"Error converting PDF pages to images: {e}")
+            return []
+
     def identify_chapters(self, pdf_data: Dict[str, Any], chapter_mode: str, slides_per_chapter: Optional[int] = None) -> List[Dict[str, Any]]:
         """Identify chapter boundaries in the PDF."""
         if chapter_mode == "manual" and slides_per_chapter:
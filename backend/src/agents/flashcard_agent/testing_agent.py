@@ -2,7 +2,7 @@ import asyncio
 import json
 import random
 import time
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional
 
 from google.adk.agents import LlmAgent
 from google.adk.runners import Runner
@@ -11,10 +11,14 @@ from .instructions_txt import instructions
 from .schema import MultipleChoiceQuestion, TaskStatus
 from ..agent import StandardAgent
 from ..utils import create_text_query
+from ...services.data_processors.chunker import iter_overlapping_chunks
+from ...services.llm_scheduler import Priority
+from ...services.pdf_extraction import iterate_in_thread
 
 
 class TestingFlashcardAgent(StandardAgent):
     """Generates multiple choice questions for testing."""
+    priority = Priority.FLASHCARDS
 
     def __init__(self, app_name: str, session_service):
         # Call parent constructor to properly initialize StandardAgent
@@ -186,67 +190,7 @@ class TestingFlashcardAgent(StandardAgent):
         """Process a single chunk in parallel with rate limiting."""
         async with semaphore:
             try:
-                # Add small delay to avoid overwhelming the API
-                await asyncio.sleep(0.5 * chunk_index)
-
-                prompt = f"""
-                Generate {chunk_questions} multiple choice questions from the following text content.
-                Difficulty level: {difficulty}
-                
-                Requirements:
-                - Each question should test understanding of key concepts
-                - Provide 4 answer choices (A, B, C, D)
-                - Only one correct answer per question
-                - Create plausible distractors that test common misconceptions
-                - Questions should be clear and unambiguous
-                - Focus on important concepts, not trivial details
-                
-                Text content:
-                {chunk}
-                
-                Return the response as a JSON array with this exact format:
-                [
-                    {{
-                        "question": "Question text here?",
-                        "options": {{
-                            "A": "First option",
-                            "B": "Second option", 
-                            "C": "Third option",
-                            "D": "Fourth option"
-                        }},
-                        "correct_answer": "A",
-                        "explanation": "Brief explanation of why this is correct"
-                    }}
-                ]
-                """
-
-                response = await self.run(
-                    user_id="system", state={}, content=create_text_query(prompt)
-                )
-
-                if response.get("status") != "success":
-                    print(f"Error in agent response: {response}")
-                    return []
-
-                response_text = response.get("explanation", "")
-                questions_data = self._parse_questions_response(response_text)
-
-                questions = []
-                for q_data in questions_data:
-                    # Add credit note to explanation
-                    explanation = q_data.get("explanation", "")
-                    if explanation:
-                        explanation += "\n\n---\n*Created with Mana AI* - [mana-ai.de](https://mana-ai.de)"
-                    else:
-                        explanation = "---\n*Created with Mana AI* - [mana-ai.de](https://mana-ai.de)"
-
-                    question = MultipleChoiceQuestion(
-                        question=q_data["question"],
-                        options=q_data["options"],
-                        correct_answer=q_data["correct_answer"],
-                        explanation=explanation,
-                    )
-                    questions.append(question)
+                questions = await self._generate_chunk_questions(chunk, difficulty, chunk_questions)
 
                 # Update progress
                 if progress_callback and start_time:
@@ -270,36 +214,177 @@ class TestingFlashcardAgent(StandardAgent):
                 print(f"Error processing chunk {chunk_index}: {e}")
                 return []
 
-    def _split_text_into_chunks(
-        self, text: str, chunk_size: int, overlap: int
-    ) -> List[str]:
-        """Split text into overlapping chunks."""
-        chunks = []
-        start = 0
+    async def _generate_chunk_questions(
+        self, chunk: str, difficulty: str, chunk_questions: int
+    ) -> List[MultipleChoiceQuestion]:
+        """Ask the model for chunk_questions questions about one chunk of text."""
+        prompt = f"""
+        Generate {chunk_questions} multiple choice questions from the following text content.
+        Difficulty level: {difficulty}
+        
+        Requirements:
+        - Each question should test understanding of key concepts
+        - Provide 4 answer choices (A, B, C, D)
+        - Only one correct answer per question
+        - Create plausible distractors that test common misconceptions
+        - Questions should be clear and unambiguous
+        - Focus on important concepts, not trivial details
+        
+        Text content:
+        {chunk}
+        
+        Return the response as a JSON array with this exact format:
+        [
+            {{
+                "question": "Question text here?",
+                "options": {{
+                    "A": "First option",
+                    "B": "Second option", 
+                    "C": "Third option",
+                    "D": "Fourth option"
+                }},
+                "correct_answer": "A",
+                "explanation": "Brief explanation of why this is correct"
+            }}
+        ]
+        """
 
-        while start < len(text):
-            end = start + chunk_size
-            chunk = text[start:end]
+        response = await self.run(
+            user_id="system", state={}, content=create_text_query(prompt)
+        )
 
-            # Try to break at sentence boundary
-            if end < len(text):
-                last_period = chunk.rfind(".")
-                last_newline = chunk.rfind("\n")
-                break_point = max(last_period, last_newline)
+        if response.get("status") != "success":
+            print(f"Error in agent response: {response}")
+            return []
 
-                if (
-                    break_point > start + chunk_size // 2
-                ):  # Only if break point is reasonable
-                    chunk = text[start : start + break_point + 1]
-                    end = start + break_point + 1
+        response_text = response.get("explanation", "")
+        questions_data = self._parse_questions_response(response_text)
 
-            chunks.append(chunk.strip())
-            start = end - overlap
+        questions = []
+        for q_data in questions_data:
+            # Add credit note to explanation
+            explanation = q_data.get("explanation", "")
+            if explanation:
+                explanation += "\n\n---\n*Created with Mana AI* - [mana-ai.de](https://mana-ai.de)"
+            else:
+                explanation = "---\n*Created with Mana AI* - [mana-ai.de](https://mana-ai.de)"
 
-            if start >= len(text):
-                break
+            question = MultipleChoiceQuestion(
+                question=q_data["question"],
+                options=q_data["options"],
+                correct_answer=q_data["correct_answer"],
+                explanation=explanation,
+            )
+            questions.append(question)
+
+        return questions
 
-        return chunks
+    async def generate_questions_from_pages(
+        self,
+        pages: Iterable[str],
+        difficulty: str,
+        total_pages: int = 0,
+        max_questions: int = 1000,
+        min_questions: int = 5,
+        chunk_size: int = 8000,
+        overlap: int = 500,
+        max_concurrency: int = 3,
+        progress_callback=None,
+    ) -> List[MultipleChoiceQuestion]:
+        """
+        Generate questions while the pages are still being read.
+
+        Overlapping chunks are cut straight from the page iterator (on one dedicated thread,
+        so lazy PDF parsing neither blocks the event loop nor moves an open document between
+        threads) and each chunk is sent to the model
+        as soon as it is complete. At most max_concurrency chunks are in flight; reading
+        pauses until one finishes, so memory stays bounded by the chunk size whatever the
+        length of the document.
+
+        Every page read adds one question to the budget (two for pages over 1000
+        characters), like the estimate shown for the upload; each chunk asks for the budget
+        accumulated since the previous chunk, the last chunk tops the total up to
+        min_questions, and no more than max_questions are requested.
+        """
+        budget = 0
+        pages_read = 0
+
+        def counted(page_texts: Iterable[str]) -> Iterator[str]:
+            nonlocal budget, pages_read
+            for page_text in page_texts:
+                pages_read += 1
+                budget += 2 if len(page_text) > 1000 else 1
+                yield page_text
+
+        def read_chunks() -> Iterator[str]:
+            try:
+                yield from iter_overlapping_chunks(counted(pages), chunk_size, overlap)
+            finally:
+                # Closes the page iterator (and the PDF) on the thread that read it
+                close = getattr(pages, "close", None)
+                if close is not None:
+                    close()
+
+        chunks = iterate_in_thread(read_chunks())
+        start_time = time.time()
+        requested = 0
+        completed = 0
+        pending = set()
+        all_questions: List[MultipleChoiceQuestion] = []
+
+        def collect(done) -> None:
+            nonlocal completed
+            for task in done:
+                completed += 1
+                try:
+                    all_questions.extend(task.result())
+                except Exception as e:
+                    print(f"Error in chunk processing: {e}")
+                if progress_callback:
+                    progress = 40 + int(min(1.0, pages_read / total_pages) * 45) if total_pages else 40
+                    progress_callback(
+                        TaskStatus.GENERATING,
+                        progress,
+                        {
+                            "activity": f"Generated questions for {completed} chunks ({pages_read}/{total_pages or '?'} pages read)",
+                            "chunk_progress": f"{completed}",
+                            "elapsed_time": f"{time.time() - start_time:.1f}s",
+                        },
+                    )
+
+        try:
+            # One chunk of look-ahead tells whether the current chunk is the last one
+            chunk = await anext(chunks, None)
+            while chunk is not None and requested < max_questions:
+                chunk_questions = max(1, budget - requested)
+                next_chunk = await anext(chunks, None)
+                if next_chunk is None:
+                    chunk_questions = max(chunk_questions, min_questions - requested)
+                chunk_questions = min(chunk_questions, max_questions - requested)
+                requested += chunk_questions
+
+                while len(pending) >= max_concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    collect(done)
+                pending.add(asyncio.create_task(
+                    self._generate_chunk_questions(chunk, difficulty, chunk_questions)
+                ))
+                chunk = next_chunk
+        finally:
+            await chunks.aclose()
+
+        if pending:
+            done, _ = await asyncio.wait(pending)
+            collect(done)
+
+        random.shuffle(all_questions)
+        return all_questions
+
+    def _split_text_into_chunks(
+        self, text: str, chunk_size: int, overlap: int
+    ) -> List[str]:
+        """Split text into overlapping chunks."""
+        return list(iter_overlapping_chunks([text], chunk_size, overlap))
 
     def _parse_questions_response(self, response) -> List[dict]:
         """Parse the AI response to extract questions data."""
@@ -9,11 +9,14 @@ from google.adk.runners import Runner
 from google.genai import types
 
 from ..agent import StructuredAgent
+from ...services.llm_scheduler import Priority
 from ..utils import load_instruction_from_file
 from .schema import Grading
 
 
 class GraderAgent(StructuredAgent):
+    priority = Priority.GRADING
+
     def __init__(self, app_name: str, session_service):
         # Create the planner agent
         grader_agent = LlmAgent(
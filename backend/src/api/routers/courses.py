@@ -3,7 +3,6 @@ from fastapi import (
     Depends,
     HTTPException,
     status,
-    BackgroundTasks,
     WebSocket,
     WebSocketDisconnect,
 )
@@ -14,14 +13,16 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from ...db.models.db_course import Chapter, Course, CourseStatus
+from ...db.models.db_job import JobStatus
 from ...db.models.db_user import User
 from ...services.agent_service import AgentService
 from ...services.notification_service import manager as ws_manager
 from ...utils.auth import get_current_active_user
 from ...db.database import get_db, get_db_context, SessionLocal
-from ...db.crud import courses_crud, chapters_crud, users_crud, usage_crud
+from ...db.crud import courses_crud, chapters_crud, users_crud, usage_crud, jobs_crud, checkpoints_crud
 from ...services import course_service
 from ...services.course_service import verify_course_ownership
+from ...services.job_worker import enqueue_course_creation, enqueue_course_resume
 
 # from ...services.notification_service import manager as ws_manager
 from ..schemas.course import (
@@ -46,11 +47,10 @@ agent_service = AgentService()
 @router.post("/create")
 async def create_course_request(
     course_request: CourseRequest,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
 ) -> CourseInfo:
     """
-    Initiate course creation as a background task and return a task ID for WebSocket progress updates.
+    Queue the course creation for a job worker and return the course for WebSocket progress updates.
     """
 
     with get_db_context() as db:
@@ -71,14 +71,13 @@ async def create_course_request(
             )
 
         task_id = str(uuid.uuid4())
-        # Add the long-running course creation to background tasks
-        background_tasks.add_task(
-            agent_service.create_course,
+        # The long-running course creation survives restarts of this process in the job queue
+        enqueue_course_creation(
+            db,
             user_id=str(current_user.id),
             course_id=course.id,
             request=course_request,
             task_id=task_id,
-            ws_manager=ws_manager,
         )
 
         return CourseInfo(
@@ -89,6 +88,62 @@ async def create_course_request(
         )
 
 
+@router.post("/{course_id}/cancel")
+async def cancel_course_creation(
+    course_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Cancel the queued or running creation of a course.
+    A running creation stops at the next heartbeat of its worker.
+    """
+    await verify_course_ownership(course_id, str(current_user.id), db)
+
+    job = jobs_crud.get_active_job_by_course_id(db, course_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Course is not being created",
+        )
+    job = jobs_crud.request_cancel(db, job.id)
+    if job.status == JobStatus.CANCELLED:
+        # Never started: no worker will settle the course
+        courses_crud.update_course(
+            db, course_id, status=CourseStatus.FAILED, error_msg="Course creation was cancelled."
+        )
+
+    return {"course_id": course_id, "job_status": job.status.value}
+
+
+@router.post("/{course_id}/resume")
+async def resume_course_creation(
+    course_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Continue an interrupted or failed course creation from its checkpoint.
+    Completed chapters are kept, only the missing ones are generated.
+    """
+    await verify_course_ownership(course_id, str(current_user.id), db)
+
+    if jobs_crud.get_active_job_by_course_id(db, course_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Course is already being created",
+        )
+    if not checkpoints_crud.get_checkpoint(db, course_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Course has no unfinished creation to resume",
+        )
+    courses_crud.update_course(db, course_id, status=CourseStatus.CREATING, error_msg=None)
+    job = enqueue_course_resume(db, str(current_user.id), course_id)
+
+    return {"course_id": course_id, "job_status": job.status.value}
+
+
 @router.get("/", response_model=List[CourseInfo])
 async def get_user_courses(
     current_user: User = Depends(get_current_active_user),
@@ -282,6 +337,11 @@ async def delete_course(
     # Verify course ownership
     course = await verify_course_ownership(course_id, current_user.id, db)
 
+    # Stop a creation still in progress
+    job = jobs_crud.get_active_job_by_course_id(db, course_id)
+    if job:
+        jobs_crud.request_cancel(db, job.id)
+
     # Delete the course (cascades to chapters)
     success = courses_crud.delete_course(db, course_id)
 
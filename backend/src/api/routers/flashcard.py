@@ -19,7 +19,7 @@ from ...services.flashcard_service import FlashcardService
 from ...agents.flashcard_agent.schema import FlashcardConfig, FlashcardType
 from ...utils.auth import get_current_active_user
 from ...db.models.db_user import User
-from google.adk.sessions import InMemorySessionService
+from ...services.adk_session_service import BoundedSessionService
 
 router = APIRouter(prefix="/anki", tags=["flashcard"])
 
@@ -32,7 +32,7 @@ def get_flashcard_service() -> FlashcardService:
     global flashcard_service
     if flashcard_service is None:
         # Initialize with proper session service like other agents
-        session_service = InMemorySessionService()
+        session_service = BoundedSessionService()
         flashcard_service = FlashcardService("mana ai", session_service)
     return flashcard_service
 
@@ -63,6 +63,66 @@ DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
 DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
 DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", 10))  # Optional
 
+# Vector store settings
+# Storage backend: "tidb_tables" (legacy per-course tables), "tidb" (shared vector_embeddings table
+# in TiDB Cloud) or "numpy" (in-process). Existing deployments switch to "tidb" only after
+# `python migrate_to_tidb.py backfill` has copied their per-course tables into the shared one.
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "tidb_tables").lower()
+# numpy backend: directory for persisted collections (empty = memory only) and whether to memory-map them
+VECTOR_LOCAL_PATH = os.getenv("VECTOR_LOCAL_PATH", "/tmp/mana_cache/vectors")
+VECTOR_LOCAL_MMAP = os.getenv("VECTOR_LOCAL_MMAP", "true").lower() == "true"
+# numpy backend: store "none" (float32), "float16" or "int8" (per-vector scale) codes; with rescoring
+# the best k * VECTOR_RESCORE_FACTOR candidates are re-ranked on exact float32 vectors kept as well.
+# Rescoring trades size for recall: int8 codes alone are 3.98x smaller than float32, int8 plus the
+# float32 copy is 1.25x larger (see the quantized_recall benchmark)
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none").lower()
+VECTOR_RESCORE = os.getenv("VECTOR_RESCORE", "false").lower() == "true"
+VECTOR_RESCORE_FACTOR = int(os.getenv("VECTOR_RESCORE_FACTOR", 4))
+# Metadata filters are evaluated inside the vector query; if that fails we over-fetch
+# VECTOR_FILTER_OVERFETCH * k rows and widen (x4) up to VECTOR_FILTER_MAX_FETCH rows
+VECTOR_FILTER_PUSHDOWN = os.getenv("VECTOR_FILTER_PUSHDOWN", "true").lower() == "true"
+VECTOR_FILTER_OVERFETCH = int(os.getenv("VECTOR_FILTER_OVERFETCH", 4))
+VECTOR_FILTER_MAX_FETCH = int(os.getenv("VECTOR_FILTER_MAX_FETCH", 1000))
+# Threads of the dedicated vector executor = max concurrent embedding/vector DB calls per worker
+VECTOR_EXECUTOR_WORKERS = int(os.getenv("VECTOR_EXECUTOR_WORKERS", 8))
+# Max number of per-collection TiDB vector clients (each with its own pool) kept alive
+VECTOR_CLIENT_CACHE_SIZE = int(os.getenv("VECTOR_CLIENT_CACHE_SIZE", 32))
+# Clients unused for this many seconds get their pool disposed (0 disables)
+VECTOR_CLIENT_IDLE_SECONDS = int(os.getenv("VECTOR_CLIENT_IDLE_SECONDS", 900))
+# Texts per embedding request / rows per INSERT for bulk ingestion (Gemini allows up to 100)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 100))
+# Parsed PDFs (per-page text, TOC, metadata) keyed by sha256 of the file, shared by all extractors
+PDF_CACHE_ENABLED = os.getenv("PDF_CACHE_ENABLED", "true").lower() == "true"
+PDF_CACHE_PATH = os.getenv("PDF_CACHE_PATH", "/tmp/mana_cache/pdf")
+PDF_CACHE_MEMORY_ENTRIES = int(os.getenv("PDF_CACHE_MEMORY_ENTRIES", 16))
+PDF_CACHE_MAX_MB = int(os.getenv("PDF_CACHE_MAX_MB", 512))
+# PDFs with at least PDF_PARALLEL_MIN_PAGES pages are extracted page-parallel on a process pool
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", min(4, os.cpu_count() or 1)))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", 64))
+# Strip running headers/footers and page numbers: text blocks in the top/bottom PDF_BOILERPLATE_BAND
+# of the page height that repeat (digits masked) on PDF_BOILERPLATE_MIN_SHARE of the pages
+PDF_STRIP_BOILERPLATE = os.getenv("PDF_STRIP_BOILERPLATE", "true").lower() == "true"
+PDF_BOILERPLATE_BAND = float(os.getenv("PDF_BOILERPLATE_BAND", 0.12))
+PDF_BOILERPLATE_MIN_SHARE = float(os.getenv("PDF_BOILERPLATE_MIN_SHARE", 0.4))
+# Learning flashcard page images, rendered once per (PDF sha256, page, size) into PAGE_IMAGE_CACHE_PATH.
+# Format "png", "jpeg" or "webp"; PAGE_IMAGE_WIDTH > 0 scales pages to that width in pixels instead of DPI
+PAGE_IMAGE_CACHE_PATH = os.getenv("PAGE_IMAGE_CACHE_PATH", "/tmp/flashcard_images")
+PAGE_IMAGE_DPI = int(os.getenv("PAGE_IMAGE_DPI", 150))
+PAGE_IMAGE_WIDTH = int(os.getenv("PAGE_IMAGE_WIDTH", 0))
+PAGE_IMAGE_FORMAT = os.getenv("PAGE_IMAGE_FORMAT", "png").lower()
+PAGE_IMAGE_QUALITY = int(os.getenv("PAGE_IMAGE_QUALITY", 80))
+PAGE_IMAGE_CACHE_MAX_MB = int(os.getenv("PAGE_IMAGE_CACHE_MAX_MB", 1024))
+# RAG chunking: approximate tokens per chunk and tokens shared by consecutive chunks
+CHUNK_TARGET_TOKENS = int(os.getenv("CHUNK_TARGET_TOKENS", 256))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", 32))
+# Drop exact and near-duplicate paragraphs (MinHash Jaccard >= DEDUP_THRESHOLD) before embedding
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.8))
+# Persistent embedding cache keyed by (model, task type, sha256 of normalized text)
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "/tmp/mana_cache/embeddings.sqlite3")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 200000))
+
 
 # Google OAuth settings
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
@@ -78,6 +138,50 @@ FRONTEND_BASE_URL = os.getenv(
 UNSPLASH_ACCESS_KEY = os.getenv("UNSPLASH_ACCESS_KEY")
 UNSPLASH_SECRET_KEY = os.getenv("UNSPLASH_SECRET_KEY")
 
+# LLM scheduler: max concurrent agent runs per worker, requests per minute per model
+# (LLM_RATE_LIMITS="model=rpm,..."; others use LLM_DEFAULT_RPM) with bursts of LLM_RATE_BURST_SECONDS
+# worth of requests; a waiting run moves up one priority class every LLM_PRIORITY_AGING_SECONDS
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", 16))
+LLM_RATE_LIMITS = os.getenv("LLM_RATE_LIMITS", "")
+LLM_DEFAULT_RPM = float(os.getenv("LLM_DEFAULT_RPM", 600))
+LLM_RATE_BURST_SECONDS = float(os.getenv("LLM_RATE_BURST_SECONDS", 5))
+LLM_PRIORITY_AGING_SECONDS = float(os.getenv("LLM_PRIORITY_AGING_SECONDS", 30))
+# Opt-in cache of final agent responses for the agents (LlmAgent names) listed in LLM_CACHE_AGENTS,
+# keyed by agent, model, instructions + session state and the message parts; entries expire after
+# LLM_CACHE_TTL_HOURS, the least recently used are evicted above LLM_CACHE_MAX_ENTRIES
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+LLM_CACHE_AGENTS = os.getenv("LLM_CACHE_AGENTS", "info_agent,image_agent,grader_agent,planner_agent")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "/tmp/mana_cache/llm_responses.sqlite3")
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", 168))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 20000))
+# Model backend of the agents: "gemini", "record" (gemini, responses appended to LLM_FIXTURES_PATH),
+# "replay" (answers from LLM_FIXTURES_PATH) or "synthetic" (generated from the output schemas);
+# fake latencies per agent as "agent=median_ms:sigma,...", log-normal, "default" for all others
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+LLM_FIXTURES_PATH = os.getenv("LLM_FIXTURES_PATH", "/tmp/mana_cache/llm_fixtures")
+LLM_FAKE_LATENCIES = os.getenv("LLM_FAKE_LATENCIES", "default=800:0.5")
+# Course creation job queue (jobs table): each worker runs up to JOB_WORKER_CONCURRENCY jobs, at most
+# JOB_MAX_PER_USER of one user across all workers; a job whose worker missed heartbeats for
+# JOB_LEASE_SECONDS is retried until JOB_MAX_ATTEMPTS. JOB_EMBEDDED_WORKER runs a worker inside the
+# web process (otherwise start "python -m src.worker" processes)
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", 4))
+JOB_MAX_PER_USER = int(os.getenv("JOB_MAX_PER_USER", 2))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 60))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", 15))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 1))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 2))
+JOB_EMBEDDED_WORKER = os.getenv("JOB_EMBEDDED_WORKER", "true").lower() == "true"
+# Courses stuck in "creating" without a job are resumed from their checkpoint up to this many times
+COURSE_MAX_RESUMES = int(os.getenv("COURSE_MAX_RESUMES", 2))
+# Agent state of courses being created: "memory" (per worker) or "database" (course_states table,
+# shared by all workers); at most STATE_MAX_COURSES states are cached per worker
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory").lower()
+STATE_MAX_COURSES = int(os.getenv("STATE_MAX_COURSES", 500))
+# In-memory ADK sessions (one per agent call, deleted after the call): sessions idle for
+# ADK_SESSION_TTL_SECONDS expire (0 = never), above ADK_MAX_SESSIONS the least recently used are evicted
+ADK_MAX_SESSIONS = int(os.getenv("ADK_MAX_SESSIONS", 1000))
+ADK_SESSION_TTL_SECONDS = float(os.getenv("ADK_SESSION_TTL_SECONDS", 1800))
+
 # Google Gemini API settings
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
@@ -4,7 +4,12 @@ from fastapi import FastAPI
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
+from ..config import settings
 from ..core.routines import update_stuck_courses
+from ..services.pdf_extraction import pdf_extraction_pool
+from ..services.vector_backends import get_vector_backend
+from ..services.vector_client_registry import vector_client_registry
+from ..services.vector_executor import vector_executor
 
 scheduler = AsyncIOScheduler()
 logger = logging.getLogger(__name__)
@@ -16,16 +21,35 @@ async def lifespan(app: FastAPI):
     
     try:
         scheduler.add_job(update_stuck_courses, 'interval', hours=1)
+        scheduler.add_job(vector_client_registry.evict_idle, 'interval', minutes=5)
         scheduler.start()
         logger.info("Scheduler started.")   
 
+        if settings.JOB_EMBEDDED_WORKER:
+            from ..api.routers.courses import agent_service
+            from ..services.job_worker import JobWorker, course_job_handlers
+            from ..services.notification_service import manager as ws_manager
+
+            job_worker = JobWorker(course_job_handlers(agent_service, ws_manager))
+            job_worker.start()
+            app.state.job_worker = job_worker
+
         yield
     except Exception as e:
         logger.error(f"Error during startup: {str(e)}", exc_info=True)
         raise
     finally:
         logger.info("Shutting down application...")
+        job_worker = getattr(app.state, "job_worker", None)
+        if job_worker is not None:
+            # Running course creations go back to the queue for the next worker
+            await job_worker.stop()
+            logger.info("Job worker stopped.")
         if scheduler.running:
             scheduler.shutdown()
             logger.info("Scheduler stopped.")
+        vector_executor.shutdown()
+        pdf_extraction_pool.shutdown()
+        get_vector_backend().flush()
+        vector_client_registry.clear()
         logger.info("Application shutdown complete.")
@@ -7,14 +7,19 @@ from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
+from ..config import settings
+from ..db.crud import checkpoints_crud
 from ..db.database import get_db
 from ..db.models.db_course import Course, CourseStatus  # Your SQLAlchemy model
+from ..db.models.db_job import Job, JobStatus
+from ..services.job_worker import enqueue_course_resume
 
 
 def update_stuck_courses():
     """
-    Check for courses that are stuck in 'creating' status for more than 2 hours
-    and mark them as 'error'.
+    Check for courses that are stuck in 'creating' status for more than 2 hours.
+    Courses with a queued or running job are still in progress; the others are resumed
+    from their checkpoint, or marked as 'error' without one or after COURSE_MAX_RESUMES resumes.
     """
     db_gen = get_db()
     db: Session = next(db_gen)
@@ -24,18 +29,33 @@ def update_stuck_courses():
     try:
         threshold = datetime.now(timezone.utc) - timedelta(hours=2) # 2 hours threshold
 
+        active_jobs = db.query(Job.course_id).filter(
+            Job.course_id.isnot(None),
+            Job.status.in_((JobStatus.QUEUED, JobStatus.RUNNING))
+        )
         stuck_courses = db.query(Course).filter(
             Course.status == "creating",
-            Course.created_at < threshold
+            Course.created_at < threshold,
+            ~Course.id.in_(active_jobs)
         ).all()
 
+        resumed = 0
         for course in stuck_courses:
+            checkpoint = checkpoints_crud.get_checkpoint(db, course.id)
+            if checkpoint and checkpoint["resume_count"] < settings.COURSE_MAX_RESUMES:
+                logging.info("Resuming stuck course %s from its checkpoint.", course.id)
+                enqueue_course_resume(db, course.user_id, course.id)
+                resumed += 1
+                continue
+
             logging.info("Marking course %s as error due to timeout.", course.id)
 
             course.status = CourseStatus.FAILED
             course.error_msg = "Course creation timed out."
         db.commit()
-        logging.info("Marked %s stuck courses as error.", len(stuck_courses))
+        logging.info(
+            "Resumed %s and marked %s stuck courses as error.", resumed, len(stuck_courses) - resumed
+        )
 
     except SQLAlchemyError as e:
         logging.error("Scheduler error: %s", e)
@@ -0,0 +1,82 @@
+import json
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from ..models.db_course import CourseCheckpoint
+
+
+def _as_dict(checkpoint: CourseCheckpoint) -> Dict[str, Any]:
+    return {
+        "course_id": checkpoint.course_id,
+        "request": json.loads(checkpoint.request),
+        "resume_count": checkpoint.resume_count,
+        "info_done": checkpoint.info_done,
+        "ingested_document_ids": json.loads(checkpoint.ingested_document_ids),
+        "ingestion_done": checkpoint.ingestion_done,
+        "planner_chapters": json.loads(checkpoint.planner_chapters) if checkpoint.planner_chapters else None,
+        "chapter_progress": {int(index): progress for index, progress in json.loads(checkpoint.chapter_progress).items()},
+    }
+
+
+############### CHECKPOINTS
+def get_checkpoint(db: Session, course_id: int) -> Optional[Dict[str, Any]]:
+    """Get the creation checkpoint of a course with its JSON fields decoded"""
+    checkpoint = db.query(CourseCheckpoint).filter(CourseCheckpoint.course_id == course_id).first()
+    return _as_dict(checkpoint) if checkpoint else None
+
+
+def create_checkpoint(db: Session, course_id: int, request: dict) -> Dict[str, Any]:
+    """Start the checkpoint of a new course creation"""
+    checkpoint = CourseCheckpoint(
+        course_id=course_id,
+        request=json.dumps(request),
+        resume_count=0,
+        info_done=False,
+        ingested_document_ids="[]",
+        ingestion_done=False,
+        chapter_progress="{}",
+    )
+    db.add(checkpoint)
+    db.commit()
+    db.refresh(checkpoint)
+    return _as_dict(checkpoint)
+
+
+def update_checkpoint(db: Session, course_id: int, **kwargs) -> bool:
+    """Update checkpoint fields; lists and dicts are stored as JSON"""
+    checkpoint = db.query(CourseCheckpoint).filter(CourseCheckpoint.course_id == course_id).first()
+    if not checkpoint:
+        return False
+    for key, value in kwargs.items():
+        if hasattr(checkpoint, key):
+            setattr(checkpoint, key, json.dumps(value) if isinstance(value, (list, dict)) else value)
+    db.commit()
+    return True
+
+
+def add_ingested_document(db: Session, course_id: int, document_id: int) -> None:
+    """Record a document whose chunks are in the course's vector collection"""
+    checkpoint = db.query(CourseCheckpoint).filter(CourseCheckpoint.course_id == course_id).first()
+    if checkpoint:
+        ids: List[int] = json.loads(checkpoint.ingested_document_ids)
+        if document_id not in ids:
+            checkpoint.ingested_document_ids = json.dumps(ids + [document_id])
+            db.commit()
+
+
+def save_chapter_progress(db: Session, course_id: int, index: int, chapter_id: int, tester: bool) -> None:
+    """Record a chapter whose explainer succeeded (and whether its questions are saved)"""
+    checkpoint = db.query(CourseCheckpoint).filter(CourseCheckpoint.course_id == course_id).first()
+    if checkpoint:
+        progress = json.loads(checkpoint.chapter_progress)
+        progress[str(index)] = {"chapter_id": chapter_id, "tester": tester}
+        checkpoint.chapter_progress = json.dumps(progress)
+        db.commit()
+
+
+def delete_checkpoint(db: Session, course_id: int) -> bool:
+    """Delete the checkpoint of a course once it is created"""
+    deleted = db.query(CourseCheckpoint).filter(CourseCheckpoint.course_id == course_id).delete()
+    db.commit()
+    return bool(deleted)
@@ -0,0 +1,41 @@
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..models.db_course import CourseStateRecord
+
+
+############### COURSE STATES
+def get_course_state_version(db: Session, course_id: int) -> Optional[int]:
+    """Get the version of a course's stored state (cheap check whether a cached copy is current)"""
+    return db.query(CourseStateRecord.version).filter(CourseStateRecord.course_id == course_id).scalar()
+
+
+def get_course_state(db: Session, course_id: int) -> Optional[Tuple[int, str]]:
+    """Get (version, JSON data) of a course's stored state"""
+    row = (
+        db.query(CourseStateRecord.version, CourseStateRecord.data)
+        .filter(CourseStateRecord.course_id == course_id)
+        .first()
+    )
+    return (row.version, row.data) if row else None
+
+
+def save_course_state(db: Session, user_id: str, course_id: int, data: str) -> int:
+    """Create or replace a course's state; returns the new version"""
+    record = db.query(CourseStateRecord).filter(CourseStateRecord.course_id == course_id).first()
+    if record:
+        record.version += 1
+        record.data = data
+    else:
+        record = CourseStateRecord(course_id=course_id, user_id=user_id, version=1, data=data)
+        db.add(record)
+    db.commit()
+    return record.version
+
+
+def delete_course_state(db: Session, course_id: int) -> bool:
+    """Delete a course's state"""
+    deleted = db.query(CourseStateRecord).filter(CourseStateRecord.course_id == course_id).delete()
+    db.commit()
+    return bool(deleted)
@@ -0,0 +1,227 @@
+import json
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import func as sql_func
+from sqlalchemy.orm import Session
+
+from ..models.db_job import Job, JobStatus
+
+ACTIVE_STATUSES = (JobStatus.QUEUED, JobStatus.RUNNING)
+
+
+def utcnow() -> datetime:
+    """Naive UTC timestamp, compared the same way on SQLite and MySQL"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+############### JOBS
+def enqueue_job(
+    db: Session,
+    kind: str,
+    user_id: str,
+    payload: dict,
+    course_id: Optional[int] = None,
+    max_attempts: int = 1,
+) -> Job:
+    """Add a job to the queue"""
+    job = Job(
+        kind=kind,
+        user_id=user_id,
+        course_id=course_id,
+        payload=json.dumps(payload),
+        status=JobStatus.QUEUED,
+        attempts=0,
+        max_attempts=max_attempts,
+        cancel_requested=False,
+        created_at=utcnow(),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_job_by_id(db: Session, job_id: int) -> Optional[Job]:
+    """Get job by ID"""
+    return db.query(Job).filter(Job.id == job_id).first()
+
+
+def get_active_job_by_course_id(db: Session, course_id: int) -> Optional[Job]:
+    """Get the queued or running job of a course"""
+    return (
+        db.query(Job)
+        .filter(Job.course_id == course_id, Job.status.in_(ACTIVE_STATUSES))
+        .order_by(Job.id.desc())
+        .first()
+    )
+
+
+def get_running_job_count_by_user_id(db: Session, user_id: str) -> int:
+    """Get the number of jobs of a user that are currently running"""
+    return db.query(Job).filter(Job.user_id == user_id, Job.status == JobStatus.RUNNING).count()
+
+
+def claim_next_job(
+    db: Session,
+    worker_id: str,
+    lease_seconds: float,
+    max_per_user: int,
+    candidates: int = 10,
+) -> Optional[Job]:
+    """
+    Claim the oldest queued job of a user below max_per_user running jobs.
+
+    The claim is a conditional UPDATE (status still queued), so concurrent workers never
+    run the same job. Workers racing for jobs of the same user may both pass the per-user
+    check; the loser of the recount hands its job back. The returned job is detached.
+    """
+    saturated_users = (
+        db.query(Job.user_id)
+        .filter(Job.status == JobStatus.RUNNING)
+        .group_by(Job.user_id)
+        .having(sql_func.count(Job.id) >= max_per_user)
+    )
+    queued = (
+        db.query(Job.id, Job.user_id)
+        .filter(Job.status == JobStatus.QUEUED, ~Job.user_id.in_(saturated_users))
+        .order_by(Job.id)
+        .limit(candidates)
+        .all()
+    )
+    for job_id, user_id in queued:
+        now = utcnow()
+        claimed = (
+            db.query(Job)
+            .filter(Job.id == job_id, Job.status == JobStatus.QUEUED)
+            .update(
+                {
+                    Job.status: JobStatus.RUNNING,
+                    Job.worker_id: worker_id,
+                    Job.attempts: Job.attempts + 1,
+                    Job.started_at: now,
+                    Job.heartbeat_at: now,
+                    Job.lease_expires_at: now + timedelta(seconds=lease_seconds),
+                },
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        if not claimed:
+            continue  # taken by another worker
+        if get_running_job_count_by_user_id(db, user_id) > max_per_user:
+            release_job(db, job_id, worker_id)
+            continue
+        job = get_job_by_id(db, job_id)
+        db.expunge(job)
+        return job
+    return None
+
+
+def heartbeat_job(db: Session, job_id: int, worker_id: str, lease_seconds: float) -> Optional[bool]:
+    """
+    Extend the lease of a running job.
+    Returns whether cancellation was requested, or None if the worker no longer owns the job.
+    """
+    now = utcnow()
+    extended = (
+        db.query(Job)
+        .filter(Job.id == job_id, Job.worker_id == worker_id, Job.status == JobStatus.RUNNING)
+        .update(
+            {Job.heartbeat_at: now, Job.lease_expires_at: now + timedelta(seconds=lease_seconds)},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    if not extended:
+        return None
+    return bool(db.query(Job.cancel_requested).filter(Job.id == job_id).scalar())
+
+
+def finish_job(
+    db: Session, job_id: int, worker_id: str, status: JobStatus, error: Optional[str] = None
+) -> bool:
+    """Record the outcome of a job run by this worker"""
+    updated = (
+        db.query(Job)
+        .filter(Job.id == job_id, Job.worker_id == worker_id, Job.status == JobStatus.RUNNING)
+        .update(
+            {Job.status: status, Job.error: error, Job.finished_at: utcnow(), Job.lease_expires_at: None},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return bool(updated)
+
+
+def release_job(db: Session, job_id: int, worker_id: str) -> bool:
+    """Hand a running job back to the queue without counting the attempt (e.g. on worker shutdown)"""
+    updated = (
+        db.query(Job)
+        .filter(Job.id == job_id, Job.worker_id == worker_id, Job.status == JobStatus.RUNNING)
+        .update(
+            {
+                Job.status: JobStatus.QUEUED,
+                Job.worker_id: None,
+                Job.attempts: Job.attempts - 1,
+                Job.lease_expires_at: None,
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return bool(updated)
+
+
+def expire_leases(db: Session) -> List[Job]:
+    """
+    Requeue running jobs whose worker stopped sending heartbeats (crash, deploy),
+    or fail them once max_attempts is reached. Returns the affected jobs, detached.
+    """
+    now = utcnow()
+    expired = (
+        db.query(Job)
+        .filter(Job.status == JobStatus.RUNNING, Job.lease_expires_at < now)
+        .all()
+    )
+    affected = []
+    for job in expired:
+        if job.cancel_requested:
+            values = {Job.status: JobStatus.CANCELLED, Job.finished_at: now}
+        elif job.attempts < job.max_attempts:
+            values = {Job.status: JobStatus.QUEUED}
+        else:
+            values = {
+                Job.status: JobStatus.FAILED,
+                Job.finished_at: now,
+                Job.error: f"Worker {job.worker_id} lost its lease after {job.attempts} attempt(s)",
+            }
+        values.update({Job.worker_id: None, Job.lease_expires_at: None})
+        # Only if no heartbeat extended the lease in the meantime
+        updated = (
+            db.query(Job)
+            .filter(Job.id == job.id, Job.status == JobStatus.RUNNING, Job.lease_expires_at < now)
+            .update(values, synchronize_session=False)
+        )
+        if updated:
+            affected.append(job.id)
+    db.commit()
+    jobs = db.query(Job).filter(Job.id.in_(affected)).all() if affected else []
+    for job in jobs:
+        db.expunge(job)
+    return jobs
+
+
+def request_cancel(db: Session, job_id: int) -> Optional[Job]:
+    """Cancel a queued job right away, or ask the worker of a running job to stop it"""
+    cancelled = (
+        db.query(Job)
+        .filter(Job.id == job_id, Job.status == JobStatus.QUEUED)
+        .update({Job.status: JobStatus.CANCELLED, Job.finished_at: utcnow()}, synchronize_session=False)
+    )
+    if not cancelled:
+        db.query(Job).filter(Job.id == job_id, Job.status == JobStatus.RUNNING).update(
+            {Job.cancel_requested: True}, synchronize_session=False
+        )
+    db.commit()
+    return get_job_by_id(db, job_id)
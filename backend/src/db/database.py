@@ -12,7 +12,12 @@ engine = create_engine(
     pool_pre_ping=settings.DB_POOL_PRE_PING,
     pool_size=settings.DB_POOL_SIZE,
     max_overflow=settings.DB_MAX_OVERFLOW,
-    connect_args={"connect_timeout": settings.DB_CONNECT_TIMEOUT}
+    # SQLite (local runs, benchmarks) has no connect timeout and is shared across threads
+    connect_args=(
+        {"check_same_thread": False}
+        if settings.SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+        else {"connect_timeout": settings.DB_CONNECT_TIMEOUT}
+    ),
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
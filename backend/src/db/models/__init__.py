@@ -1,11 +1,12 @@
 # Database models for ManaAI application
 
 from .db_user import User
-from .db_course import Course, Chapter, PracticeQuestion
+from .db_course import Course, Chapter, PracticeQuestion, CourseCheckpoint, CourseStateRecord
 from .db_chat import Chat
 from .db_file import Document, Image
 from .db_usage import Usage
 from .db_vector import VectorEmbedding, VectorIndex
+from .db_job import Job, JobStatus
 
 __all__ = [
     # User models
@@ -14,6 +15,8 @@ __all__ = [
     "Course",
     "Chapter",
     "PracticeQuestion",
+    "CourseCheckpoint",
+    "CourseStateRecord",
     # Chat models
     "Chat",
     # File models
@@ -24,4 +27,7 @@ __all__ = [
     # Vector models
     "VectorEmbedding",
     "VectorIndex",
+    # Job queue models
+    "Job",
+    "JobStatus",
 ]
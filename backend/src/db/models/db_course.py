@@ -10,7 +10,7 @@ from sqlalchemy import (
     Enum,
     Index,
 )
-from sqlalchemy.dialects.mysql import LONGBLOB
+from sqlalchemy.dialects.mysql import LONGBLOB, LONGTEXT
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ...db.database import Base
@@ -64,6 +64,9 @@ class Course(Base):
     images = relationship(
         "Image", foreign_keys="Image.course_id", cascade="all, delete-orphan"
     )
+    checkpoint = relationship(
+        "CourseCheckpoint", uselist=False, cascade="all, delete-orphan"
+    )
 
 
 class Chapter(Base):
@@ -121,3 +124,39 @@ class PracticeQuestion(Base):
 
     # Relationships
     chapter = relationship("Chapter", back_populates="questions")
+
+
+class CourseCheckpoint(Base):
+    """Progress of a course creation, so an interrupted creation resumes where it stopped."""
+
+    __tablename__ = "course_checkpoints"
+
+    course_id = Column(Integer, ForeignKey("courses.id"), primary_key=True)
+    request = Column(Text, nullable=False)  # CourseRequest as JSON
+    resume_count = Column(Integer, nullable=False, default=0)
+
+    # Stages: course info + image, document ingestion, planner, chapters
+    info_done = Column(Boolean, nullable=False, default=False)
+    ingested_document_ids = Column(Text, nullable=False, default="[]")  # JSON list
+    ingestion_done = Column(Boolean, nullable=False, default=False)
+    planner_chapters = Column(Text, nullable=True)  # JSON list of the planner's chapters
+    # JSON {"<chapter index>": {"chapter_id": int, "tester": bool}} of chapters whose explainer succeeded
+    chapter_progress = Column(Text, nullable=False, default="{}")
+
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class CourseStateRecord(Base):
+    """Agent state of a course being created, shared by all workers (STATE_BACKEND=database)."""
+
+    __tablename__ = "course_states"
+
+    course_id = Column(Integer, primary_key=True)
+    user_id = Column(String(50), nullable=False, index=True)
+    version = Column(Integer, nullable=False, default=1)  # bumped on every write
+    data = Column(LONGTEXT, nullable=False)  # CourseState as JSON
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
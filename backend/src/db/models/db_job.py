@@ -0,0 +1,42 @@
+import enum
+
+from sqlalchemy import Boolean, Column, DateTime, Enum as SQLEnum, Index, Integer, String, Text
+
+from ..database import Base
+
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class Job(Base):
+    """Persistent background job (e.g. a course creation) claimed by worker processes under a lease."""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    kind = Column(String(50), nullable=False)  # handler name, e.g. "create_course"
+    user_id = Column(String(50), nullable=False, index=True)
+    course_id = Column(Integer, nullable=True, index=True)
+    payload = Column(Text, nullable=False)  # JSON arguments of the handler
+    status = Column(SQLEnum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=1)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    error = Column(Text, nullable=True)
+
+    # Lease of the worker running the job, extended by its heartbeats (naive UTC)
+    worker_id = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_id", "status", "id"),
+    )
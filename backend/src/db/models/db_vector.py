@@ -1,14 +1,20 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, UniqueConstraint
 from sqlalchemy.dialects.mysql import LONGTEXT
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from tidb_vector.sqlalchemy import VectorType
 from ...db.database import Base
 
+EMBEDDING_DIMENSION = 768
+
 
 class VectorEmbedding(Base):
     """
     Vector embeddings table for TiDB Cloud vector search.
     This table stores document embeddings with their metadata for semantic search.
+
+    All courses share this table; every query is scoped by course_id. The HNSW index on
+    embedding_vector is created by migrate_to_tidb.py and tracked in VectorIndex.
     """
 
     __tablename__ = "vector_embeddings"
@@ -16,14 +22,15 @@ class VectorEmbedding(Base):
     # Primary key
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
 
-    # Foreign key relationships
-    course_id = Column(Integer, ForeignKey("courses.id"), nullable=False, index=True)
-    chapter_id = Column(Integer, ForeignKey("chapters.id"), nullable=True, index=True)
+    # Owning course/chapter. No foreign keys: rows are bulk-written by the vector backend
+    # and FK checks would add a lookup per inserted row
+    course_id = Column(Integer, nullable=False)
+    chapter_id = Column(Integer, nullable=True, index=True)
 
     # Content identifiers
     content_id = Column(
-        String(255), nullable=False, index=True
-    )  # Unique identifier for the content
+        String(255), nullable=False
+    )  # Unique identifier for the content within a course
     content_type = Column(
         String(50), nullable=False
     )  # Type: 'chapter', 'document', 'note', etc.
@@ -31,11 +38,10 @@ class VectorEmbedding(Base):
     # Original text content
     text_content = Column(LONGTEXT, nullable=False)
 
-    # Vector embedding - TiDB Cloud supports VECTOR data type
-    # We'll store as JSON for now and migrate to VECTOR type when creating indexes
+    # Vector embedding - native TiDB VECTOR column
     embedding_vector = Column(
-        JSON, nullable=False
-    )  # Will contain the 768-dimensional vector
+        VectorType(EMBEDDING_DIMENSION), nullable=False
+    )  # 768-dimensional Gemini embedding
 
     # Metadata for filtering and searching
     embedding_metadata = Column(
@@ -50,13 +56,10 @@ class VectorEmbedding(Base):
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
-    # Relationships
-    course = relationship("Course", foreign_keys=[course_id])
-    chapter = relationship("Chapter", foreign_keys=[chapter_id])
-
     # Indexes for performance
     __table_args__ = (
-        # Index for course-based searches
+        # Course-scoped lookups, upserts and deletes by content id
+        UniqueConstraint("course_id", "content_id", name="uq_vector_embeddings_course_content"),
         {"mysql_charset": "utf8mb4"},
     )
 
@@ -64,7 +67,8 @@ class VectorEmbedding(Base):
 class VectorIndex(Base):
     """
     Table to track vector indexes created in TiDB Cloud.
-    This helps manage HNSW indexes for different course collections.
+    This helps manage HNSW indexes for different course collections and the
+    shared index on vector_embeddings (course_id is NULL for that one).
     """
 
     __tablename__ = "vector_indexes"
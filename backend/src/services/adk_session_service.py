@@ -0,0 +1,141 @@
+"""
+In-memory ADK session service with a bounded lifetime for its sessions.
+
+StandardAgent.run and StructuredAgent.run create a fresh session for every agent call
+(see StateService) and delete it once the call is over. A session keeps the state it was
+created with and every event of the run, e.g. the full React code of the explainer, so
+sessions that are never deleted (a crashed run, other callers) would pile up in a busy
+worker. Sessions idle for ADK_SESSION_TTL_SECONDS are expired, and above ADK_MAX_SESSIONS
+the least recently used are evicted. stats() reports the live sessions and their
+approximate size.
+"""
+import time
+from collections import OrderedDict
+from logging import getLogger
+from typing import Any, Dict, Optional, Tuple
+
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig
+
+from ..config import settings
+
+logger = getLogger(__name__)
+
+SessionKey = Tuple[str, str, str]  # (app name, user id, session id)
+
+
+class BoundedSessionService(InMemorySessionService):
+    """InMemorySessionService that expires idle sessions and caps the number of live sessions"""
+
+    def __init__(
+        self,
+        max_sessions: int = settings.ADK_MAX_SESSIONS,
+        ttl_seconds: float = settings.ADK_SESSION_TTL_SECONDS,
+    ):
+        super().__init__()
+        self.max_sessions = max(1, max_sessions)
+        self.ttl_seconds = ttl_seconds
+        # Last use (monotonic time) of each live session, least recently used first
+        self._last_used: "OrderedDict[SessionKey, float]" = OrderedDict()
+        self._counters = {"created": 0, "deleted": 0, "expired": 0, "evicted": 0}
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        self._expire()
+        session = await super().create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+        self._counters["created"] += 1
+        self._touch((app_name, user_id, session.id))
+        while len(self._last_used) > self.max_sessions:
+            key, _ = self._last_used.popitem(last=False)
+            self._remove(key)
+            self._counters["evicted"] += 1
+            logger.warning(
+                "More than %d live ADK sessions, evicted session %s of user %s", self.max_sessions, key[2], key[1]
+            )
+        return session
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        self._expire()
+        session = await super().get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+        if session is not None:
+            self._touch((app_name, user_id, session_id))
+        return session
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        key = (session.app_name, session.user_id, session.id)
+        if key in self._last_used:
+            self._touch(key)
+        return await super().append_event(session=session, event=event)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        # Unlike the base class, no (deep) copy of the session is made just to check that it exists
+        key = (app_name, user_id, session_id)
+        self._last_used.pop(key, None)
+        if self._remove(key):
+            self._counters["deleted"] += 1
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._last_used),
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl_seconds,
+            "events": sum(len(session.events) for session in self._sessions()),
+            "approx_bytes": sum(self._size(session) for session in self._sessions()),
+            **self._counters,
+        }
+
+    def _touch(self, key: SessionKey) -> None:
+        self._last_used[key] = time.monotonic()
+        self._last_used.move_to_end(key)
+
+    def _expire(self) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        deadline = time.monotonic() - self.ttl_seconds
+        while self._last_used:
+            key, last_used = next(iter(self._last_used.items()))
+            if last_used > deadline:
+                return
+            del self._last_used[key]
+            self._remove(key)
+            self._counters["expired"] += 1
+
+    def _remove(self, key: SessionKey) -> bool:
+        app_name, user_id, session_id = key
+        user_sessions = self.sessions.get(app_name, {}).get(user_id)
+        if not user_sessions or user_sessions.pop(session_id, None) is None:
+            return False
+        if not user_sessions:
+            del self.sessions[app_name][user_id]
+        return True
+
+    def _sessions(self):
+        for user_sessions in self.sessions.values():
+            for sessions in user_sessions.values():
+                yield from sessions.values()
+
+    @staticmethod
+    def _size(session: Session) -> int:
+        """Approximate bytes of a session: the length of its JSON"""
+        try:
+            return len(session.model_dump_json())
+        except ValueError:
+            return 0
@@ -9,8 +9,6 @@ from typing import List
 from logging import getLogger
 
 
-from google.adk.sessions import InMemorySessionService
-
 from ..services import vector_service
 from ..services.course_content_service import CourseContentService
 
@@ -24,10 +22,11 @@ from ..db.crud import (
     images_crud,
     questions_crud,
     courses_crud,
+    checkpoints_crud,
 )
 
 
-from google.adk.sessions import InMemorySessionService
+from .adk_session_service import BoundedSessionService
 
 from ..agents.planner_agent import PlannerAgent
 from ..agents.info_agent.agent import InfoAgent
@@ -56,8 +55,8 @@ logger = getLogger(__name__)
 class AgentService:
     def __init__(self):
 
-        # session
-        self.session_service = InMemorySessionService()
+        # session (one per agent call, see BoundedSessionService)
+        self.session_service = BoundedSessionService()
         self.app_name = "Mana AI"
         self.state_manager = StateService()
         self.query_service = QueryService(self.state_manager)
@@ -98,6 +97,40 @@ class AgentService:
                     correct_answer=q_data["correct_answer"],
                 )
 
+    async def resume_course(
+        self,
+        user_id: str,
+        course_id: int,
+        task_id: str,
+        ws_manager: WebSocketConnectionManager,
+    ):
+        """
+        Continue an interrupted course creation from its checkpoint: completed stages and chapters
+        are kept, only the missing ones are generated (the course's vector collection is reused).
+        Returns False if the course has no checkpoint to resume from.
+        """
+        with get_db_context() as db:
+            checkpoint = checkpoints_crud.get_checkpoint(db, course_id)
+            if checkpoint is None:
+                return False
+            checkpoints_crud.update_checkpoint(
+                db, course_id, resume_count=checkpoint["resume_count"] + 1
+            )
+            courses_crud.update_course(
+                db, course_id, status=CourseStatus.CREATING, error_msg=None
+            )
+        logger.info(
+            "[%s] Resuming course %s (resume %d)", task_id, course_id, checkpoint["resume_count"] + 1
+        )
+        await self.create_course(
+            user_id=user_id,
+            course_id=course_id,
+            request=CourseRequest(**checkpoint["request"]),
+            task_id=task_id,
+            ws_manager=ws_manager,
+        )
+        return True
+
     async def create_course(
         self,
         user_id: str,
@@ -108,6 +141,9 @@ class AgentService:
     ):
         """
         Main function for handling the course creation logic. Uses WebSocket for progress.
+        Progress is checkpointed per stage (course info, document ingestion, planner, each chapter's
+        explainer and tester); called again for a course with a checkpoint, completed stages are skipped.
+        Errors are re-raised once the course status has been updated.
 
         Parameters:
         user_id (str): The unique identifier of the user who is creating the course.
@@ -116,20 +152,30 @@ class AgentService:
         ws_manager (WebSocketConnectionManager): Manager to send messages over WebSockets.
         """
         course_db = None
+        session = None
         try:
             logger.info("[%s] Starting course creation for user %s", task_id, user_id)
 
-            # Log at the beginning of the task -> prevent over usage of limit
             with get_db_context() as db:
-                usage_crud.log_course_creation(
-                    db=db,
-                    user_id=user_id,
-                    course_id=course_id,
-                    detail=json.dumps(request.model_dump()),
-                )
-                logger.info(
-                    "[%s] Usage logged for course creation by user %s", task_id, user_id
-                )
+                checkpoint = checkpoints_crud.get_checkpoint(db, course_id)
+                if checkpoint is None:
+                    # Log at the beginning of the task -> prevent over usage of limit
+                    usage_crud.log_course_creation(
+                        db=db,
+                        user_id=user_id,
+                        course_id=course_id,
+                        detail=json.dumps(request.model_dump()),
+                    )
+                    logger.info(
+                        "[%s] Usage logged for course creation by user %s", task_id, user_id
+                    )
+                    checkpoint = checkpoints_crud.create_checkpoint(
+                        db, course_id, request.model_dump()
+                    )
+                else:
+                    logger.info(
+                        "[%s] Resuming course %s from its checkpoint", task_id, course_id
+                    )
 
             # Create a memory session for the course creation
             session = await self.session_service.create_session(
@@ -154,48 +200,67 @@ class AgentService:
                 len(images),
             )
 
-            # Add Data to ChromaDB for RAG
-            self.contentService.process_course_documents(
-                course_id=course_id, documents=docs
-            )
+            # Add Data to the vector store for RAG (documents ingested before a resume are kept)
+            if not checkpoint["ingestion_done"]:
 
-            # Get a short course title and description from the info_agent
-            info_response = await self.info_agent.run(
-                user_id=user_id,
-                state={},
-                content=self.query_service.get_info_query(
-                    request,
-                    docs,
-                    images,
-                ),
-            )
-            logger.info("[%s] InfoAgent response: %s", task_id, info_response["title"])
-
-            # Get unsplash image url
-            image_response = await self.image_agent.run(
-                user_id=user_id,
-                state={},
-                content=create_text_query(
-                    f"Title: {info_response['title']}, Description: {info_response['description']}"
-                ),
-            )
+                def document_ingested(document: Document):
+                    with get_db_context() as db:
+                        checkpoints_crud.add_ingested_document(db, course_id, int(document.id))
 
-            # Update course in database
-            with get_db_context() as db:
-                course_db = courses_crud.update_course(
-                    db=db,
+                await self.contentService.process_course_documents(
                     course_id=course_id,
-                    session_id=session_id,
-                    title=info_response["title"],
-                    description=info_response["description"],
-                    image_url=image_response["explanation"],
-                    total_time_hours=request.time_hours,
+                    documents=[
+                        doc for doc in docs
+                        if doc.id not in checkpoint["ingested_document_ids"]
+                    ],
+                    on_document_done=document_ingested,
                 )
-                if not course_db:
-                    raise ValueError(
-                        f"Failed to update course in DB for user {user_id} with course_id {course_id}"
+                with get_db_context() as db:
+                    checkpoints_crud.update_checkpoint(db, course_id, ingestion_done=True)
+
+            if checkpoint["info_done"]:
+                with get_db_context() as db:
+                    course_db = courses_crud.get_course_by_id(db, course_id)
+                logger.info("[%s] Course info already created", task_id)
+            else:
+                # Get a short course title and description from the info_agent
+                info_response = await self.info_agent.run(
+                    user_id=user_id,
+                    state={},
+                    content=self.query_service.get_info_query(
+                        request,
+                        docs,
+                        images,
+                    ),
+                )
+                logger.info("[%s] InfoAgent response: %s", task_id, info_response["title"])
+
+                # Get unsplash image url
+                image_response = await self.image_agent.run(
+                    user_id=user_id,
+                    state={},
+                    content=create_text_query(
+                        f"Title: {info_response['title']}, Description: {info_response['description']}"
+                    ),
+                )
+
+                # Update course in database
+                with get_db_context() as db:
+                    course_db = courses_crud.update_course(
+                        db=db,
+                        course_id=course_id,
+                        session_id=session_id,
+                        title=info_response["title"],
+                        description=info_response["description"],
+                        image_url=image_response["explanation"],
+                        total_time_hours=request.time_hours,
                     )
-            print(f"[{task_id}] Course updated in DB with ID: {course_id}")
+                    if not course_db:
+                        raise ValueError(
+                            f"Failed to update course in DB for user {user_id} with course_id {course_id}"
+                        )
+                    checkpoints_crud.update_checkpoint(db, course_id, info_done=True)
+                print(f"[{task_id}] Course updated in DB with ID: {course_id}")
 
             # Send Notification to WebSocket
             ###await ws_manager.send_json_message(task_id, {"type": "course_info", "data": "updating course info"})
@@ -222,22 +287,28 @@ class AgentService:
             ###await ws_manager.send_json_message(task_id, {"type": "course_info", "data": course_info_data})
             ###print(f"[{task_id}] Sent course_info update.")
 
-            # Query the planner agent
-            response_planner = await self.planner_agent.run(
-                user_id=user_id,
-                state=self.state_manager.get_state(
-                    user_id=user_id, course_id=course_id
-                ),
-                content=self.query_service.get_planner_query(request, docs, images),
-                debug=True,
-            )
-            if not response_planner or "chapters" not in response_planner:
-                raise ValueError(
-                    f"PlannerAgent did not return valid chapters for user {user_id} with course_id {course_id}"
+            if checkpoint["planner_chapters"] is not None:
+                response_planner = {"chapters": checkpoint["planner_chapters"]}
+                logger.info(
+                    "[%s] Reusing the %d planned chapters", task_id, len(response_planner["chapters"])
+                )
+            else:
+                # Query the planner agent
+                response_planner = await self.planner_agent.run(
+                    user_id=user_id,
+                    state=self.state_manager.get_state(
+                        user_id=user_id, course_id=course_id
+                    ),
+                    content=self.query_service.get_planner_query(request, docs, images),
+                    debug=True,
+                )
+                if not response_planner or "chapters" not in response_planner:
+                    raise ValueError(
+                        f"PlannerAgent did not return valid chapters for user {user_id} with course_id {course_id}"
+                    )
+                print(
+                    f"[{task_id}] PlannerAgent responded with {len(response_planner.get('chapters', []))} chapters."
                 )
-            print(
-                f"[{task_id}] PlannerAgent responded with {len(response_planner.get('chapters', []))} chapters."
-            )
 
             # Update course in database
             with get_db_context() as db:
@@ -246,6 +317,16 @@ class AgentService:
                     course_id=course_id,
                     chapter_count=len(response_planner["chapters"]),
                 )
+                checkpoints_crud.update_checkpoint(
+                    db, course_id, planner_chapters=response_planner["chapters"]
+                )
+
+                # Chapters of an interrupted run whose explainer did not finish are generated again
+                chapter_progress = checkpoint["chapter_progress"]
+                done_chapter_ids = {progress["chapter_id"] for progress in chapter_progress.values()}
+                for chapter in chapters_crud.get_chapters_by_course_id(db, course_id):
+                    if chapter.id not in done_chapter_ids:
+                        chapters_crud.delete_chapter(db, chapter.id)
             # Send notification to WebSocket that course info is being updated
             ###await ws_manager.send_json_message(task_id, {"type": "course_info", "data": "updating course info"})
 
@@ -260,71 +341,94 @@ class AgentService:
                     "[%s] Processing chapter %d: %s", task_id, idx + 1, topic["caption"]
                 )
 
-                # Get RAG infos for the topic
-                ragInfos = self.contentService.get_rag_infos(course_id, topic)
+                chapter_db = None
+                progress = chapter_progress.get(idx + 1)
+                if progress:
+                    with get_db_context() as db:
+                        chapter_db = chapters_crud.get_chapter_by_id(db, progress["chapter_id"])
+                        if chapter_db and progress["tester"]:
+                            logger.info("[%s] Chapter %d already created", task_id, idx + 1)
+                            return chapter_db
+                        if chapter_db:
+                            # Only the questions are missing: generate them again from scratch
+                            questions_crud.delete_questions_by_chapter(db, chapter_db.id)
+                            db.refresh(chapter_db)
+
+                if chapter_db:
+                    response_code = {"explanation": chapter_db.content}
+                else:
+                    # Get RAG infos for the topic (ranked by relevance)
+                    ragPassages = await self.contentService.get_rag_infos(course_id, topic)
+                    ragInfos = [passage["text"] for passage in ragPassages]
 
-                # Schedule image and coding agents to run concurrently as they do not depend on each other
-                coding_task = self.coding_agent.run(
-                    user_id=user_id,
-                    state=self.state_manager.get_state(
-                        user_id=user_id, course_id=course_id
-                    ),
-                    content=self.query_service.get_explainer_query(
-                        user_id,
-                        course_id,
-                        idx,
-                        request.language,
-                        request.difficulty,
-                        ragInfos,
-                    ),
-                )
+                    # Schedule image and coding agents to run concurrently as they do not depend on each other
+                    coding_task = self.coding_agent.run(
+                        user_id=user_id,
+                        state=self.state_manager.get_state(
+                            user_id=user_id, course_id=course_id
+                        ),
+                        content=self.query_service.get_explainer_query(
+                            user_id,
+                            course_id,
+                            idx,
+                            request.language,
+                            request.difficulty,
+                            ragInfos,
+                        ),
+                    )
 
-                image_task = self.image_agent.run(
-                    user_id=user_id,
-                    state={},
-                    content=self.query_service.get_explainer_image_query(
-                        user_id, course_id, idx
-                    ),
-                )
+                    image_task = self.image_agent.run(
+                        user_id=user_id,
+                        state={},
+                        content=self.query_service.get_explainer_image_query(
+                            user_id, course_id, idx
+                        ),
+                    )
 
-                # Await both tasks to complete in parallel
-                response_code, image_response = await asyncio.gather(
-                    coding_task, image_task
-                )
+                    # Await both tasks to complete in parallel
+                    response_code, image_response = await asyncio.gather(
+                        coding_task, image_task
+                    )
 
-                summary = "\n".join(topic["content"][:3])
+                    summary = "\n".join(topic["content"][:3])
 
-                # Save the chapter in db first
-                with get_db_context() as db:
-                    chapter_db = chapters_crud.create_chapter(
-                        db=db,
-                        course_id=course_id,
-                        index=idx + 1,
-                        caption=topic["caption"],
-                        summary=summary,
-                        content=(
-                            response_code.get("explanation")
-                            if isinstance(response_code, dict)
-                            and response_code.get("explanation")
-                            else 'import React from "react";\nexport default (props) => {\n  const { Latex } = props;\n  return (\n    <div style={{ padding: "20px", textAlign: "center", color: "#666" }}>\n      <h3>Content Generation Failed</h3>\n      <p>Something went wrong while generating this chapter content. Please try refreshing or contact support if the issue persists.</p>\n    </div>\n  );\n}'
-                        ),
-                        time_minutes=topic["time"],
-                        image_url=image_response["explanation"],
+                    # Save the chapter in db first
+                    with get_db_context() as db:
+                        chapter_db = chapters_crud.create_chapter(
+                            db=db,
+                            course_id=course_id,
+                            index=idx + 1,
+                            caption=topic["caption"],
+                            summary=summary,
+                            content=(
+                                response_code.get("explanation")
+                                if isinstance(response_code, dict)
+                                and response_code.get("explanation")
+                                else 'import React from "react";\nexport default (props) => {\n  const { Latex } = props;\n  return (\n    <div style={{ padding: "20px", textAlign: "center", color: "#666" }}>\n      <h3>Content Generation Failed</h3>\n      <p>Something went wrong while generating this chapter content. Please try refreshing or contact support if the issue persists.</p>\n    </div>\n  );\n}'
+                            ),
+                            time_minutes=topic["time"],
+                            image_url=image_response["explanation"],
+                        )
+
+                    # Send WebSocket notification for chapter created
+                    await ws_manager.send_chapter_created(
+                        user_id,
+                        course_id,
+                        {
+                            "chapter_id": chapter_db.id,
+                            "index": idx + 1,
+                            "caption": topic["caption"],
+                            "summary": summary,
+                            "time_minutes": topic["time"],
+                            "image_url": image_response["explanation"],
+                        },
                     )
 
-                # Send WebSocket notification for chapter created
-                await ws_manager.send_chapter_created(
-                    user_id,
-                    course_id,
-                    {
-                        "chapter_id": chapter_db.id,
-                        "index": idx + 1,
-                        "caption": topic["caption"],
-                        "summary": summary,
-                        "time_minutes": topic["time"],
-                        "image_url": image_response["explanation"],
-                    },
-                )
+                    if isinstance(response_code, dict) and response_code.get("explanation"):
+                        with get_db_context() as db:
+                            checkpoints_crud.save_chapter_progress(
+                                db, course_id, idx + 1, chapter_db.id, tester=False
+                            )
 
                 # Get response from tester agent (only if explainer agent succeeded)
                 if isinstance(response_code, dict) and response_code.get("explanation"):
@@ -355,6 +459,9 @@ class AgentService:
                             await self.save_questions(
                                 db, response_tester["questions"], chapter_db.id
                             )
+                            checkpoints_crud.save_chapter_progress(
+                                db, course_id, idx + 1, chapter_db.id, tester=True
+                            )
 
                         # Send WebSocket notification for questions ready
                         await ws_manager.send_questions_ready(
@@ -400,6 +507,9 @@ class AgentService:
                     status=CourseStatus.FINISHED,
                     chapter_count=actual_chapter_count,
                 )
+                # Nothing left to resume
+                checkpoints_crud.delete_checkpoint(db, course_id)
+            self.state_manager.evict(user_id, course_id)
 
             # Send WebSocket notification for course completed
             await ws_manager.send_course_completed(
@@ -476,12 +586,20 @@ class AgentService:
             #    "type": "error",
             #    "data": {"message": error_message, "course_id": course_id if course_db else None}
             # })
-            # Re-raise the exception if you want the background task to show as 'failed' in FastAPI logs
-            # or if something upstream needs to handle it. For now, we handle it and inform client.
-            # raise e
+
+            # A resume rebuilds the state from the checkpoint
+            self.state_manager.evict(user_id, course_id)
+
+            # The course is settled above; re-raised so the job running it is recorded as failed
+            raise
 
         finally:
             print(f"[{task_id}] Finished processing create_course background task.")
+            # Only the session's id is kept (on the course)
+            if session is not None:
+                await self.session_service.delete_session(
+                    app_name=self.app_name, user_id=user_id, session_id=session.id
+                )
             # Ensure the database session is closed if it was passed specifically for this task
             # and not managed by FastAPI's Depends. For now, assuming Depends handles it.
             # db.close() # If db session is task-specific and not managed by Depends.
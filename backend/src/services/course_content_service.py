@@ -1,8 +1,13 @@
 # backend/src/services/course_content_service.py
-from typing import List
+import asyncio
+from typing import Callable, List, Optional
 from sqlalchemy.orm import Session
+from .data_processors.chunker import TextChunker
+from .data_processors.document_readers import DOCUMENT_READERS, iter_document_sections
 from .data_processors.pdf_processor import PDFProcessor
+from .data_processors.paragraph_dedup import ParagraphDeduplicator
 from .vector_service import VectorService
+from ..config import settings
 from ..db.models.db_file import Document
 import logging
 
@@ -13,54 +18,59 @@ class CourseContentService:
         self.vector_service = VectorService()
         self.logger = logging.getLogger(__name__)
 
-    def get_rag_infos(self, course_id: int, topic: dict[str, str]):
+    async def get_rag_infos(self, course_id: int, topic: dict[str, str]) -> List[dict]:
         """
         Get the important rag infos for a given chapter topic.
+        The caption and every content line of the topic are searched together;
+        returns the merged passages ranked by score ({"content_id", "text", "metadata", "score"}).
         """
-        ragInfos = set()
-        queryRes = self.vector_service.search_by_course_id(
-            course_id, topic["caption"], n_results=2
+        queries = [topic["caption"], *topic["content"]]
+        n_results = [2] + [3] * len(topic["content"])
+        return await self.vector_service.search_many_by_course_id(
+            course_id, queries, n_results=n_results
         )
-        # queryRes is a list of QueryResult objects
-        for result in queryRes:
-            # Access the document content from the QueryResult object
-            if hasattr(result, "document"):
-                ragInfos.add(result.document)
-            elif hasattr(result, "text"):
-                ragInfos.add(result.text)
 
-        for content in topic["content"]:
-            queryRes = self.vector_service.search_by_course_id(
-                course_id, content, n_results=3
-            )
-            # queryRes is a list of QueryResult objects
-            for result in queryRes:
-                # Access the document content from the QueryResult object
-                if hasattr(result, "document"):
-                    ragInfos.add(result.document)
-                elif hasattr(result, "text"):
-                    ragInfos.add(result.text)
-        return list(set(ragInfos))
-
-    def process_course_documents(self, course_id: int, documents: List[Document]):
+    async def process_course_documents(
+        self,
+        course_id: int,
+        documents: List[Document],
+        on_document_done: Optional[Callable[[Document], None]] = None,
+    ):
         """
         Process all uploaded documents for a course and add to vector database.
+        PDFs and TXT/CSV/JSON/DOCX uploads are chunked the same way. Extraction and
+        ingestion run off the event loop. Paragraphs repeated within or across the
+        course's documents (headers, footers, boilerplate) are embedded once; they are
+        dropped before the chunker packs paragraphs into chunks.
+        on_document_done is called after each document, e.g. to checkpoint the ingestion.
         """
         try:
+            deduplicator = ParagraphDeduplicator() if settings.DEDUP_ENABLED else None
             for document in documents:
                 if not document:
                     self.logger.warning(f"Document {document.id} not found")
                     continue
 
-                # Only process PDFs for now
                 if document.content_type == "application/pdf":
-                    self._process_pdf_document(course_id, document)
+                    await self._process_pdf_document(course_id, document, deduplicator)
+                elif document.content_type in DOCUMENT_READERS:
+                    await self._process_text_document(course_id, document, deduplicator)
                 else:
-                    self.logger.info(f"Skipping non-PDF document: {document.filename}")
+                    self.logger.info(f"Skipping unsupported document: {document.filename}")
+
+                if on_document_done:
+                    on_document_done(document)
 
             self.logger.info(
                 f"Processed {len(documents)} documents for course {course_id}"
             )
+            if deduplicator:
+                stats = deduplicator.stats
+                self.logger.info(
+                    f"Deduplication for course {course_id}: {stats.paragraphs_in} paragraphs in, "
+                    f"{stats.unique_out} unique out ({stats.exact_duplicates} exact, "
+                    f"{stats.near_duplicates} near-duplicates removed)"
+                )
 
         except Exception as e:
             self.logger.error(
@@ -68,42 +78,105 @@ class CourseContentService:
             )
             raise
 
-    def _process_pdf_document(self, course_id: int, document: Document):
+    async def _process_pdf_document(
+        self,
+        course_id: int,
+        document: Document,
+        deduplicator: Optional[ParagraphDeduplicator] = None,
+    ):
         """
-        Extract paragraphs from PDF and add to vector database.
+        Split a PDF into token-sized chunks and add them to the vector database.
         """
         try:
-            # Extract structured content
-            content_data = self.pdf_processor.extract_structured_content(
-                document.file_data
+            content_data = await asyncio.to_thread(
+                self.pdf_processor.extract_chunks,
+                document.file_data,
+                TextChunker(deduplicator=deduplicator),
             )
+            items = [
+                {
+                    "content_id": f"doc_{document.id}_chunk_{chunk_data['chunk_index']}",
+                    "text": chunk_data["text"],
+                    "metadata": {
+                        "type": "pdf_chunk",
+                        "course_id": course_id,
+                        "document_id": document.id,
+                        "filename": document.filename,
+                        "page_number": chunk_data["page_start"],
+                        "page_end": chunk_data["page_end"],
+                        "chunk_index": chunk_data["chunk_index"],
+                        "token_count": chunk_data["token_count"],
+                        "word_count": chunk_data["word_count"],
+                    },
+                }
+                for chunk_data in content_data["chunks"]
+            ]
+            await self._add_chunks(course_id, document, items)
 
-            # Add each paragraph to vector database
-            for para_data in content_data["paragraphs"]:
-                content_id = f"doc_{document.id}_page_{para_data['page_number']}_para_{para_data['paragraph_index']}"
+        except Exception as e:
+            self.logger.error(f"Failed to process PDF {document.filename}: {e}")
+            raise
 
-                metadata = {
-                    "type": "pdf_paragraph",
+    @staticmethod
+    def _chunk_text_document(
+        course_id: int,
+        document: Document,
+        deduplicator: Optional[ParagraphDeduplicator] = None,
+    ) -> List[dict]:
+        """Stream a TXT/CSV/JSON/DOCX upload section by section through the chunker"""
+        sections = iter_document_sections(document.content_type, document.file_data)
+        return [
+            {
+                "content_id": f"doc_{document.id}_chunk_{chunk.chunk_index}",
+                "text": chunk.text,
+                "metadata": {
+                    "type": "document_chunk",
                     "course_id": course_id,
                     "document_id": document.id,
                     "filename": document.filename,
-                    "page_number": para_data["page_number"],
-                    "paragraph_index": para_data["paragraph_index"],
-                    "word_count": para_data["word_count"],
-                }
-
-                # Add to vector database
-                self.vector_service.add_content_by_course_id(
-                    course_id=course_id,
-                    content_id=content_id,
-                    text=para_data["text"],
-                    metadata=metadata,
-                )
+                    "section_start": chunk.page_start,
+                    "section_end": chunk.page_end,
+                    "chunk_index": chunk.chunk_index,
+                    "token_count": chunk.token_count,
+                    "word_count": chunk.word_count,
+                },
+            }
+            for chunk in TextChunker(deduplicator=deduplicator).chunk_pages(sections)
+        ]
 
-            self.logger.info(
-                f"Added {len(content_data['paragraphs'])} paragraphs from {document.filename}"
+    async def _process_text_document(
+        self,
+        course_id: int,
+        document: Document,
+        deduplicator: Optional[ParagraphDeduplicator] = None,
+    ):
+        """
+        Split a text, CSV, JSON or DOCX document into chunks and add them to the vector database.
+        """
+        try:
+            items = await asyncio.to_thread(
+                self._chunk_text_document, course_id, document, deduplicator
             )
+            await self._add_chunks(course_id, document, items)
 
         except Exception as e:
-            self.logger.error(f"Failed to process PDF {document.filename}: {e}")
+            self.logger.error(f"Failed to process document {document.filename}: {e}")
             raise
+
+    async def _add_chunks(
+        self,
+        course_id: int,
+        document: Document,
+        items: List[dict],
+    ):
+        """Add the chunks of a document to the vector database in batches"""
+        report = await self.vector_service.add_many_async(course_id, items)
+
+        for failed_batch in report["failed_batches"]:
+            self.logger.warning(
+                f"Failed to ingest batch {failed_batch['batch']} of {document.filename} "
+                f"({len(failed_batch['content_ids'])} chunks): {failed_batch['error']}"
+            )
+        self.logger.info(
+            f"Added {report['inserted']}/{len(items)} chunks from {document.filename}"
+        )
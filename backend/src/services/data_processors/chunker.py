@@ -0,0 +1,205 @@
+# backend/src/services/data_processors/chunker.py
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
+
+from ...config import settings
+from .paragraph_dedup import ParagraphDeduplicator
+
+# Compiled once at import, the chunker runs them for every page of every upload
+_HYPHEN_BREAK_RE = re.compile(r"(\w)-\n(\w)")
+_HYPHEN_END_RE = re.compile(r"\w-$")
+_PARAGRAPH_BREAK_RE = re.compile(r"\n\s*\n")
+_WHITESPACE_RE = re.compile(r"\s+")
+_SENTENCE_END_RE = re.compile(r"[.!?…][\"')\]]*\s+(?=[\"'(\[]?[A-Z0-9À-Ý])")
+_SENTENCE_COMPLETE_RE = re.compile(r"[.!?…:;][\"')\]]*$")
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def split_sentences(paragraph: str) -> Iterator[str]:
+    """Split at sentence-final punctuation followed by an upper-case or numeric start"""
+    start = 0
+    for match in _SENTENCE_END_RE.finditer(paragraph):
+        yield paragraph[start:match.end()].rstrip()
+        start = match.end()
+    if start < len(paragraph):
+        yield paragraph[start:]
+
+
+def count_tokens(text: str) -> int:
+    """
+    Approximate the model token count by words and punctuation marks.
+    No tokenizer ships with the embedding API client; for English prose this tracks
+    the real count closely enough to size chunks.
+    """
+    return len(_TOKEN_RE.findall(text))
+
+
+@dataclass
+class Chunk:
+    text: str
+    page_start: int
+    page_end: int
+    chunk_index: int
+    token_count: int
+
+    @property
+    def word_count(self) -> int:
+        return len(self.text.split())
+
+
+# (sentence text, page number, token count)
+_Unit = Tuple[str, int, int]
+
+
+class TextChunker:
+    """
+    Streams page texts into chunks of about `target_tokens` tokens.
+
+    Pages are split into paragraphs and sentences; sentences are packed into chunks
+    without regard to page breaks, so passages that continue on the next page stay
+    together. Chunks end on sentence boundaries; only a single sentence longer than
+    `max_tokens` is cut by words. Consecutive chunks share up to `overlap_tokens` tokens
+    of whole trailing sentences. Nothing is dropped for being short.
+
+    With a deduplicator, paragraphs it has seen before (disclaimers, slide templates) are
+    skipped before their sentences are packed: once merged into a chunk with different
+    body text, a repeated paragraph is too dissimilar at chunk level to be detected.
+
+    Only the sentences of the chunk being built are held in memory.
+    """
+
+    def __init__(
+        self,
+        target_tokens: int = settings.CHUNK_TARGET_TOKENS,
+        overlap_tokens: int = settings.CHUNK_OVERLAP_TOKENS,
+        max_tokens: int = 0,
+        deduplicator: Optional[ParagraphDeduplicator] = None,
+    ):
+        if target_tokens <= 0:
+            raise ValueError("target_tokens must be positive")
+        if not 0 <= overlap_tokens < target_tokens:
+            raise ValueError("overlap_tokens must be in [0, target_tokens)")
+        self.target_tokens = target_tokens
+        self.overlap_tokens = overlap_tokens
+        self.max_tokens = max(max_tokens, target_tokens) if max_tokens else target_tokens * 3 // 2
+        self.deduplicator = deduplicator
+
+    def _sentences(self, page_text: str, page_number: int) -> Iterator[_Unit]:
+        text = _HYPHEN_BREAK_RE.sub(r"\1\2", page_text.replace("\r\n", "\n").replace("\r", "\n"))
+        for paragraph in _PARAGRAPH_BREAK_RE.split(text):
+            paragraph = _WHITESPACE_RE.sub(" ", paragraph).strip()
+            if not paragraph:
+                continue
+            if self.deduplicator is not None and not self.deduplicator.keep(paragraph):
+                continue
+            for sentence in split_sentences(paragraph):
+                tokens = count_tokens(sentence)
+                if tokens <= self.max_tokens:
+                    yield sentence, page_number, tokens
+                    continue
+                # A run-on "sentence" (tables, code, missing punctuation): cut it by words
+                words = sentence.split(" ")
+                piece: List[str] = []
+                piece_tokens = 0
+                for word in words:
+                    word_tokens = count_tokens(word)
+                    if piece and piece_tokens + word_tokens > self.target_tokens:
+                        yield " ".join(piece), page_number, piece_tokens
+                        piece, piece_tokens = [], 0
+                    piece.append(word)
+                    piece_tokens += word_tokens
+                if piece:
+                    yield " ".join(piece), page_number, piece_tokens
+
+    def _units(self, pages: Iterable[str], first_page: int) -> Iterator[_Unit]:
+        """
+        Sentences of all pages in order; a sentence cut by a page break is rejoined, as is
+        a word hyphenated at the end of the page
+        """
+        carry = None
+        for page_number, page_text in enumerate(pages, start=first_page):
+            units = list(self._sentences(page_text, page_number))
+            if not units:
+                continue
+            if carry is not None:
+                first = units[0]
+                if first[0][:1].islower():
+                    if _HYPHEN_END_RE.search(carry[0]):
+                        text = f"{carry[0][:-1]}{first[0]}"
+                        units[0] = (text, carry[1], count_tokens(text))
+                    else:
+                        units[0] = (f"{carry[0]} {first[0]}", carry[1], carry[2] + first[2])
+                else:
+                    yield carry
+                carry = None
+            if not _SENTENCE_COMPLETE_RE.search(units[-1][0]):
+                carry = units.pop()
+            yield from units
+        if carry is not None:
+            yield carry
+
+    def _make_chunk(self, units: Iterable[_Unit], index: int) -> Chunk:
+        units = list(units)
+        return Chunk(
+            text=" ".join(unit[0] for unit in units),
+            page_start=units[0][1],
+            page_end=units[-1][1],
+            chunk_index=index,
+            token_count=sum(unit[2] for unit in units),
+        )
+
+    def chunk_pages(self, pages: Iterable[str], first_page: int = 1) -> Iterator[Chunk]:
+        """Yield chunks while reading pages one by one"""
+        buffer: Deque[_Unit] = deque()
+        buffer_tokens = 0
+        fresh = 0  # units in the buffer that were not part of the previous chunk
+        index = 0
+
+        for unit in self._units(pages, first_page):
+            if fresh and buffer_tokens + unit[2] > self.target_tokens:
+                yield self._make_chunk(buffer, index)
+                index += 1
+                # Keep whole trailing sentences as overlap for the next chunk
+                overlap: Deque[_Unit] = deque()
+                overlap_tokens = 0
+                for previous in reversed(buffer):
+                    if overlap_tokens + previous[2] > self.overlap_tokens:
+                        break
+                    overlap.appendleft(previous)
+                    overlap_tokens += previous[2]
+                buffer, buffer_tokens, fresh = overlap, overlap_tokens, 0
+            buffer.append(unit)
+            buffer_tokens += unit[2]
+            fresh += 1
+
+        if fresh:
+            yield self._make_chunk(buffer, index)
+
+
+def iter_overlapping_chunks(
+    pages: Iterable[str], chunk_size: int = 8000, overlap: int = 500, separator: str = " "
+) -> Iterator[str]:
+    """
+    Character-sized chunks of the page texts joined by separator, consecutive chunks sharing
+    `overlap` characters. A chunk ends after the last "." or newline in its second half if
+    there is one. Pages are pulled only when the buffered text is used up, so at most one
+    chunk plus one page is held in memory.
+    """
+    if not 0 <= overlap < chunk_size // 2:
+        raise ValueError("overlap must be in [0, chunk_size // 2)")
+    buffer = None
+    emitted = False
+    for page_text in pages:
+        buffer = page_text if buffer is None else f"{buffer}{separator}{page_text}"
+        while len(buffer) > chunk_size:
+            head = buffer[:chunk_size]
+            break_point = max(head.rfind("."), head.rfind("\n"))
+            end = break_point + 1 if break_point > chunk_size // 2 else chunk_size
+            yield buffer[:end].strip()
+            emitted = True
+            buffer = buffer[end - overlap:]
+    # The rest, unless it only repeats the overlap of the previous chunk
+    if buffer is not None and (buffer[overlap:] if emitted else buffer).strip():
+        yield buffer.strip()
@@ -0,0 +1,241 @@
+# backend/src/services/data_processors/document_readers.py
+"""
+Streaming readers for the non-PDF uploads accepted by routers/files.py.
+
+Each reader turns the stored bytes into a lazy sequence of text sections (a batch of
+lines, CSV rows, JSON items or DOCX paragraphs) that TextChunker.chunk_pages consumes
+like PDF pages. Nothing decodes or parses the whole upload at once, so a 30 MB CSV is
+held in memory only as bytes plus one section of text.
+"""
+import csv
+import io
+import json
+import zipfile
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from xml.etree.ElementTree import iterparse
+
+from .text_preview import iter_text_chunks
+
+LINES_PER_SECTION = 200
+ROWS_PER_SECTION = 50
+ITEMS_PER_SECTION = 50
+PARAGRAPHS_PER_SECTION = 50
+
+_JSON_WHITESPACE = " \t\r\n"
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def _batches(items: Iterable[str], size: int, separator: str) -> Iterator[str]:
+    batch: List[str] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield separator.join(batch)
+            batch = []
+    if batch:
+        yield separator.join(batch)
+
+
+def iter_lines(data: bytes) -> Iterator[str]:
+    """Decoded lines with line endings, without decoding the whole blob first"""
+    pending = ""
+    for text in iter_text_chunks(data):
+        lines = (pending + text).splitlines(keepends=True)
+        # An incomplete last line, or a "\r" whose "\n" may start the next chunk, waits
+        pending = lines.pop() if lines and not lines[-1].endswith("\n") else ""
+        yield from lines
+    if pending:
+        yield pending
+
+
+def iter_text_sections(data: bytes, lines_per_section: int = LINES_PER_SECTION) -> Iterator[str]:
+    """Plain text in batches of lines; blank lines keep separating paragraphs"""
+    return _batches((line.rstrip("\r\n") for line in iter_lines(data)), lines_per_section, "\n")
+
+
+def _csv_row_text(header: List[str], row: List[str]) -> str:
+    fields = [
+        f"{name}: {value.strip()}" if name else value.strip()
+        for name, value in zip(header, row)
+        if value.strip()
+    ]
+    # Cells beyond the header width are kept without a name
+    fields.extend(value.strip() for value in row[len(header):] if value.strip())
+    return "; ".join(fields) + "."
+
+
+def iter_csv_sections(data: bytes, rows_per_section: int = ROWS_PER_SECTION) -> Iterator[str]:
+    """
+    CSV rows rendered as "column: value; ..." sentences, one paragraph per row, so every
+    chunk is self-describing without the header row.
+    """
+    reader = csv.reader(iter_lines(data))
+    header = next(reader, None)
+    if header is None:
+        return
+    header = [name.strip() for name in header]
+    rows = (_csv_row_text(header, row) for row in reader if any(value.strip() for value in row))
+    yield from _batches(rows, rows_per_section, "\n\n")
+
+
+def _json_lines(value, path: str = "") -> Iterator[str]:
+    """Flatten a JSON value into "path: value" lines"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _json_lines(item, f"{path}.{key}" if path else str(key))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from _json_lines(item, f"{path}[{index}]")
+    elif value is not None:
+        yield f"{path}: {value}" if path else str(value)
+
+
+def iter_json_values(chunks: Iterable[str]) -> Iterator[Tuple[str, object]]:
+    """
+    Incrementally parse the items of a JSON document as (path, value) pairs.
+
+    The elements of a top-level array and the members of a top-level object are decoded
+    one at a time as soon as their text has arrived; arrays directly under a top-level
+    object ({"data": [...]}) are streamed element by element as well. JSON Lines
+    (whitespace-separated values) is read value by value. Only the item being decoded
+    is buffered.
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer = ""
+    position = 0
+    exhausted = False
+
+    def fill(min_chars: int = 1) -> bool:
+        """Append at least min_chars of input (less at the end); False if nothing was left"""
+        nonlocal buffer, position, exhausted
+        parts = [buffer[position:]]
+        added = 0
+        while added < min_chars and not exhausted:
+            text = next(chunks, None)
+            if text is None:
+                exhausted = True
+            else:
+                parts.append(text)
+                added += len(text)
+        buffer = "".join(parts)
+        position = 0
+        return added > 0
+
+    def skip(characters: str) -> Optional[str]:
+        """Skip the given characters and return the next one (None at the end)"""
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in characters:
+                position += 1
+            if position < len(buffer):
+                return buffer[position]
+            if not fill():
+                return None
+
+    def decode():
+        nonlocal position
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+                # A number or literal at the end of the buffer may continue in the next chunk
+                if end < len(buffer) or exhausted or isinstance(value, (dict, list, str)):
+                    position = end
+                    return value
+            except json.JSONDecodeError:
+                if exhausted:
+                    raise
+            # Grow the buffer geometrically, so a large item is re-parsed O(log n) times
+            if not fill(max(len(buffer) - position, 1)):
+                value, position = decoder.raw_decode(buffer, position)
+                return value
+
+    def items(closing: str, path: str, stream_arrays: bool) -> Iterator[Tuple[str, object]]:
+        nonlocal position
+        index = 0
+        while True:
+            char = skip(_JSON_WHITESPACE + ",")
+            if char is None:
+                return
+            if char == closing:
+                position += 1
+                return
+            if closing == "]":
+                item_path = f"{path}[{index}]"
+                index += 1
+            else:
+                key = decode()
+                if skip(_JSON_WHITESPACE) != ":":
+                    raise ValueError(f"Expected ':' after JSON key {key!r}")
+                position += 1
+                item_path = f"{path}.{key}" if path else str(key)
+                if stream_arrays and skip(_JSON_WHITESPACE) == "[":
+                    position += 1
+                    yield from items("]", item_path, False)
+                    continue
+            skip(_JSON_WHITESPACE)
+            yield item_path, decode()
+
+    first = skip(_JSON_WHITESPACE + "\ufeff")
+    index = 0
+    if first == "[":
+        position += 1
+        yield from items("]", "", False)
+        index = 1
+    elif first == "{":
+        position += 1
+        yield from items("}", "", True)
+        index = 1
+
+    # JSON Lines, a single scalar, or anything after the top-level value
+    while skip(_JSON_WHITESPACE) is not None:
+        yield f"[{index}]", decode()
+        index += 1
+
+
+def iter_json_sections(data: bytes, items_per_section: int = ITEMS_PER_SECTION) -> Iterator[str]:
+    """JSON items flattened to "path: value" lines, one paragraph per item"""
+    items = (
+        "\n".join(_json_lines(value, path))
+        for path, value in iter_json_values(iter_text_chunks(data))
+    )
+    return _batches((item for item in items if item), items_per_section, "\n\n")
+
+
+def iter_docx_paragraphs(data: bytes) -> Iterator[str]:
+    """Paragraph texts of word/document.xml, parsed element by element"""
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        with archive.open("word/document.xml") as document:
+            for _, element in iterparse(document, events=("end",)):
+                if element.tag != f"{_WORD_NS}p":
+                    continue
+                parts = []
+                for node in element.iter():
+                    if node.tag == f"{_WORD_NS}t" and node.text:
+                        parts.append(node.text)
+                    elif node.tag == f"{_WORD_NS}tab":
+                        parts.append("\t")
+                    elif node.tag in (f"{_WORD_NS}br", f"{_WORD_NS}cr"):
+                        parts.append("\n")
+                element.clear()  # free the parsed paragraph
+                text = "".join(parts).strip()
+                if text:
+                    yield text
+
+
+def iter_docx_sections(data: bytes, paragraphs_per_section: int = PARAGRAPHS_PER_SECTION) -> Iterator[str]:
+    return _batches(iter_docx_paragraphs(data), paragraphs_per_section, "\n\n")
+
+
+DOCUMENT_READERS: Dict[str, Callable[[bytes], Iterator[str]]] = {
+    "text/plain": iter_text_sections,
+    "text/csv": iter_csv_sections,
+    "application/json": iter_json_sections,
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": iter_docx_sections,
+}
+
+
+def iter_document_sections(content_type: str, data: bytes) -> Optional[Iterator[str]]:
+    """Text sections of an upload, or None if there is no streaming reader for its type"""
+    reader = DOCUMENT_READERS.get(content_type)
+    return reader(data) if reader else None
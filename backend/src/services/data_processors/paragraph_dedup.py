@@ -0,0 +1,166 @@
+# backend/src/services/data_processors/paragraph_dedup.py
+import hashlib
+import re
+import unicodedata
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+from ...config import settings
+
+_TOKEN_RE = re.compile(r"\w+")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+# Page and slide counters ("page 3 of 40", "slide 7") anywhere in a paragraph
+_COUNTER_RE = re.compile(r"\b(?:page|slide|seite|folie) \d+\b|\b\d+ (?:of|von) \d+\b")
+# Paragraphs up to this many words are header/footer-like lines, all their numbers are masked
+_SHORT_LINE_TOKENS = 12
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+
+@dataclass
+class DedupStats:
+    paragraphs_in: int = 0
+    unique_out: int = 0
+    exact_duplicates: int = 0
+    near_duplicates: int = 0
+
+    @property
+    def removed(self) -> int:
+        return self.exact_duplicates + self.near_duplicates
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "paragraphs_in": self.paragraphs_in,
+            "unique_out": self.unique_out,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+        }
+
+
+class ParagraphDeduplicator:
+    """
+    Drops repeated paragraphs (page headers/footers, slide templates, disclaimers)
+    before they are embedded.
+
+    Exact copies are caught by a hash of the normalized text. Near-duplicates, e.g. the
+    same footer with a different page number, by MinHash signatures over word shingles,
+    bucketed with LSH banding; a candidate counts as duplicate when its estimated Jaccard
+    similarity with an already kept paragraph is at least `threshold`. Page counters and
+    the numbers of short, header-like lines are masked; figures in body text are kept, so
+    paragraphs that only differ in their figures (e.g. the results of two years) both stay.
+
+    The instance keeps state, so calling `deduplicate` for every document of a course
+    also removes boilerplate repeated across documents. The first occurrence is kept.
+    """
+
+    def __init__(
+        self,
+        threshold: float = settings.DEDUP_THRESHOLD,
+        num_perm: int = 64,
+        shingle_size: int = 3,
+        seed: int = 1,
+    ):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = self._optimal_bands(threshold, num_perm)
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+        self._exact: Set[str] = set()
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._signatures: List[np.ndarray] = []
+        self.stats = DedupStats()
+
+    @staticmethod
+    def _optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+        """
+        Pick bands x rows so pairs at the threshold almost surely share a bucket: the LSH
+        S-curve midpoint (1/b)^(1/r) is kept well below the threshold. Extra candidates
+        only cost a signature comparison.
+        """
+        options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+
+        def midpoint(option):
+            return (1 / option[0]) ** (1 / option[1])
+
+        below = [option for option in options if midpoint(option) <= threshold - 0.15]
+        return max(below, key=midpoint) if below else min(options, key=midpoint)
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(_TOKEN_RE.findall(unicodedata.normalize("NFKC", text).lower()))
+
+    @staticmethod
+    def _mask_numbers(normalized: str) -> str:
+        """Mask the numbers that vary in boilerplate, so "Page 3 of 40" matches "Page 4 of 40" """
+        if len(normalized.split()) <= _SHORT_LINE_TOKENS:
+            return _NUMBER_RE.sub("0", normalized)
+        return _COUNTER_RE.sub(lambda match: _NUMBER_RE.sub("0", match.group()), normalized)
+
+    def _signature(self, tokens: List[str]) -> np.ndarray:
+        size = min(self.shingle_size, len(tokens))
+        shingles = {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+        # Universal hashing (a * x + b) mod p; products wrap in uint64, which only remixes bits
+        permuted = (hashes[:, None] * self._a + self._b) % _MERSENNE_PRIME
+        return permuted.min(axis=0)
+
+    def _near_duplicate(self, signature: np.ndarray) -> bool:
+        checked = set()
+        for band, buckets in enumerate(self._buckets):
+            key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for index in buckets.get(key, ()):
+                if index in checked:
+                    continue
+                checked.add(index)
+                if np.mean(self._signatures[index] == signature) >= self.threshold:
+                    return True
+        return False
+
+    def _add(self, signature: np.ndarray) -> None:
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        for band, buckets in enumerate(self._buckets):
+            key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            buckets.setdefault(key, []).append(index)
+
+    def is_duplicate(self, text: str) -> bool:
+        """Check one paragraph and remember it if it is new"""
+        normalized = self._normalize(text)
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        if digest in self._exact:
+            self.stats.exact_duplicates += 1
+            return True
+
+        tokens = self._mask_numbers(normalized).split()
+        if tokens:
+            signature = self._signature(tokens)
+            if self._near_duplicate(signature):
+                self.stats.near_duplicates += 1
+                return True
+            self._add(signature)
+        self._exact.add(digest)
+        return False
+
+    def keep(self, text: str) -> bool:
+        """is_duplicate, counted in the stats: True for a paragraph that is not a duplicate"""
+        self.stats.paragraphs_in += 1
+        if self.is_duplicate(text):
+            return False
+        self.stats.unique_out += 1
+        return True
+
+    def deduplicate(self, paragraphs: List[Dict], key: str = "text") -> List[Dict]:
+        """Return the paragraphs (dicts holding the text under `key`) that are not duplicates"""
+        return [paragraph for paragraph in paragraphs if self.keep(paragraph[key])]
@@ -1,9 +1,15 @@
 # backend/src/services/pdf_processor.py
-import fitz  # PyMuPDF
 import re
-from typing import List, Dict
+from typing import List, Dict, Optional
 import logging
 
+from ..pdf_extraction_cache import get_pdf_extraction_cache
+from .chunker import TextChunker
+
+_PARAGRAPH_BREAK_RE = re.compile(r'\n\s*\n')
+_LINE_BREAKS_RE = re.compile(r'\n+')
+_WHITESPACE_RE = re.compile(r'\s+')
+
 class PDFProcessor:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
@@ -14,19 +20,15 @@ class PDFProcessor:
         Returns a list of paragraph strings.
         """
         try:
-            doc = fitz.open(stream=file_data, filetype="pdf")
+            # Page texts come from the shared extraction cache, the PDF is parsed only once
+            extraction = get_pdf_extraction_cache().get(file_data)
             all_paragraphs = []
             
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                # Extract text with layout information
-                page_text = page.get_text()
-                
+            for page_text in extraction.page_texts():
                 # Process page text into paragraphs
                 page_paragraphs = self._split_into_paragraphs(page_text)
                 all_paragraphs.extend(page_paragraphs)
             
-            doc.close()
             return all_paragraphs
             
         except Exception as e:
@@ -44,14 +46,14 @@ class PDFProcessor:
         text = text.replace('\r\n', '\n').replace('\r', '\n')
         
         # Split on double line breaks (common paragraph separator)
-        paragraphs = re.split(r'\n\s*\n', text)
+        paragraphs = _PARAGRAPH_BREAK_RE.split(text)
         
         # Clean up each paragraph
         cleaned_paragraphs = []
         for para in paragraphs:
             # Remove excessive whitespace and join broken lines
-            para = re.sub(r'\n+', ' ', para)  # Replace line breaks with spaces
-            para = re.sub(r'\s+', ' ', para)  # Normalize multiple spaces
+            para = _LINE_BREAKS_RE.sub(' ', para)  # Replace line breaks with spaces
+            para = _WHITESPACE_RE.sub(' ', para)  # Normalize multiple spaces
             para = para.strip()
             
             # Filter out very short "paragraphs" (likely headers/footers)
@@ -66,18 +68,15 @@ class PDFProcessor:
         Returns structured data including page numbers.
         """
         try:
-            doc = fitz.open(stream=file_data, filetype="pdf")
+            extraction = get_pdf_extraction_cache().get(file_data)
             structured_content = {
                 "paragraphs": [],
                 "metadata": {
-                    "total_pages": len(doc),
+                    "total_pages": extraction.page_count,
                 }
             }
             
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                page_text = page.get_text()
-                
+            for page_num, page_text in enumerate(extraction.page_texts()):
                 paragraphs = self._split_into_paragraphs(page_text)
                 
                 for para_index, paragraph in enumerate(paragraphs):
@@ -88,9 +87,37 @@ class PDFProcessor:
                         "word_count": len(paragraph.split())
                     })
             
-            doc.close()
             return structured_content
             
         except Exception as e:
             self.logger.error(f"PDF structured extraction failed: {e}")
-            return {"paragraphs": [], "metadata": {}}
\ No newline at end of file
+            return {"paragraphs": [], "metadata": {}}
+
+    def extract_chunks(self, file_data: bytes, chunker: Optional[TextChunker] = None) -> Dict:
+        """
+        Extract PDF content as token-sized chunks for RAG ingestion.
+        Chunks may span page breaks and carry the page range they were taken from.
+        """
+        try:
+            extraction = get_pdf_extraction_cache().get(file_data)
+            chunker = chunker or TextChunker()
+            return {
+                "chunks": [
+                    {
+                        "text": chunk.text,
+                        "page_start": chunk.page_start,
+                        "page_end": chunk.page_end,
+                        "chunk_index": chunk.chunk_index,
+                        "token_count": chunk.token_count,
+                        "word_count": chunk.word_count,
+                    }
+                    for chunk in chunker.chunk_pages(extraction.page_texts())
+                ],
+                "metadata": {
+                    "total_pages": extraction.page_count,
+                },
+            }
+
+        except Exception as e:
+            self.logger.error(f"PDF chunk extraction failed: {e}")
+            return {"chunks": [], "metadata": {}}
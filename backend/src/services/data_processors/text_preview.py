@@ -0,0 +1,42 @@
+# backend/src/services/data_processors/text_preview.py
+import codecs
+from typing import Iterable, Iterator
+
+
+def iter_text_chunks(data: bytes, chunk_size: int = 4096, encoding: str = "utf-8") -> Iterator[str]:
+    """Decode a byte blob incrementally; multi-byte characters split across chunks are kept intact"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="ignore")
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        text = decoder.decode(view[start:start + chunk_size])
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def text_preview(chunks: Iterable[str], max_lines: int = 10, max_chars: int = 4000) -> str:
+    """
+    First max_lines lines (leading whitespace stripped, at most max_chars characters) of the
+    concatenated chunks. Stops pulling chunks as soon as enough text is collected, so with a
+    lazy iterator the rest of the document is never read or parsed.
+    """
+    parts = []
+    size = 0
+    newlines = 0
+    started = False
+    for chunk in chunks:
+        if not started:
+            chunk = chunk.lstrip()
+            if not chunk:
+                continue
+            started = True
+        parts.append(chunk)
+        size += len(chunk)
+        newlines += chunk.count("\n")
+        # One extra line break guarantees the last kept line is complete
+        if newlines > max_lines or size >= max_chars:
+            break
+    text = "".join(parts).rstrip()
+    return "\n".join(text.splitlines()[:max_lines])[:max_chars]
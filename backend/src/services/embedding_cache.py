@@ -0,0 +1,197 @@
+"""
+Content-addressed, persistent cache for text embeddings.
+
+Students upload the same lecture PDFs into several courses, so identical paragraphs
+would be embedded again and again. Embeddings are stored in a local SQLite file keyed by
+sha256(model name, task type, normalized text) and packed as float32 blobs.
+The store is size-capped; the least recently used entries are evicted first.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from logging import getLogger
+from typing import Dict, List, Optional
+
+from ..config import settings
+
+logger = getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize unicode and whitespace so trivially different copies share one entry"""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+class EmbeddingCache:
+    """SQLite-backed LRU cache mapping (model, task type, text hash) to an embedding."""
+
+    def __init__(
+        self,
+        path: str = settings.EMBEDDING_CACHE_PATH,
+        max_entries: int = settings.EMBEDDING_CACHE_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                embedding BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+        # Upper bound of the stored entries (replaced keys are counted twice); the exact
+        # count is only queried once it passes the cap
+        self._entries_bound = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0  # text bytes that did not have to be sent to the embedding API
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model: str, task_type: str, text: str) -> str:
+        digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+        return f"{model}|{task_type}|{digest}"
+
+    @staticmethod
+    def _pack(embedding: List[float]) -> bytes:
+        return array("f", embedding).tobytes()
+
+    @staticmethod
+    def _unpack(blob: bytes) -> List[float]:
+        values = array("f")
+        values.frombytes(blob)
+        return values.tolist()
+
+    def get_many(self, model: str, task_type: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """Look up several texts at once; missing entries are returned as None"""
+        keys = [self.make_key(model, task_type, text) for text in texts]
+        found: Dict[str, bytes] = {}
+        unique_keys = list(dict.fromkeys(keys))
+
+        with self._lock:
+            # Stay below SQLite's host parameter limit
+            for start in range(0, len(unique_keys), 500):
+                chunk = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, embedding FROM embeddings WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+
+            results = []
+            for key, text in zip(keys, texts):
+                blob = found.get(key)
+                if blob is None:
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    self.hits += 1
+                    self.bytes_saved += len(text.encode("utf-8"))
+                    results.append(self._unpack(blob))
+        return results
+
+    def get(self, model: str, task_type: str, text: str) -> Optional[List[float]]:
+        return self.get_many(model, task_type, [text])[0]
+
+    def put_many(self, model: str, task_type: str, texts: List[str], embeddings: List[List[float]]) -> None:
+        """Store embeddings and evict the least recently used entries above the size cap"""
+        now = time.time()
+        rows = [
+            (self.make_key(model, task_type, text), self._pack(embedding), now)
+            for text, embedding in zip(texts, embeddings)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, embedding, last_used) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._entries_bound += len(rows)
+            if self._entries_bound > self.max_entries:
+                count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                if count > self.max_entries:
+                    # Evict down to 90% of the cap so we do not evict on every insert
+                    to_evict = count - int(self.max_entries * 0.9)
+                    self._conn.execute(
+                        "DELETE FROM embeddings WHERE key IN "
+                        "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                        (to_evict,),
+                    )
+                    self.evictions += to_evict
+                    count -= to_evict
+                self._entries_bound = count
+            self._conn.commit()
+
+    def put(self, model: str, task_type: str, text: str, embedding: List[float]) -> None:
+        self.put_many(model, task_type, [text], [embedding])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._entries_bound = 0
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Return hit rate, bytes saved and store size"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "bytes_saved": self.bytes_saved,
+                "evictions": self.evictions,
+            }
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Return the process-wide embedding cache, or None if it is disabled"""
+    global _embedding_cache
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return None
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            try:
+                _embedding_cache = EmbeddingCache()
+            except Exception as e:
+                logger.warning("Embedding cache unavailable, continuing without it: %s", e)
+                return None
+        return _embedding_cache
@@ -0,0 +1,369 @@
+"""
+Record/replay model backend for the ADK agents.
+
+The agents name their models as strings ("gemini-2.0-flash-001"), which ADK resolves to
+a model class through its LLMRegistry. Selecting a backend (LLM_BACKEND or
+install_llm_backend) registers another class for "gemini-.*":
+
+- "record": the real Gemini model; each final response is appended to
+  <LLM_FIXTURES_PATH>/<agent name>.jsonl together with the request hash and the latency.
+- "replay": answers from those fixture files, the exact request if it was recorded,
+  otherwise the agent's recordings in turn (synthesized if the agent has none).
+- "synthetic": responses generated from the agent's output schema, or from a per-agent
+  template for agents answering in free text (React code, image URLs).
+
+Fake responses take a simulated time drawn from a log-normal latency model per agent
+(or the recorded latency). Embeddings are faked as well (hashed bag of words), so course
+creation can run end to end without any quota, see test/course_creation_benchmark.py.
+"""
+import asyncio
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from logging import getLogger
+from typing import Any, AsyncGenerator, ClassVar, Dict, List, Optional, Tuple, Type
+
+from google.adk.models import BaseLlm, Gemini, LlmRequest, LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+
+from ..config import settings
+
+logger = getLogger(__name__)
+
+MODEL_PATTERN = r"gemini-.*"
+
+_AGENT_NAME_RE = re.compile(r'Your internal name is "([^"]+)"')
+_WORD_RE = re.compile(r"\w+")
+
+# Free-text agents of this code base and the shape of their answers
+REACT_COMPONENT = """() => {
+  return (
+    <div style={{ padding: "20px" }}>
+      <h2>Synthetic chapter</h2>
+      <p>This component was generated by the synthetic model backend.</p>
+    </div>
+  );
+}"""
+DEFAULT_TEMPLATES: Dict[str, str] = {
+    "explainer_agent": REACT_COMPONENT,
+    "code_review_agent": REACT_COMPONENT,
+    "tester_agent.question": REACT_COMPONENT,
+    "image_agent": "https://images.unsplash.com/photo-0000000000000-synthetic",
+}
+
+
+def _digest(value: Any) -> str:
+    def default(item: Any) -> str:
+        if isinstance(item, (bytes, bytearray)):
+            return hashlib.sha256(item).hexdigest()
+        return str(item)
+
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=default).encode("utf-8")).hexdigest()
+
+
+def request_agent(llm_request: LlmRequest) -> str:
+    """Name of the agent that sent the request (ADK states it in the system instruction)"""
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    match = _AGENT_NAME_RE.search(instruction) if isinstance(instruction, str) else None
+    return match.group(1) if match else "unknown"
+
+
+def request_key(llm_request: LlmRequest) -> str:
+    """Hash of the model, the system instruction and the conversation of a request"""
+    config = llm_request.config
+    return _digest({
+        "model": llm_request.model,
+        "system_instruction": str(config.system_instruction) if config else None,
+        "contents": [content.model_dump(exclude_none=True) for content in llm_request.contents],
+    })
+
+
+class LatencyModel:
+    """Log-normal latency: the median in ms and the spread sigma of the underlying normal"""
+
+    def __init__(self, median_ms: float, sigma: float = 0.0):
+        self.median_ms = median_ms
+        self.sigma = sigma
+
+    @classmethod
+    def parse(cls, value: str) -> "LatencyModel":
+        """ "800" or "800:0.5" """
+        median, _, sigma = value.partition(":")
+        return cls(float(median), float(sigma or 0))
+
+    def sample(self, rng: random.Random) -> float:
+        """Latency in seconds"""
+        if self.median_ms <= 0:
+            return 0.0
+        return self.median_ms / 1000 * math.exp(rng.gauss(0, self.sigma) if self.sigma > 0 else 0)
+
+
+def parse_latencies(value: str) -> Dict[str, LatencyModel]:
+    """ "default=800:0.5,explainer_agent=6000:0.3" -> {agent: LatencyModel} """
+    latencies = {}
+    for item in value.split(","):
+        if "=" in item:
+            agent, model = item.split("=", 1)
+            latencies[agent.strip()] = LatencyModel.parse(model.strip())
+    return latencies
+
+
+class FakeModelBackend:
+    """Produces the responses of FakeLlm; see the module docstring."""
+
+    def __init__(
+        self,
+        mode: str = "synthetic",
+        fixtures_path: Optional[str] = None,
+        latencies: Optional[Dict[str, LatencyModel]] = None,
+        list_lengths: Optional[Dict[str, int]] = None,
+        templates: Optional[Dict[str, str]] = None,
+        embedding_latency: Optional[LatencyModel] = None,
+        time_scale: float = 1.0,
+        seed: int = 0,
+    ):
+        if mode not in ("replay", "synthetic"):
+            raise ValueError(f"Unsupported fake model backend mode: {mode}")
+        self.mode = mode
+        self.latencies = latencies or {"default": LatencyModel(800, 0.5)}
+        self.list_lengths = list_lengths or {}
+        self.templates = {**DEFAULT_TEMPLATES, **(templates or {})}
+        self.embedding_latency = embedding_latency or LatencyModel(0)
+        self.time_scale = time_scale
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        # Recordings: request key -> (text, latency ms), and per agent in recording order
+        self._by_key: Dict[str, Tuple[str, float]] = {}
+        self._by_agent: Dict[str, List[Tuple[str, float]]] = {}
+        self._cycles: Dict[str, itertools.cycle] = {}
+        if mode == "replay" and fixtures_path:
+            self.load_fixtures(fixtures_path)
+
+        # Metrics
+        self.calls: Dict[str, int] = {}
+        self.replayed = 0
+        self.synthesized = 0
+        self.embedded_texts = 0
+
+    def load_fixtures(self, path: str) -> None:
+        for name in sorted(os.listdir(path)):
+            if not name.endswith(".jsonl"):
+                continue
+            with open(os.path.join(path, name), encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    entry = (record["text"], float(record.get("latency_ms", 0)))
+                    self._by_key[record["key"]] = entry
+                    self._by_agent.setdefault(record["agent"], []).append(entry)
+        self._cycles = {agent: itertools.cycle(entries) for agent, entries in self._by_agent.items()}
+
+    def _latency(self, agent: str) -> float:
+        model = self.latencies.get(agent) or self.latencies.get("default")
+        with self._lock:
+            return model.sample(self._rng) if model else 0.0
+
+    async def respond(self, llm_request: LlmRequest) -> str:
+        """The response text for a request, after the simulated latency"""
+        agent = request_agent(llm_request)
+        recorded = None
+        with self._lock:
+            self.calls[agent] = self.calls.get(agent, 0) + 1
+            if self.mode == "replay":
+                recorded = self._by_key.get(request_key(llm_request))
+                if recorded is None and agent in self._cycles:
+                    recorded = next(self._cycles[agent])
+            if recorded is not None:
+                self.replayed += 1
+            else:
+                self.synthesized += 1
+
+        if recorded is not None:
+            text, latency = recorded[0], recorded[1] / 1000
+        else:
+            text, latency = self.synthesize(agent, llm_request), self._latency(agent)
+        await asyncio.sleep(latency * self.time_scale)
+        return text
+
+    def synthesize(self, agent: str, llm_request: LlmRequest) -> str:
+        schema = llm_request.config.response_schema if llm_request.config else None
+        if schema is None:
+            return self.templates.get(agent, f"Synthetic response of {agent}.")
+        json_schema = schema.model_json_schema() if hasattr(schema, "model_json_schema") else schema
+        return json.dumps(self._instance(json_schema, json_schema.get("$defs", {}), agent, agent))
+
+    def _instance(self, schema: Dict[str, Any], defs: Dict[str, Any], agent: str, path: str, index: int = 0) -> Any:
+        """A value valid for the JSON schema; `path` is "<agent>.<field>" for template lookups"""
+        if "$ref" in schema:
+            return self._instance(defs[schema["$ref"].rsplit("/", 1)[-1]], defs, agent, path, index)
+        options = schema.get("anyOf") or schema.get("oneOf")
+        if options:
+            options = [option for option in options if option.get("type") != "null"] or options
+            # Alternate between the variants of a union, e.g. MC and open questions
+            return self._instance(options[index % len(options)], defs, agent, path, index)
+        if "const" in schema:
+            return schema["const"]
+        if "enum" in schema:
+            return schema["enum"][index % len(schema["enum"])]
+
+        kind = schema.get("type")
+        field = path.rsplit(".", 1)[-1]
+        if kind == "object":
+            return {
+                name: self._instance(prop, defs, agent, f"{agent}.{name}", index)
+                for name, prop in schema.get("properties", {}).items()
+            }
+        if kind == "array":
+            length = self.list_lengths.get(f"{agent}.{field}", self.list_lengths.get(field, 3))
+            return [self._instance(schema.get("items", {}), defs, agent, path, i) for i in range(length)]
+        if kind == "integer":
+            return 15
+        if kind == "number":
+            return 1.0
+        if kind == "boolean":
+            return True
+        if path in self.templates:
+            return self.templates[path]
+        return f"Synthetic {field.replace('_', ' ')} {index + 1} of the {agent.replace('_', ' ')}."
+
+    def embed_content(self, model: str, content, task_type: str = None, **kwargs) -> Dict[str, Any]:
+        """Drop-in for genai.embed_content: normalized hashed bag-of-words vectors"""
+        texts = [content] if isinstance(content, str) else list(content)
+        time.sleep(self.embedding_latency.sample(self._rng) * self.time_scale)
+        embeddings = [hashed_embedding(text) for text in texts]
+        with self._lock:
+            self.embedded_texts += len(texts)
+        return {"embedding": embeddings[0] if isinstance(content, str) else embeddings}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "calls": dict(self.calls),
+                "replayed": self.replayed,
+                "synthesized": self.synthesized,
+                "embedded_texts": self.embedded_texts,
+            }
+
+
+def hashed_embedding(text: str, dimension: int = 768) -> List[float]:
+    """Feature-hashed word counts (text-embedding-004 dimension), so texts sharing words are similar"""
+    vector = [0.0] * dimension
+    for word in _WORD_RE.findall(text.lower()):
+        bucket = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+        vector[bucket % dimension] += 1.0 if bucket & (1 << 63) else -1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+class FakeLlm(BaseLlm):
+    """ADK model answering from the installed FakeModelBackend"""
+
+    backend: ClassVar[Optional[FakeModelBackend]] = None
+
+    @classmethod
+    def supported_models(cls) -> List[str]:
+        return [MODEL_PATTERN]
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        text = await self.backend.respond(llm_request)
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+class FixtureRecorder:
+    """Appends the final responses of the real model to per-agent fixture files"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def record(self, llm_request: LlmRequest, text: str, latency: float) -> None:
+        agent = request_agent(llm_request)
+        line = json.dumps({
+            "agent": agent,
+            "key": request_key(llm_request),
+            "text": text,
+            "latency_ms": round(latency * 1000, 1),
+        })
+        with self._lock:
+            with open(os.path.join(self.path, f"{agent}.jsonl"), "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class RecordingGemini(Gemini):
+    """Gemini model writing every final text response to the installed FixtureRecorder"""
+
+    recorder: ClassVar[Optional[FixtureRecorder]] = None
+
+    @classmethod
+    def supported_models(cls) -> List[str]:
+        return [MODEL_PATTERN]
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        start = time.monotonic()
+        parts: List[str] = []
+        async for response in super().generate_content_async(llm_request, stream):
+            if not response.partial and response.content and response.content.parts:
+                parts.extend(part.text for part in response.content.parts if part.text)
+            yield response
+        # Tool calls have no text and are not recorded; replay never calls tools
+        if parts:
+            self.recorder.record(llm_request, "".join(parts), time.monotonic() - start)
+
+
+_active_backend: Optional[FakeModelBackend] = None
+
+
+def install_llm_backend(llm_cls: Type[BaseLlm]) -> None:
+    """Resolve the agents' gemini-* model names to llm_cls"""
+    LLMRegistry._register(MODEL_PATTERN, llm_cls)
+    LLMRegistry.resolve.cache_clear()
+
+
+def install_fake_backend(backend: FakeModelBackend) -> None:
+    global _active_backend
+    FakeLlm.backend = backend
+    _active_backend = backend
+    install_llm_backend(FakeLlm)
+
+
+def uninstall_fake_backend() -> None:
+    global _active_backend
+    FakeLlm.backend = None
+    _active_backend = None
+    install_llm_backend(Gemini)
+
+
+def active_fake_backend() -> Optional[FakeModelBackend]:
+    """The installed fake backend, used by VectorService for embeddings"""
+    return _active_backend
+
+
+def configure_llm_backend(backend: str = settings.LLM_BACKEND) -> None:
+    """Install the model backend selected by settings.LLM_BACKEND"""
+    if backend == "gemini":
+        return
+    if backend == "record":
+        RecordingGemini.recorder = FixtureRecorder(settings.LLM_FIXTURES_PATH)
+        install_llm_backend(RecordingGemini)
+    else:
+        install_fake_backend(FakeModelBackend(
+            mode=backend,
+            fixtures_path=settings.LLM_FIXTURES_PATH,
+            latencies=parse_latencies(settings.LLM_FAKE_LATENCIES),
+        ))
+    logger.warning("LLM backend: %s", backend)
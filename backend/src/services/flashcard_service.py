@@ -10,6 +10,7 @@ from ..agents.flashcard_agent.agent import FlashcardAgent
 from ..agents.flashcard_agent.schema import (
     FlashcardConfig, TaskStatus, TaskProgress, FlashcardPreview
 )
+from .llm_scheduler import llm_context
 
 
 class TaskManager:
@@ -217,10 +218,11 @@ class FlashcardService:
                 error = details.get('error') if details else None
                 self.task_manager.update_task_progress(task_id, status, progress, step_name, error, details)
 
-            # Generate flashcards
-            apkg_path = await self.flashcard_agent.generate_flashcards(
-                pdf_path, config, progress_callback
-            )
+            # Generate flashcards; each deck takes its own round-robin turn in the LLM scheduler
+            with llm_context(user_id=f"flashcards:{task_id}"):
+                apkg_path = await self.flashcard_agent.generate_flashcards(
+                    pdf_path, config, progress_callback
+                )
 
             # Move to output directory and set download URL
             final_filename = f"{task_id}.apkg"
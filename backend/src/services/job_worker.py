@@ -0,0 +1,254 @@
+"""
+Worker of the persistent job queue (db/models/db_job.py, db/crud/jobs_crud.py).
+
+A worker claims queued jobs under a lease (at most `concurrency` at once, at most
+`max_per_user` running jobs per user across all workers), extends the lease with
+heartbeats while a job runs, stops a job when its cancellation is requested and hands
+its running jobs back to the queue when it shuts down. Jobs of crashed workers are
+requeued by any worker once their lease has expired.
+
+Course creation runs either in a worker embedded in the web process (JOB_EMBEDDED_WORKER)
+or in separate worker processes (src/worker.py). WebSocket progress notifications only
+reach clients connected to the process running the job; others see the course status.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import traceback
+import uuid
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..api.schemas.course import CourseRequest
+from ..config import settings
+from ..db.crud import courses_crud, jobs_crud
+from ..db.database import get_db_context
+from ..db.models.db_course import CourseStatus
+from ..db.models.db_job import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Job], Awaitable[None]]
+
+CREATE_COURSE = "create_course"
+RESUME_COURSE = "resume_course"
+
+
+class JobWorker:
+    """Runs queued jobs with the handler registered for their kind"""
+
+    def __init__(
+        self,
+        handlers: Dict[str, JobHandler],
+        concurrency: int = settings.JOB_WORKER_CONCURRENCY,
+        max_per_user: int = settings.JOB_MAX_PER_USER,
+        lease_seconds: float = settings.JOB_LEASE_SECONDS,
+        heartbeat_seconds: float = settings.JOB_HEARTBEAT_SECONDS,
+        poll_seconds: float = settings.JOB_POLL_SECONDS,
+        worker_id: Optional[str] = None,
+    ):
+        self.handlers = handlers
+        self.concurrency = max(1, concurrency)
+        self.max_per_user = max(1, max_per_user)
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = min(heartbeat_seconds, lease_seconds / 2)
+        self.poll_seconds = poll_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+        self.running: Dict[int, asyncio.Task] = {}
+        self._stop_reasons: Dict[int, str] = {}
+        self._stopping: Optional[asyncio.Event] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._counters = {
+            "claimed": 0, "succeeded": 0, "failed": 0, "cancelled": 0,
+            "released": 0, "lost": 0, "expired": 0,
+        }
+
+    def start(self) -> None:
+        """Run the worker as a task of the current event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop claiming jobs and hand the running ones back to the queue"""
+        if self._stopping is not None:
+            self._stopping.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def run(self) -> None:
+        self._stopping = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        last_reap = float("-inf")
+        logger.info("Job worker %s started (concurrency %d)", self.worker_id, self.concurrency)
+        try:
+            while not self._stopping.is_set():
+                if loop.time() - last_reap >= self.heartbeat_seconds:
+                    self._expire_leases()
+                    last_reap = loop.time()
+                self._claim_jobs()
+
+                self._wakeup.clear()
+                waiters = [asyncio.ensure_future(self._stopping.wait()), asyncio.ensure_future(self._wakeup.wait())]
+                await asyncio.wait(waiters, timeout=self.poll_seconds, return_when=asyncio.FIRST_COMPLETED)
+                for waiter in waiters:
+                    waiter.cancel()
+        finally:
+            for job_id, task in list(self.running.items()):
+                self._stop_reasons.setdefault(job_id, "shutdown")
+                task.cancel()
+            await asyncio.gather(*self.running.values(), return_exceptions=True)
+            logger.info("Job worker %s stopped", self.worker_id)
+
+    def stats(self) -> dict:
+        return {"worker_id": self.worker_id, "running": len(self.running), **self._counters}
+
+    def _claim_jobs(self) -> None:
+        while len(self.running) < self.concurrency:
+            try:
+                with get_db_context() as db:
+                    job = jobs_crud.claim_next_job(db, self.worker_id, self.lease_seconds, self.max_per_user)
+            except SQLAlchemyError as e:
+                logger.error("Job worker %s failed to claim a job: %s", self.worker_id, e)
+                return
+            if job is None:
+                return
+            self._counters["claimed"] += 1
+            logger.info("Job %s (%s, attempt %d) claimed by %s", job.id, job.kind, job.attempts, self.worker_id)
+            self.running[job.id] = asyncio.create_task(self._execute(job))
+
+    def _expire_leases(self) -> None:
+        try:
+            with get_db_context() as db:
+                expired = jobs_crud.expire_leases(db)
+        except SQLAlchemyError as e:
+            logger.error("Job worker %s failed to expire leases: %s", self.worker_id, e)
+            return
+        for job in expired:
+            self._counters["expired"] += 1
+            logger.warning("Lease of job %s expired, now %s", job.id, job.status.value)
+            if job.status != JobStatus.QUEUED:
+                self._settle_course(job, job.status, job.error)
+
+    async def _execute(self, job: Job) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(job.id, asyncio.current_task()))
+        status, error = JobStatus.SUCCEEDED, None
+        try:
+            handler = self.handlers.get(job.kind)
+            if handler is None:
+                raise ValueError(f"No handler registered for job kind '{job.kind}'")
+            await handler(job)
+        except asyncio.CancelledError:
+            status, error = JobStatus.CANCELLED, "Cancelled by request"
+        except Exception:
+            status, error = JobStatus.FAILED, traceback.format_exc()
+        finally:
+            heartbeat.cancel()
+            reason = self._stop_reasons.pop(job.id, None)
+            self.running.pop(job.id, None)
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+        try:
+            with get_db_context() as db:
+                if reason == "shutdown":
+                    # Not the job's fault: another worker continues it from the course's checkpoint
+                    if jobs_crud.release_job(db, job.id, self.worker_id):
+                        self._counters["released"] += 1
+                    return
+                if reason == "lost":
+                    # Another worker requeued the job after our lease expired
+                    self._counters["lost"] += 1
+                    return
+                jobs_crud.finish_job(db, job.id, self.worker_id, status, error)
+        except SQLAlchemyError as e:
+            logger.error("Failed to record the outcome of job %s: %s", job.id, e)
+            return
+        self._counters[status.value] += 1
+        logger.info("Job %s %s", job.id, status.value)
+        if status != JobStatus.SUCCEEDED:
+            self._settle_course(job, status, error)
+
+    async def _heartbeat(self, job_id: int, task: asyncio.Task) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                with get_db_context() as db:
+                    cancel_requested = jobs_crud.heartbeat_job(db, job_id, self.worker_id, self.lease_seconds)
+            except SQLAlchemyError as e:
+                logger.error("Heartbeat of job %s failed: %s", job_id, e)
+                continue
+            if cancel_requested is None or cancel_requested:
+                self._stop_reasons[job_id] = "lost" if cancel_requested is None else "cancelled"
+                task.cancel()
+                return
+
+    @staticmethod
+    def _settle_course(job: Job, status: JobStatus, error: Optional[str]) -> None:
+        """A course whose job failed or was cancelled must not stay in 'creating'"""
+        if job.course_id is None:
+            return
+        message = "Course creation was cancelled." if status == JobStatus.CANCELLED else f"Course creation failed: {error}"
+        try:
+            with get_db_context() as db:
+                course = courses_crud.get_course_by_id(db, job.course_id)
+                if course and course.status in (CourseStatus.CREATING, CourseStatus.UPDATING):
+                    courses_crud.update_course(db, job.course_id, status=CourseStatus.FAILED, error_msg=message)
+        except SQLAlchemyError as e:
+            logger.error("Failed to mark course %s as failed: %s", job.course_id, e)
+
+
+def course_job_handlers(agent_service, ws_manager) -> Dict[str, JobHandler]:
+    """Handlers of the course jobs, run by the given AgentService"""
+
+    async def create_course(job: Job) -> None:
+        payload = json.loads(job.payload)
+        # A previous worker died mid-run: continue from the course's checkpoint
+        if job.attempts > 1 and await agent_service.resume_course(
+            job.user_id, job.course_id, payload["task_id"], ws_manager
+        ):
+            return
+        await agent_service.create_course(
+            user_id=job.user_id,
+            course_id=job.course_id,
+            request=CourseRequest(**payload["request"]),
+            task_id=payload["task_id"],
+            ws_manager=ws_manager,
+        )
+
+    async def resume_course(job: Job) -> None:
+        payload = json.loads(job.payload)
+        if not await agent_service.resume_course(job.user_id, job.course_id, payload["task_id"], ws_manager):
+            raise ValueError(f"Course {job.course_id} has no checkpoint to resume from")
+
+    return {CREATE_COURSE: create_course, RESUME_COURSE: resume_course}
+
+
+def enqueue_course_creation(db, user_id: str, course_id: int, request: CourseRequest, task_id: str) -> Job:
+    """Queue the creation of an (empty) course"""
+    return jobs_crud.enqueue_job(
+        db,
+        kind=CREATE_COURSE,
+        user_id=user_id,
+        course_id=course_id,
+        payload={"request": request.model_dump(), "task_id": task_id},
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+def enqueue_course_resume(db, user_id: str, course_id: int) -> Job:
+    """Queue the continuation of an interrupted course creation from its checkpoint"""
+    return jobs_crud.enqueue_job(
+        db,
+        kind=RESUME_COURSE,
+        user_id=user_id,
+        course_id=course_id,
+        payload={"task_id": str(uuid.uuid4())},
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+    )
@@ -0,0 +1,224 @@
+"""
+Persistent cache for the final responses of idempotent agents.
+
+InfoAgent, ImageAgent, GraderAgent and PlannerAgent are often called with byte-identical
+inputs: a course creation retried after a crash, the same demo course created again, or
+the same open-text answer graded twice. For the agents listed in LLM_CACHE_AGENTS,
+StandardAgent.run and StructuredAgent.run look the response up here first. The key is
+sha256 of the agent name, the model, the instructions together with the session state
+they are filled from, the output schema and the message parts (binary parts included).
+Entries expire after LLM_CACHE_TTL_HOURS; above LLM_CACHE_MAX_ENTRIES the least recently
+used are evicted. The cache is opt-in (LLM_CACHE_ENABLED).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from logging import getLogger
+from typing import Any, Dict, Iterable, Optional
+
+from google.genai import types
+
+from ..config import settings
+from .llm_scheduler import model_name
+
+logger = getLogger(__name__)
+
+# Bump to invalidate all entries when the key or the stored response format changes
+CACHE_VERSION = 1
+
+
+def _json_default(value: Any) -> str:
+    # Binary parts (inline images, PDFs) are represented by their hash
+    if isinstance(value, (bytes, bytearray)):
+        return hashlib.sha256(value).hexdigest()
+    return str(value)
+
+
+def _instruction_text(instruction: Any) -> str:
+    """The instruction string, or what an instruction provider returns"""
+    if not callable(instruction):
+        return instruction or ""
+    try:
+        # The providers of this code base ignore their context argument
+        text = instruction(None)
+        if isinstance(text, str):
+            return text
+    except Exception:
+        pass
+    return f"{getattr(instruction, '__module__', '')}.{getattr(instruction, '__qualname__', repr(instruction))}"
+
+
+def _output_schema(agent: Any) -> Optional[Dict[str, Any]]:
+    schema = getattr(agent, "output_schema", None)
+    return schema.model_json_schema() if schema is not None else None
+
+
+def make_key(agent: Any, state: Optional[dict], content: types.Content) -> str:
+    """Cache key of running the ADK agent with the session state on the message"""
+    instructions = {
+        "instruction": _instruction_text(getattr(agent, "instruction", None)),
+        "global_instruction": _instruction_text(getattr(agent, "global_instruction", None)),
+        "output_schema": _output_schema(agent),
+        # ADK fills {placeholders} of the instructions from the session state
+        "state": state or {},
+    }
+    parts = {
+        "version": CACHE_VERSION,
+        "agent": agent.name,
+        "model": model_name(getattr(agent, "model", None)),
+        "instructions": hashlib.sha256(
+            json.dumps(instructions, sort_keys=True, default=_json_default).encode("utf-8")
+        ).hexdigest(),
+        "content": hashlib.sha256(
+            json.dumps(content.model_dump(exclude_none=True), sort_keys=True, default=_json_default).encode("utf-8")
+        ).hexdigest(),
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite-backed LRU cache with expiry mapping a cache key to an agent response."""
+
+    def __init__(
+        self,
+        path: str = settings.LLM_CACHE_PATH,
+        agents: Iterable[str] = tuple(name.strip() for name in settings.LLM_CACHE_AGENTS.split(",") if name.strip()),
+        ttl_seconds: float = settings.LLM_CACHE_TTL_HOURS * 3600,
+        max_entries: int = settings.LLM_CACHE_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.agents = set(agents)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                agent TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_responses_last_used ON responses (last_used)"
+        )
+        self._conn.commit()
+
+        # Metrics per agent name
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.expired = 0
+        self.evictions = 0
+
+    def enabled_for(self, agent_name: str) -> bool:
+        return agent_name in self.agents
+
+    def key_for(self, agent: Any, state: Optional[dict], content: types.Content) -> Optional[str]:
+        """The cache key of an agent run, or None if the agent's responses are not cached"""
+        if not self.enabled_for(agent.name):
+            return None
+        return make_key(agent, state, content)
+
+    def get(self, key: str, agent_name: str) -> Optional[Dict[str, Any]]:
+        """The cached response (a fresh dict) or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl_seconds > 0 and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.expired += 1
+                row = None
+            if row is None:
+                self.misses[agent_name] = self.misses.get(agent_name, 0) + 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits[agent_name] = self.hits.get(agent_name, 0) + 1
+        return json.loads(row[0])
+
+    def put(self, key: str, agent_name: str, response: Dict[str, Any]) -> None:
+        """Store a successful response; drop expired entries and evict above the size cap"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, agent, response, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, agent_name, json.dumps(response), now, now),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                if self.ttl_seconds > 0:
+                    self.expired += self._conn.execute(
+                        "DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,)
+                    ).rowcount
+                    count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                if count > self.max_entries:
+                    # Evict down to 90% of the cap so we do not evict on every insert
+                    to_evict = count - int(self.max_entries * 0.9)
+                    self._conn.execute(
+                        "DELETE FROM responses WHERE key IN "
+                        "(SELECT key FROM responses ORDER BY last_used ASC LIMIT ?)",
+                        (to_evict,),
+                    )
+                    self.evictions += to_evict
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hits and misses per agent and the store size"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            per_agent = {}
+            for agent in sorted(self.agents | set(self.hits) | set(self.misses)):
+                hits, misses = self.hits.get(agent, 0), self.misses.get(agent, 0)
+                per_agent[agent] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": hits / (hits + misses) if hits + misses else None,
+                }
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "agents": per_agent,
+            }
+
+
+_llm_response_cache: Optional[LLMResponseCache] = None
+_llm_response_cache_lock = threading.Lock()
+
+
+def get_llm_response_cache() -> Optional[LLMResponseCache]:
+    """Return the process-wide response cache, or None if it is disabled"""
+    global _llm_response_cache
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    with _llm_response_cache_lock:
+        if _llm_response_cache is None:
+            try:
+                _llm_response_cache = LLMResponseCache()
+            except Exception as e:
+                logger.warning("LLM response cache unavailable, continuing without it: %s", e)
+                return None
+        return _llm_response_cache
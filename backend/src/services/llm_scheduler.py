@@ -0,0 +1,295 @@
+"""
+Process-wide scheduler for LLM calls.
+
+Every agent run (StandardAgent, StructuredAgent, ChatAgent) waits for a slot here before it
+talks to the model. The scheduler enforces
+- a global cap on in-flight runs (LLM_MAX_IN_FLIGHT),
+- a token bucket per model (LLM_RATE_LIMITS requests per minute, LLM_DEFAULT_RPM otherwise),
+- priority classes, chat before grading before course creation before flashcards, where a
+  waiting run moves up one class every LLM_PRIORITY_AGING_SECONDS so nothing starves,
+- round-robin between the users waiting in the same class, so one 20-chapter course
+  cannot push every other user's requests to the back,
+and keeps queue depth and wait time metrics per class.
+
+The priority and fairness key of a run come from the agent (its `priority` attribute and
+the user_id it runs for); a caller can override both for everything it awaits with
+`llm_context(...)`.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Tuple
+
+from ..config import settings
+
+
+class Priority(IntEnum):
+    CHAT = 0
+    GRADING = 1
+    COURSE_CREATION = 2
+    FLASHCARDS = 3
+
+
+_context_priority: contextvars.ContextVar[Optional[Priority]] = contextvars.ContextVar("llm_priority", default=None)
+_context_user: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_user", default=None)
+
+
+@contextmanager
+def llm_context(user_id: Optional[str] = None, priority: Optional[Priority] = None) -> Iterator[None]:
+    """Override the fairness key and/or priority of all LLM runs awaited inside the block"""
+    user_token = _context_user.set(user_id) if user_id is not None else None
+    priority_token = _context_priority.set(priority) if priority is not None else None
+    try:
+        yield
+    finally:
+        if priority_token is not None:
+            _context_priority.reset(priority_token)
+        if user_token is not None:
+            _context_user.reset(user_token)
+
+
+def parse_rate_limits(value: str) -> Dict[str, float]:
+    """"model=rpm,model=rpm" -> {model: rpm}"""
+    limits = {}
+    for item in value.split(","):
+        if "=" in item:
+            model, rpm = item.rsplit("=", 1)
+            limits[model.strip()] = float(rpm)
+    return limits
+
+
+class TokenBucket:
+    """Allows `rate_per_minute` requests per minute with bursts of up to `capacity`."""
+
+    def __init__(self, rate_per_minute: float, capacity: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is available now)"""
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        if self.rate > 0:
+            self._refill(now)
+            self.tokens -= 1
+
+
+@dataclass(eq=False)
+class _Waiter:
+    loop: asyncio.AbstractEventLoop
+    future: asyncio.Future
+    model: str
+    user_id: str
+    priority: Priority
+    enqueued: float = field(default_factory=time.monotonic)
+    granted: bool = False
+
+
+class LLMScheduler:
+    """Admission control for LLM runs; see the module docstring."""
+
+    def __init__(
+        self,
+        max_in_flight: int = settings.LLM_MAX_IN_FLIGHT,
+        rate_limits: Optional[Dict[str, float]] = None,
+        default_rpm: float = settings.LLM_DEFAULT_RPM,
+        burst_seconds: float = settings.LLM_RATE_BURST_SECONDS,
+        aging_seconds: float = settings.LLM_PRIORITY_AGING_SECONDS,
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.rate_limits = parse_rate_limits(settings.LLM_RATE_LIMITS) if rate_limits is None else rate_limits
+        self.default_rpm = default_rpm
+        self.burst_seconds = burst_seconds
+        self.aging_seconds = aging_seconds
+        self._buckets: Dict[str, TokenBucket] = {}
+        # priority -> user -> waiters in arrival order; the user order is the round-robin order
+        self._queues: Dict[Priority, "OrderedDict[str, Deque[_Waiter]]"] = {
+            priority: OrderedDict() for priority in Priority
+        }
+        self._lock = threading.Lock()
+        self._timer: Optional[Tuple[float, asyncio.TimerHandle]] = None
+
+        # Metrics
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.granted = 0
+        self.rate_limited = 0
+        self._waits: Dict[Priority, Deque[float]] = {priority: deque(maxlen=1000) for priority in Priority}
+
+    def _bucket(self, model: str) -> TokenBucket:
+        bucket = self._buckets.get(model)
+        if bucket is None:
+            rpm = self.rate_limits.get(model, self.default_rpm)
+            bucket = TokenBucket(rpm, rpm / 60.0 * self.burst_seconds)
+            self._buckets[model] = bucket
+        return bucket
+
+    def _queued(self) -> int:
+        return sum(len(waiters) for queue in self._queues.values() for waiters in queue.values())
+
+    def _effective_priority(self, waiter: _Waiter, now: float) -> int:
+        if self.aging_seconds <= 0:
+            return waiter.priority
+        return waiter.priority - int((now - waiter.enqueued) / self.aging_seconds)
+
+    def _dispatch_locked(self) -> None:
+        """Grant slots to the best eligible waiters; lock must be held"""
+        now = time.monotonic()
+        while self.in_flight < self.max_in_flight:
+            best = None
+            best_key = None
+            retry_after = None
+            for priority, queue in self._queues.items():
+                for position, waiters in enumerate(queue.values()):
+                    # The user's oldest run whose model has a token; a rate-limited model
+                    # does not hold back the user's calls to other models
+                    for waiter in waiters:
+                        delay = self._bucket(waiter.model).delay(now)
+                        if delay <= 0:
+                            break
+                        retry_after = delay if retry_after is None else min(retry_after, delay)
+                    else:
+                        continue
+                    key = (self._effective_priority(waiter, now), priority, position)
+                    if best_key is None or key < best_key:
+                        best, best_key = waiter, key
+            if best is None:
+                if retry_after is not None:
+                    self.rate_limited += 1
+                    self._schedule_wakeup(now + retry_after)
+                return
+
+            queue = self._queues[best.priority]
+            waiters = queue[best.user_id]
+            waiters.remove(best)
+            if waiters:
+                queue.move_to_end(best.user_id)  # next turn goes to the other users first
+            else:
+                del queue[best.user_id]
+            self._bucket(best.model).take(now)
+            self.in_flight += 1
+            self.granted += 1
+            best.granted = True
+            self._waits[best.priority].append(now - best.enqueued)
+            best.loop.call_soon_threadsafe(_resolve, best.future)
+
+    def _schedule_wakeup(self, when: float) -> None:
+        """Dispatch again once a rate-limited model has a token; lock must be held"""
+        if self._timer is not None:
+            if self._timer[0] <= when:
+                return
+            if self._timer[1] is not None:
+                self._timer[1].cancel()
+        # Any waiter's loop will do, the dispatch itself is thread-safe
+        loop = next(waiters[0].loop for queue in self._queues.values() for waiters in queue.values())
+        self._timer = (when, None)
+        loop.call_soon_threadsafe(self._arm_timer, loop, when)
+
+    def _arm_timer(self, loop: asyncio.AbstractEventLoop, when: float) -> None:
+        with self._lock:
+            if self._timer is None or self._timer[0] != when:
+                return
+            self._timer = (when, loop.call_later(max(0.0, when - time.monotonic()), self._on_timer))
+
+    def _on_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+            self._dispatch_locked()
+
+    async def acquire(self, model: str, priority: Priority, user_id: str) -> None:
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(loop=loop, future=loop.create_future(), model=model, user_id=user_id, priority=priority)
+        with self._lock:
+            self._queues[priority].setdefault(user_id, deque()).append(waiter)
+            self.max_queue_depth = max(self.max_queue_depth, self._queued())
+            self._dispatch_locked()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    self.in_flight -= 1
+                    self._dispatch_locked()
+                else:
+                    waiters = self._queues[priority].get(user_id)
+                    if waiters is not None and waiter in waiters:
+                        waiters.remove(waiter)
+                        if not waiters:
+                            del self._queues[priority][user_id]
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self._dispatch_locked()
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        model: str,
+        priority: Priority = Priority.COURSE_CREATION,
+        user_id: str = "system",
+    ) -> AsyncIterator[None]:
+        """Hold one in-flight slot for the duration of an LLM run"""
+        # Priority.CHAT is 0, so compare against None rather than relying on truthiness
+        context_priority = _context_priority.get()
+        priority = context_priority if context_priority is not None else priority
+        context_user = _context_user.get()
+        user_id = context_user if context_user is not None else user_id
+        await self.acquire(model, priority, user_id)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return in-flight count, queue depth and wait times per priority class"""
+        with self._lock:
+            per_priority = {}
+            for priority in Priority:
+                waits: List[float] = sorted(self._waits[priority])
+                per_priority[priority.name.lower()] = {
+                    "queued": sum(len(waiters) for waiters in self._queues[priority].values()),
+                    "waiting_users": len(self._queues[priority]),
+                    "avg_wait_ms": 1000 * sum(waits) / len(waits) if waits else 0.0,
+                    "p95_wait_ms": 1000 * waits[int(0.95 * (len(waits) - 1))] if waits else 0.0,
+                }
+            return {
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self.in_flight,
+                "queued": self._queued(),
+                "max_queue_depth": self.max_queue_depth,
+                "granted": self.granted,
+                "rate_limited": self.rate_limited,
+                "priorities": per_priority,
+            }
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def model_name(model: Any) -> str:
+    """Rate limit key of an ADK agent model (a model name or a BaseLlm instance)"""
+    if isinstance(model, str):
+        return model or "default"
+    return getattr(model, "model", None) or "default"
+
+
+llm_scheduler = LLMScheduler()
@@ -0,0 +1,198 @@
+"""
+PDF page rasterization for learning flashcards.
+
+Pages are rendered in-process with PyMuPDF pixmaps (no poppler subprocesses) and stored
+under a content-addressed name, <sha256 of the PDF>_p<page>_<size>.<ext>, so a page shared
+by overlapping chapters, or by another deck made from the same PDF, is rendered only once.
+Missing pages of larger requests are rendered in parallel on the PDF extraction process
+pool. Images can be written as PNG, JPEG or WebP, optionally scaled to a target width,
+to keep the .apkg files small.
+"""
+import asyncio
+import hashlib
+import os
+import threading
+from logging import getLogger
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+from ..config import settings
+from .pdf_extraction import PDFExtractionPool, fitz_lock, page_ranges, pdf_extraction_pool
+
+logger = getLogger(__name__)
+
+IMAGE_FORMATS = {"png": "png", "jpeg": "jpg", "webp": "webp"}
+
+
+def render_page(page: "fitz.Page", dpi: int, width: int, image_format: str, quality: int) -> bytes:
+    """Rasterize one page; width > 0 overrides dpi"""
+    zoom = width / page.rect.width if width > 0 else dpi / 72
+    pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+    if image_format == "jpeg":
+        return pixmap.tobytes("jpeg", jpg_quality=quality)
+    if image_format == "webp":
+        return pixmap.pil_tobytes(format="WEBP", quality=quality)
+    return pixmap.tobytes("png")
+
+
+def _render_pages(
+    pdf_path: str, pages: List[int], dpi: int, width: int, image_format: str, quality: int
+) -> List[bytes]:
+    """Worker: render the given 0-indexed pages of the PDF stored at pdf_path"""
+    with fitz_lock:  # uncontended in the worker processes, needed for the serial fallback
+        doc = fitz.open(pdf_path)
+        try:
+            return [render_page(doc[page], dpi, width, image_format, quality) for page in pages]
+        finally:
+            doc.close()
+
+
+class PageRenderer:
+    """Renders PDF pages to image files, each (document, page, size, format) at most once."""
+
+    def __init__(
+        self,
+        path: str = settings.PAGE_IMAGE_CACHE_PATH,
+        dpi: int = settings.PAGE_IMAGE_DPI,
+        width: int = settings.PAGE_IMAGE_WIDTH,
+        image_format: str = settings.PAGE_IMAGE_FORMAT,
+        quality: int = settings.PAGE_IMAGE_QUALITY,
+        max_disk_bytes: int = settings.PAGE_IMAGE_CACHE_MAX_MB * 1024 * 1024,
+        pool: Optional[PDFExtractionPool] = pdf_extraction_pool,
+        min_parallel_pages: int = 8,
+    ):
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unsupported page image format: {image_format}")
+        self.path = path
+        self.dpi = dpi
+        self.width = width
+        self.image_format = image_format
+        self.quality = quality
+        self.max_disk_bytes = max_disk_bytes
+        self.pool = pool
+        self.min_parallel_pages = min_parallel_pages
+        self._lock = threading.Lock()
+        # One lock per document, so concurrent chapters of the same PDF do not render a page twice
+        self._document_locks: Dict[str, threading.Lock] = {}
+        os.makedirs(self.path, exist_ok=True)
+
+        # Metrics
+        self.hits = 0
+        self.rendered = 0
+
+    def _file(self, sha256: str, page: int) -> str:
+        size = f"w{self.width}" if self.width > 0 else f"{self.dpi}dpi"
+        quality = f"_q{self.quality}" if self.image_format != "png" else ""
+        name = f"{sha256}_p{page}_{size}{quality}.{IMAGE_FORMATS[self.image_format]}"
+        return os.path.join(self.path, name)
+
+    def render(self, pdf_path: str, pages: Iterable[int]) -> List[str]:
+        """
+        Return image paths for the given 0-indexed pages (in the given order, duplicates and
+        pages outside the document dropped), rendering only those not rendered before.
+        """
+        with open(pdf_path, "rb") as f:
+            sha256 = hashlib.sha256(f.read()).hexdigest()
+
+        with self._lock:
+            document_lock = self._document_locks.setdefault(sha256, threading.Lock())
+
+        with document_lock:
+            # PyMuPDF is not thread-safe: fitz_lock is held for each call, not for the file I/O
+            with fitz_lock:
+                doc = fitz.open(pdf_path)
+                page_count = len(doc)
+            try:
+                wanted = list(dict.fromkeys(page for page in pages if 0 <= page < page_count))
+                files = {page: self._file(sha256, page) for page in wanted}
+                missing = []
+                for page in wanted:
+                    try:
+                        os.utime(files[page])  # mtime doubles as the last-used time for eviction
+                    except FileNotFoundError:
+                        missing.append(page)
+                with self._lock:
+                    self.hits += len(wanted) - len(missing)
+                    self.rendered += len(missing)
+
+                parallel = (
+                    self.pool is not None
+                    and self.pool.max_workers > 1
+                    and len(missing) >= self.min_parallel_pages
+                )
+                if not parallel:
+                    for page in missing:
+                        with fitz_lock:
+                            image = render_page(doc[page], self.dpi, self.width, self.image_format, self.quality)
+                        self._store(files[page], image)
+            finally:
+                with fitz_lock:
+                    doc.close()
+
+            if parallel:
+                for page, image in self._render_parallel(pdf_path, missing):
+                    self._store(files[page], image)
+
+        if missing:
+            self._evict_disk()
+        return [files[page] for page in wanted]
+
+    async def render_async(self, pdf_path: str, pages: Iterable[int]) -> List[str]:
+        return await asyncio.to_thread(self.render, pdf_path, list(pages))
+
+    def _render_parallel(self, pdf_path: str, pages: List[int]) -> List[Tuple[int, bytes]]:
+        batches = [pages[start:end] for start, end in page_ranges(len(pages), self.pool.max_workers, 2)]
+        try:
+            futures = [
+                self.pool.submit(
+                    _render_pages, pdf_path, batch, self.dpi, self.width, self.image_format, self.quality
+                )
+                for batch in batches
+            ]
+            images = [image for future in futures for image in future.result()]
+        except Exception as e:
+            logger.warning("Parallel page rendering failed, rendering serially: %s", e)
+            self.pool.reset()
+            images = _render_pages(pdf_path, pages, self.dpi, self.width, self.image_format, self.quality)
+        return list(zip(pages, images))
+
+    def _store(self, file: str, image: bytes) -> None:
+        tmp_file = f"{file}.{threading.get_ident()}.tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(image)
+        os.replace(tmp_file, file)
+
+    def _evict_disk(self) -> None:
+        entries = []
+        total = 0
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(tuple(f".{ext}" for ext in IMAGE_FORMATS.values())):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        for _, size, file in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(file)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "rendered": self.rendered}
+
+
+_page_renderer: Optional[PageRenderer] = None
+_page_renderer_lock = threading.Lock()
+
+
+def get_page_renderer() -> PageRenderer:
+    """Return the process-wide page renderer configured from settings"""
+    global _page_renderer
+    with _page_renderer_lock:
+        if _page_renderer is None:
+            _page_renderer = PageRenderer()
+        return _page_renderer
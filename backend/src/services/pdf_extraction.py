@@ -0,0 +1,278 @@
+"""
+PDF text extraction, serial or page-parallel on a process pool.
+
+PyMuPDF holds the GIL while it extracts text, so a large textbook extracted in the API
+process blocks every other request of that worker. Documents with at least
+settings.PDF_PARALLEL_MIN_PAGES pages are written to a temp file once and their page
+ranges are extracted by a ProcessPoolExecutor; each worker opens the file itself and the
+page texts are reassembled in page order. Smaller documents are extracted serially, where
+the process round trip would cost more than it saves.
+
+PyMuPDF is not thread-safe, and the serial path runs on helper threads of concurrent
+requests. Every use of PyMuPDF in this process therefore holds fitz_lock; the worker
+processes have their own.
+"""
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import queue
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import cached_property
+from logging import getLogger
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar, Union
+
+import fitz  # PyMuPDF
+
+from ..config import settings
+from .pdf_layout import Band, page_text_and_bands, repeated_band_keys, strip_bands, strip_boilerplate
+
+logger = getLogger(__name__)
+
+# Held for every PyMuPDF call in this process (documents, pages, pixmaps)
+fitz_lock = threading.RLock()
+
+T = TypeVar("T")
+_DONE = object()
+
+
+@dataclass
+class PDFExtraction:
+    sha256: str
+    pages: List[str]
+    toc: List[list] = field(default_factory=list)
+    metadata: Dict = field(default_factory=dict)
+    # Per page: character ranges of the text blocks in the top/bottom band (see pdf_layout)
+    bands: List[List[Band]] = field(default_factory=list)
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.pages)
+
+    @cached_property
+    def body_pages(self) -> List[str]:
+        """Page texts without running headers, footers and page numbers"""
+        return strip_boilerplate(self.pages, self.bands)
+
+    def page_texts(self, strip: bool = settings.PDF_STRIP_BOILERPLATE) -> List[str]:
+        return self.body_pages if strip else self.pages
+
+
+def extract_pdf(data: bytes, sha256: Optional[str] = None) -> PDFExtraction:
+    """Parse a PDF with PyMuPDF in the calling thread"""
+    with fitz_lock:
+        doc = fitz.open(stream=data, filetype="pdf")
+        try:
+            return _extract_document(doc, sha256 or hashlib.sha256(data).hexdigest())
+        finally:
+            doc.close()
+
+
+def _extract_document(doc: "fitz.Document", sha256: str) -> PDFExtraction:
+    """All pages of an open document; the caller holds fitz_lock"""
+    pages, bands = _split_pages([page_text_and_bands(page) for page in doc])
+    return PDFExtraction(
+        sha256=sha256,
+        pages=pages,
+        toc=doc.get_toc(),
+        metadata=dict(doc.metadata or {}),
+        bands=bands,
+    )
+
+
+def _split_pages(results: List[Tuple[str, List[Band]]]) -> Tuple[List[str], List[List[Band]]]:
+    return [text for text, _ in results], [bands for _, bands in results]
+
+
+def iter_page_texts(data: Union[bytes, str], strip: bool = False, sample_pages: int = 30) -> Iterator[str]:
+    """
+    Yield the text of one page at a time from PDF bytes or a file path; pages after the
+    consumer stops are never parsed. With strip, headers and footers repeated on the first
+    sample_pages pages (and page numbers) are removed from every page.
+    fitz_lock is held per page, not while the consumer works on a page. An open document
+    must not move between threads: iterate (and close) it on one, see iterate_in_thread.
+    """
+    with fitz_lock:
+        doc = fitz.open(data) if isinstance(data, str) else fitz.open(stream=data, filetype="pdf")
+        page_count = len(doc)
+    try:
+        if not strip:
+            for number in range(page_count):
+                with fitz_lock:
+                    text = doc[number].get_text()
+                yield text
+            return
+        with fitz_lock:
+            sample = [page_text_and_bands(doc[number]) for number in range(min(sample_pages, page_count))]
+        keys = repeated_band_keys(*_split_pages(sample))
+        for number in range(page_count):
+            if number < len(sample):
+                text, bands = sample[number]
+            else:
+                with fitz_lock:
+                    text, bands = page_text_and_bands(doc[number])
+            yield strip_bands(text, bands, keys)
+    finally:
+        with fitz_lock:
+            doc.close()
+
+
+async def iterate_in_thread(items: Iterable[T]) -> AsyncIterator[T]:
+    """
+    Iterate a blocking iterator, e.g. over the pages of an open PDF, on one dedicated thread.
+    Items are produced one at a time when the consumer asks for them (asyncio.to_thread
+    would advance it on a different pool thread each time); the iterator is closed on the
+    same thread once the consumer stops.
+    """
+    loop = asyncio.get_running_loop()
+    requests: "queue.SimpleQueue[Optional[asyncio.Future]]" = queue.SimpleQueue()
+
+    def resolve(future: asyncio.Future, result=None, error: Optional[BaseException] = None) -> None:
+        if future.done():  # the consumer was cancelled meanwhile
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def produce() -> None:
+        iterator = iter(items)
+        try:
+            while (future := requests.get()) is not None:
+                try:
+                    item = next(iterator, _DONE)
+                except BaseException as e:
+                    loop.call_soon_threadsafe(resolve, future, None, e)
+                    return
+                loop.call_soon_threadsafe(resolve, future, item)
+                if item is _DONE:
+                    return
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    threading.Thread(target=produce, name="page-stream", daemon=True).start()
+    try:
+        while True:
+            future = loop.create_future()
+            requests.put(future)
+            item = await future
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        requests.put(None)
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> List[Tuple[str, List[Band]]]:
+    """Worker: extract pages [start, end) of the PDF stored at pdf_path"""
+    doc = fitz.open(pdf_path)
+    try:
+        return [page_text_and_bands(doc[page]) for page in range(start, end)]
+    finally:
+        doc.close()
+
+
+def page_ranges(page_count: int, workers: int, min_pages_per_task: int = 8) -> List[Tuple[int, int]]:
+    """Split pages into ~2 tasks per worker, so a slow range does not stall the others"""
+    size = max(min_pages_per_task, -(-page_count // (2 * max(1, workers))))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+class PDFExtractionPool:
+    """Extracts large PDFs page-parallel on a lazily started process pool."""
+
+    def __init__(
+        self,
+        max_workers: int = settings.PDF_EXTRACT_WORKERS,
+        min_pages: int = settings.PDF_PARALLEL_MIN_PAGES,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.min_pages = min_pages
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that runs an event loop and thread pools is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _reset_executor(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def extract(self, data: bytes, sha256: Optional[str] = None, parallel: Optional[bool] = None) -> PDFExtraction:
+        """Extract all pages; parallel=None decides by page count"""
+        sha256 = sha256 or hashlib.sha256(data).hexdigest()
+        # Only the serial path holds fitz_lock for the whole document, large ones go to the pool
+        with fitz_lock:
+            doc = fitz.open(stream=data, filetype="pdf")
+            try:
+                page_count = len(doc)
+                if parallel is None:
+                    parallel = self.max_workers > 1 and page_count >= self.min_pages
+                if not parallel:
+                    return _extract_document(doc, sha256)
+                toc = doc.get_toc()
+                metadata = dict(doc.metadata or {})
+            finally:
+                doc.close()
+
+        try:
+            pages, bands = _split_pages(self._extract_parallel(data, page_count))
+        except Exception as e:
+            logger.warning("Parallel PDF extraction failed, extracting serially: %s", e)
+            self._reset_executor()
+            return extract_pdf(data, sha256)
+        return PDFExtraction(sha256=sha256, pages=pages, toc=toc, metadata=metadata, bands=bands)
+
+    def _extract_parallel(self, data: bytes, page_count: int) -> List[Tuple[str, List[Band]]]:
+        # Workers open the document from one shared temp file instead of receiving the bytes
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+            f.write(data)
+            pdf_path = f.name
+        try:
+            executor = self._get_executor()
+            futures = [
+                executor.submit(_extract_page_range, pdf_path, start, end)
+                for start, end in page_ranges(page_count, self.max_workers)
+            ]
+            pages: List[Tuple[str, List[Band]]] = []
+            for future in futures:  # submission order == page order
+                pages.extend(future.result())
+            return pages
+        finally:
+            os.remove(pdf_path)
+
+    def submit(self, fn, *args) -> Future:
+        """Run another page-level PDF task (e.g. rendering) on the same worker processes"""
+        return self._get_executor().submit(fn, *args)
+
+    def reset(self) -> None:
+        """Drop a broken pool; the next task starts a fresh one"""
+        self._reset_executor()
+
+    async def extract_async(self, data: bytes, sha256: Optional[str] = None) -> PDFExtraction:
+        """Extract without blocking the event loop; the waiting happens on a helper thread"""
+        return await asyncio.to_thread(self.extract, data, sha256)
+
+    def shutdown(self) -> None:
+        self._reset_executor()
+
+
+pdf_extraction_pool = PDFExtractionPool()
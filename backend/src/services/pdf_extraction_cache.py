@@ -0,0 +1,231 @@
+"""
+Content-addressed cache for PDF text extraction.
+
+The same uploaded PDF is parsed by several call sites: the info agent preview
+(QueryService.get_info_query), paragraph extraction for RAG (PDFProcessor) and the
+flashcard PDFParser. Every result is keyed by sha256 of the document bytes and holds the
+per-page text, the table of contents and the document metadata, so each PDF is parsed
+with PyMuPDF at most once (large documents page-parallel, see pdf_extraction). Recent
+extractions are kept in memory; all of them are stored on disk as gzip-compressed JSON
+and evicted least recently used above a size cap.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from logging import getLogger
+from typing import Dict, Optional
+
+from ..config import settings
+from .pdf_extraction import PDFExtraction, pdf_extraction_pool
+
+logger = getLogger(__name__)
+
+
+class PDFExtractionCache:
+    """Memory + disk cache of PDFExtraction results keyed by the sha256 of the PDF bytes."""
+
+    def __init__(
+        self,
+        path: Optional[str] = settings.PDF_CACHE_PATH,
+        memory_entries: int = settings.PDF_CACHE_MEMORY_ENTRIES,
+        max_disk_bytes: int = settings.PDF_CACHE_MAX_MB * 1024 * 1024,
+    ):
+        self.path = path or None
+        self.memory_entries = max(0, memory_entries)
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, PDFExtraction]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One lock per document being extracted, so concurrent callers parse it only once
+        self._inflight: Dict[str, threading.Lock] = {}
+        if self.path:
+            os.makedirs(self.path, exist_ok=True)
+
+        # Metrics
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _file(self, sha256: str) -> str:
+        return os.path.join(self.path, f"{sha256}.json.gz")
+
+    def _remember(self, extraction: PDFExtraction) -> None:
+        """Add to the in-memory LRU; lock must be held"""
+        if self.memory_entries == 0:
+            return
+        self._memory[extraction.sha256] = extraction
+        self._memory.move_to_end(extraction.sha256)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read(self, sha256: str) -> Optional[PDFExtraction]:
+        if not self.path:
+            return None
+        file = self._file(sha256)
+        try:
+            with gzip.open(file, "rt", encoding="utf-8") as f:
+                rows = json.load(f)
+            os.utime(file)  # mtime doubles as the last-used time for eviction
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("Discarding unreadable PDF cache entry %s: %s", sha256, e)
+            return None
+        if "bands" not in rows:
+            return None  # stored before header/footer detection, extract again
+        return PDFExtraction(
+            sha256=sha256,
+            pages=rows["pages"],
+            toc=rows["toc"],
+            metadata=rows["metadata"],
+            bands=[[tuple(band) for band in page_bands] for page_bands in rows["bands"]],
+        )
+
+    def _write(self, extraction: PDFExtraction) -> None:
+        if not self.path:
+            return
+        file = self._file(extraction.sha256)
+        tmp_file = f"{file}.{threading.get_ident()}.tmp"
+        try:
+            with gzip.open(tmp_file, "wt", encoding="utf-8", compresslevel=6) as f:
+                json.dump(
+                    {
+                        "pages": extraction.pages,
+                        "toc": extraction.toc,
+                        "metadata": extraction.metadata,
+                        "bands": extraction.bands,
+                    },
+                    f,
+                    separators=(",", ":"),
+                )
+            os.replace(tmp_file, file)
+        except Exception as e:
+            logger.warning("Failed to store PDF extraction %s: %s", extraction.sha256, e)
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            return
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        entries = []
+        total = 0
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".json.gz"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        for _, size, file in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(file)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+    def peek(self, data: bytes) -> Optional[PDFExtraction]:
+        """Return the extraction if it is already cached, without parsing the PDF"""
+        sha256 = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            extraction = self._memory.get(sha256)
+            if extraction is not None:
+                self.memory_hits += 1
+                return extraction
+        extraction = self._read(sha256)
+        if extraction is not None:
+            with self._lock:
+                self.disk_hits += 1
+                self._remember(extraction)
+        return extraction
+
+    def peek_file(self, pdf_path: str) -> Optional[PDFExtraction]:
+        with open(pdf_path, "rb") as f:
+            return self.peek(f.read())
+
+    def get(self, data: bytes) -> PDFExtraction:
+        """Return the extraction of a PDF, parsing it only if it was never seen before"""
+        sha256 = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            extraction = self._memory.get(sha256)
+            if extraction is not None:
+                self._memory.move_to_end(sha256)
+                self.memory_hits += 1
+                return extraction
+            key_lock = self._inflight.setdefault(sha256, threading.Lock())
+
+        try:
+            with key_lock:
+                with self._lock:
+                    # Another thread may have finished the same document while we waited
+                    extraction = self._memory.get(sha256)
+                    if extraction is not None:
+                        self.memory_hits += 1
+                        return extraction
+
+                extraction = self._read(sha256)
+                if extraction is not None:
+                    with self._lock:
+                        self.disk_hits += 1
+                        self._remember(extraction)
+                    return extraction
+
+                extraction = pdf_extraction_pool.extract(data, sha256)
+                self._write(extraction)
+                with self._lock:
+                    self.misses += 1
+                    self._remember(extraction)
+                return extraction
+        finally:
+            with self._lock:
+                self._inflight.pop(sha256, None)
+
+    def get_file(self, pdf_path: str) -> PDFExtraction:
+        with open(pdf_path, "rb") as f:
+            return self.get(f.read())
+
+    async def get_async(self, data: bytes) -> PDFExtraction:
+        """Async variant of get; hashing, disk reads and extraction run off the event loop"""
+        return await asyncio.to_thread(self.get, data)
+
+    async def get_file_async(self, pdf_path: str) -> PDFExtraction:
+        return await asyncio.to_thread(self.get_file, pdf_path)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self.path:
+                for entry in os.scandir(self.path):
+                    if entry.name.endswith(".json.gz"):
+                        os.remove(entry.path)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else None,
+            }
+
+
+_pdf_cache: Optional[PDFExtractionCache] = None
+_pdf_cache_lock = threading.Lock()
+
+
+def get_pdf_extraction_cache() -> PDFExtractionCache:
+    """Return the process-wide PDF extraction cache (memory only if the disk cache is disabled)"""
+    global _pdf_cache
+    with _pdf_cache_lock:
+        if _pdf_cache is None:
+            path = settings.PDF_CACHE_PATH if settings.PDF_CACHE_ENABLED else None
+            try:
+                _pdf_cache = PDFExtractionCache(path=path)
+            except Exception as e:
+                logger.warning("PDF extraction disk cache unavailable, using memory only: %s", e)
+                _pdf_cache = PDFExtractionCache(path=None)
+        return _pdf_cache
@@ -0,0 +1,91 @@
+"""
+Detection of running headers, footers and page numbers in PDFs.
+
+Lecture slides and books repeat the course name, the chapter title, the university footer
+and a page number on every page. While a page is extracted, the lines of the text blocks
+lying entirely in the top or bottom band of the page (PyMuPDF block bboxes) are recorded
+as character ranges of the page text. A band line is boilerplate if its text, with digits
+masked, appears on a large enough share of the pages, or if it is only a page number.
+Stripping it needs no further parsing, so it runs on every upload.
+"""
+import math
+import re
+from typing import Iterable, List, Sequence, Set, Tuple
+
+import fitz  # PyMuPDF
+
+from ..config import settings
+
+# (start, end) character offsets of a line of a top/bottom band block in the page text
+Band = Tuple[int, int]
+
+_DIGITS_RE = re.compile(r"\d+")
+_WHITESPACE_RE = re.compile(r"\s+")
+_PAGE_NUMBER_RE = re.compile(r"^(?:(?:page|slide|seite|folie|p\.)\s*)?#(?:\s*(?:/|of|von|\|)\s*#)?$")
+
+
+def page_text_and_bands(page: "fitz.Page", band: float = settings.PDF_BOILERPLATE_BAND) -> Tuple[str, List[Band]]:
+    """
+    The page text (identical to page.get_text()) and the ranges of the lines of its blocks
+    lying within the top or bottom `band` fraction of the page height.
+    """
+    height = page.rect.height
+    top, bottom = page.rect.y0 + height * band, page.rect.y1 - height * band
+    parts: List[str] = []
+    bands: List[Band] = []
+    offset = 0
+    for x0, y0, x1, y1, text, _, block_type in page.get_text("blocks"):
+        if block_type != 0:  # image block
+            continue
+        if y1 <= top or y0 >= bottom:
+            # Line by line: a footer block often also holds the page number
+            line_start = offset
+            for line in text.splitlines(keepends=True):
+                bands.append((line_start, line_start + len(line)))
+                line_start += len(line)
+        parts.append(text)
+        offset += len(text)
+    return "".join(parts), bands
+
+
+def band_key(text: str) -> str:
+    """Band text with digits masked, so "Slide 3" and "Slide 4" count as the same footer"""
+    return _WHITESPACE_RE.sub(" ", _DIGITS_RE.sub("#", text)).strip().lower()
+
+
+def repeated_band_keys(
+    pages: Sequence[str],
+    bands: Sequence[Sequence[Band]],
+    min_share: float = settings.PDF_BOILERPLATE_MIN_SHARE,
+    min_pages: int = 3,
+) -> Set[str]:
+    """Keys of band texts found on at least max(min_pages, min_share * pages) pages"""
+    counts = {}
+    for text, page_bands in zip(pages, bands):
+        for key in {band_key(text[start:end]) for start, end in page_bands}:
+            counts[key] = counts.get(key, 0) + 1
+    needed = max(min_pages, math.ceil(min_share * len(pages)))
+    return {key for key, count in counts.items() if key and count >= needed}
+
+
+def strip_bands(text: str, bands: Iterable[Band], keys: Set[str]) -> str:
+    """Remove the band lines whose key is repeated boilerplate or a bare page number"""
+    parts = []
+    position = 0
+    for start, end in bands:
+        key = band_key(text[start:end])
+        if key in keys or _PAGE_NUMBER_RE.match(key):
+            parts.append(text[position:start])
+            position = end
+    if position == 0:
+        return text
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+def strip_boilerplate(pages: Sequence[str], bands: Sequence[Sequence[Band]]) -> List[str]:
+    """Page texts without running headers, footers and page numbers"""
+    if not bands:
+        return list(pages)
+    keys = repeated_band_keys(pages, bands)
+    return [strip_bands(text, page_bands, keys) for text, page_bands in zip(pages, bands)]
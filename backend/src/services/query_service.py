@@ -3,9 +3,19 @@ Utility class to get the queries for all the agents
 As the queries are very text heavy, I do not want to build them up in the agent or state service.
 """
 import json
-import fitz #pymupdf
 
 from ..agents.utils import create_text_query, create_docs_query
+from .data_processors.document_readers import DOCUMENT_READERS, iter_document_sections
+from .data_processors.text_preview import iter_text_chunks, text_preview
+from .pdf_extraction import iter_page_texts
+from .pdf_extraction_cache import get_pdf_extraction_cache
+
+# Size of the per-document preview shown to the info agent
+INFO_PREVIEW_LINES = 10
+INFO_PREVIEW_CHARS = 4000
+# Size of the preview that replaces a chunked TXT/CSV/JSON/DOCX upload in the planner query
+PLANNER_PREVIEW_LINES = 40
+PLANNER_PREVIEW_CHARS = 8000
 
 
 class QueryService:
@@ -73,17 +83,17 @@ User Answer: {users_answer}
             ext = doc.filename.lower().split('.')[-1] if '.' in doc.filename else ''
 
             try:
+                # Only the first lines are needed: read lazily and stop as soon as they are collected
                 if doc.filename.lower().endswith('.pdf'):
-                    pdf_doc = fitz.open(stream=doc.file_data, filetype="pdf")
-                    text = "".join(page.get_text() for page in pdf_doc)
-                    pdf_doc.close()
+                    cached = get_pdf_extraction_cache().peek(doc.file_data)
+                    chunks = cached.pages if cached else iter_page_texts(doc.file_data)
                 elif f'.{ext}' in text_extensions:
-                    text = doc.file_data.decode('utf-8', errors='ignore')
+                    chunks = iter_text_chunks(doc.file_data)
                 else:
                     continue  # Skip non-text files
 
-                lines = text.strip().splitlines()[:10]
-                doc_data.append(f"{doc.filename}:\n" + "\n".join(lines))
+                preview = text_preview(chunks, INFO_PREVIEW_LINES, INFO_PREVIEW_CHARS)
+                doc_data.append(f"{doc.filename}:\n" + preview)
 
             except Exception as e:
                 print(f"Error processing {doc.filename}: {e}")
@@ -114,4 +124,24 @@ User Answer: {users_answer}
             Question (System): What difficulty do you want to learn?
             Answer (User): {request.difficulty}
         """
-        return create_docs_query(planner_query, docs, images)
+        # Text-like uploads are chunked into the vector store and retrieved per chapter;
+        # the planner only sees their beginning instead of the whole file
+        inline_docs = []
+        for doc in docs:
+            if doc.content_type not in DOCUMENT_READERS:
+                inline_docs.append(doc)
+                continue
+            try:
+                preview = text_preview(
+                    iter_document_sections(doc.content_type, doc.file_data),
+                    PLANNER_PREVIEW_LINES,
+                    PLANNER_PREVIEW_CHARS,
+                )
+            except Exception as e:
+                print(f"Error processing {doc.filename}: {e}")
+                continue
+            planner_query += f"""
+            Uploaded document {doc.filename} (beginning, the full content is retrieved for each chapter):
+            {preview}
+            """
+        return create_docs_query(planner_query, inline_docs, images)
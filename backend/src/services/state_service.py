@@ -6,14 +6,27 @@ By default, adk adds the conversation history to each agent call. As the convers
 for course creation can get very very long, we instantiate a new session for each agent request. However,
 this creates the problem that agent a does not know what agent b does. That is why we use a state manager.
 In addition, this class probides all the polished queries to the agents
+
+States are kept as immutable snapshots: get_state hands out the same read-only mapping until the
+state changes, instead of copying all chapters for every agent call. At most STATE_MAX_COURSES
+states are kept (least recently used first out), and a course's state is evicted once it is
+finished. With STATE_BACKEND=database, states are stored in the course_states table, so every
+worker sees the same state.
 """
 import json
-from collections import defaultdict
-from typing import Dict, List, Any, Optional
+from collections import OrderedDict
+from logging import getLogger
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
 from pydantic import BaseModel
+from sqlalchemy.exc import SQLAlchemyError
 
 from ..agents.utils import create_text_query, create_docs_query
+from ..config import settings
+from ..db.crud import course_states_crud, courses_crud
+from ..db.database import get_db_context
+
+logger = getLogger(__name__)
 
 
 class CourseState(BaseModel):
@@ -27,34 +40,120 @@ class CourseState(BaseModel):
     difficulty: str ="Intermediate"
 
 
-class StateService:
-    def __init__(self):
-        # The state is a hashmap that maps from the user id to another hashmap that maps from a course id to the state of the course.
-        self.state: Dict[str, Dict[int, CourseState]] = defaultdict(dict)
+class FrozenDict(dict):
+    """
+    Read-only dict of a state snapshot. It stays a dict for json.dumps and ADK's session
+    validation; deep copies (ADK copies every new session) are ordinary, mutable dicts.
+    """
 
-    def save_chapters(self, user_id: str, course_id: int, chapters: List[Dict[str, Any]]) -> None:
-        """
-        Save newly created chapters to state for agents to use
-        """
-        self.state[user_id][course_id].chapters.extend(chapters)
-        for idx, chapter in enumerate(chapters):
-            chapter_str = \
-            f"""
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("course state snapshots are read-only, use StateService to change them")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = __ior__ = _readonly
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return dict, (thaw(self),)
+
+
+class FrozenList(tuple):
+    """Read-only list of a state snapshot; deep copies are ordinary lists"""
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+def freeze(value: Any) -> Any:
+    """Immutable copy of a JSON-like value (dicts -> FrozenDict, lists -> FrozenList)"""
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Mutable copy of a frozen value"""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+def format_chapter(chapter: Mapping[str, Any]) -> str:
+    return \
+    f"""
             \n
             Caption: {chapter['caption']}
             Content Summary: \n{json.dumps(chapter['content'], indent=2)}
             """
-            self.state[user_id][course_id].chapters_str += chapter_str
 
-    def get_state(self, user_id: str, course_id: int) -> dict[str, Any]:
-        print(f"Getting state for user {user_id} and course {course_id}")
-        try:
-            return self.state[user_id][course_id].model_dump()
-        except KeyError:
-            return CourseState().model_dump()
+
+class _Entry:
+    __slots__ = ("snapshot", "version", "size")
+
+    def __init__(self, snapshot: FrozenDict, version: int, size: int):
+        self.snapshot = snapshot
+        self.version = version  # of the stored state, 0 if none is stored
+        self.size = size        # approximate bytes (JSON length) for the metrics
+
+
+_DEFAULT_STATE = freeze(CourseState().model_dump())
+
+
+class StateService:
+    def __init__(self, backend: str = settings.STATE_BACKEND, max_courses: int = settings.STATE_MAX_COURSES):
+        # Maps from (user id, course id) to the state snapshot of the course, least recently used first
+        self.backend = backend
+        self.max_courses = max(1, max_courses)
+        self._entries: "OrderedDict[Tuple[str, int], _Entry]" = OrderedDict()
+        self._counters = {"hits": 0, "misses": 0, "loads": 0, "writes": 0, "evictions": 0, "finished": 0}
+
+    @property
+    def shared(self) -> bool:
+        return self.backend == "database"
+
+    def save_chapters(self, user_id: str, course_id: int, chapters: List[Dict[str, Any]]) -> None:
+        """
+        Save newly created chapters to state for agents to use
+        """
+        current = self.get_state(user_id, course_id)
+        new_chapters = freeze(chapters)
+        self._put(user_id, course_id, {
+            **current,
+            "chapters": FrozenList(current["chapters"] + new_chapters),
+            "chapters_str": current["chapters_str"] + "".join(format_chapter(chapter) for chapter in new_chapters),
+        })
+
+    def get_state(self, user_id: str, course_id: int) -> Mapping[str, Any]:
+        """
+        Read-only snapshot of the course state (not copied; pass it to the agents as is).
+        Without a stored state, the query, language and difficulty come from the courses table.
+        """
+        key = (user_id, course_id)
+        entry = self._entries.get(key)
+        if entry is not None and self.shared:
+            entry = self._refresh(key, entry)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry.snapshot
+
+        self._counters["misses"] += 1
+        entry = self._load(user_id, course_id)
+        if entry is None:
+            return _DEFAULT_STATE
+        self._remember(key, entry)
+        return entry.snapshot
 
     def create_state(self, user_id: str, course_id: int, state: CourseState):
-        self.state[user_id][course_id] = state
+        self._put(user_id, course_id, state.model_dump())
 
     def update_state(self, user_id: str, course_id: int, **updates) -> None:
         """
@@ -65,20 +164,81 @@ class StateService:
             course_id: The course identifier
             **updates: Keyword arguments for the fields to update
         """
-        # Check if user exists, if not create empty dict
-        if user_id not in self.state:
-            self.state[user_id] = {}
-
-        # Check if course exists for user, if not create default CourseState
-        if course_id not in self.state[user_id]:
-            self.state[user_id][course_id] = CourseState()
-
-        # Get current state as dict
-        current_state_dict = self.state[user_id][course_id].model_dump()
-
-        # Update with new values
-        current_state_dict.update(updates)
-
-        # Create new CourseState with validation
-        self.state[user_id][course_id] = CourseState(**current_state_dict)
-
+        # Validate the updated state as a whole, unchanged fields are kept as they are
+        current = self.get_state(user_id, course_id)
+        validated = CourseState(**{**current, **updates}).model_dump(include=set(updates))
+        self._put(user_id, course_id, {**current, **validated})
+
+    def evict(self, user_id: str, course_id: int) -> None:
+        """Drop the state of a finished (or failed) course; later reads fall back to the courses table"""
+        self._entries.pop((user_id, course_id), None)
+        self._counters["finished"] += 1
+        if self.shared:
+            try:
+                with get_db_context() as db:
+                    course_states_crud.delete_course_state(db, course_id)
+            except SQLAlchemyError as e:
+                logger.error("Failed to delete the state of course %s: %s", course_id, e)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "courses": len(self._entries),
+            "max_courses": self.max_courses,
+            "approx_bytes": sum(entry.size for entry in self._entries.values()),
+            **self._counters,
+        }
+
+    def _put(self, user_id: str, course_id: int, state: Mapping[str, Any]) -> None:
+        snapshot = freeze(state)
+        data = json.dumps(snapshot)
+        version = 0
+        if self.shared:
+            with get_db_context() as db:
+                version = course_states_crud.save_course_state(db, user_id, course_id, data)
+        self._counters["writes"] += 1
+        self._remember((user_id, course_id), _Entry(snapshot, version, len(data)))
+
+    def _remember(self, key: Tuple[str, int], entry: _Entry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_courses:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _refresh(self, key: Tuple[str, int], entry: _Entry) -> Optional[_Entry]:
+        """Reload a shared state another worker has changed since it was cached"""
+        try:
+            with get_db_context() as db:
+                version = course_states_crud.get_course_state_version(db, key[1])
+        except SQLAlchemyError as e:
+            logger.error("Failed to check the state of course %s: %s", key[1], e)
+            return entry
+        if (version or 0) == entry.version:
+            return entry
+        self._entries.pop(key, None)
+        return None
+
+    def _load(self, user_id: str, course_id: int) -> Optional[_Entry]:
+        try:
+            with get_db_context() as db:
+                if self.shared:
+                    stored = course_states_crud.get_course_state(db, course_id)
+                    if stored:
+                        self._counters["loads"] += 1
+                        version, data = stored
+                        return _Entry(freeze(json.loads(data)), version, len(data))
+                course = courses_crud.get_course_by_id(db, course_id)
+                if course is None:
+                    return None
+                base = CourseState(
+                    query=course.query,
+                    time_hours=course.total_time_hours,
+                    language=course.language,
+                    difficulty=course.difficulty,
+                ).model_dump()
+        except SQLAlchemyError as e:
+            logger.error("Failed to load the state of course %s: %s", course_id, e)
+            return None
+        self._counters["loads"] += 1
+        return _Entry(freeze(base), 0, len(json.dumps(base)))
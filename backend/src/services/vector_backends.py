@@ -0,0 +1,706 @@
+"""
+Storage backends for the VectorService.
+
+The VectorService only embeds text; storing and searching vectors is delegated to a
+backend selected with settings.VECTOR_BACKEND:
+- "tidb":        the shared vector_embeddings table in TiDB Cloud, scoped by course_id (production)
+- "tidb_tables": legacy per-collection tables (vector_collection_course_{id}); kept so
+                 existing deployments keep working until migrate_to_tidb.py backfill has run
+- "numpy":       in-process matrices of normalized vectors (float32, or float16/int8 codes, see
+                 settings.VECTOR_QUANTIZATION), optionally persisted to and memory-mapped from
+                 disk. Needs no database, which makes it the reference backend for tests and
+                 benchmarks and a fast option for small deployments.
+
+Collections are addressed by name, e.g. "course_42".
+
+Metadata filters use the same Mongo-style syntax as tidb_vector, e.g.
+    {"document_id": 3}
+    {"document_id": 3, "page_number": {"$gte": 10, "$lte": 20}}
+    {"$or": [{"document_id": 3}, {"document_id": {"$in": [4, 5]}}]}
+Supported operators: $eq, $ne, $gt, $gte, $lt, $lte, $in, $nin, $and, $or.
+Keys are plain identifiers (letters, digits, underscores).
+"""
+import json
+import operator
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import and_, delete, func, or_, select
+
+from ..config import settings
+from . import vector_quantization
+
+logger = getLogger(__name__)
+
+
+@dataclass
+class QueryResult:
+    """Same shape as tidb_vector's QueryResult, so callers do not depend on the backend"""
+    id: str
+    document: str
+    metadata: dict
+    distance: float
+
+
+_COMPARISONS = {
+    "$eq": operator.eq,
+    "$ne": operator.ne,
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+    "$lt": operator.lt,
+    "$lte": operator.le,
+    "$in": lambda value, options: value in options,
+    "$nin": lambda value, options: value not in options,
+}
+
+
+def matches_filter(metadata: dict, filter_metadata: Optional[Dict]) -> bool:
+    """Evaluate a metadata filter in Python (numpy backend and post-filtering)"""
+    if not filter_metadata:
+        return True
+    for key, condition in filter_metadata.items():
+        if key.lower() == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif key.lower() == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, operand in condition.items():
+                compare = _COMPARISONS.get(op.lower())
+                if compare is None:
+                    raise ValueError(f"Unsupported filter operator: {op}")
+                try:
+                    if not compare(value, operand):
+                        return False
+                except TypeError:  # e.g. None > 3 for a missing key
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+_SQL_COMPARISONS = {
+    "$eq": lambda column, value: column == value,
+    "$ne": lambda column, value: column != value,
+    "$gt": lambda column, value: column > value,
+    "$gte": lambda column, value: column >= value,
+    "$lt": lambda column, value: column < value,
+    "$lte": lambda column, value: column <= value,
+    "$in": lambda column, values: column.in_(values),
+    "$nin": lambda column, values: column.not_in(values),
+}
+
+# Keys become part of a JSON path; anything else could address other members ("a.b", "a[0]", "*")
+_METADATA_KEY_RE = re.compile(r"\w+", re.ASCII)
+
+
+def _checked_key(key: str) -> str:
+    if not _METADATA_KEY_RE.fullmatch(key):
+        raise ValueError(f"Unsupported metadata key: {key!r}")
+    return key
+
+
+def to_sql_filter(meta_column, filter_metadata: Dict):
+    """Translate a metadata filter into a SQL expression over a JSON column"""
+    clauses = []
+    for key, condition in filter_metadata.items():
+        if key.lower() == "$and":
+            clauses.append(and_(*[to_sql_filter(meta_column, sub) for sub in condition]))
+        elif key.lower() == "$or":
+            clauses.append(or_(*[to_sql_filter(meta_column, sub) for sub in condition]))
+        else:
+            value = func.json_extract(meta_column, f"$.{_checked_key(key)}")
+            if isinstance(condition, dict):
+                for op, operand in condition.items():
+                    compare = _SQL_COMPARISONS.get(op.lower())
+                    if compare is None:
+                        raise ValueError(f"Unsupported filter operator: {op}")
+                    clauses.append(compare(value, operand))
+            else:
+                clauses.append(value == condition)
+    return and_(*clauses)
+
+
+def to_tidb_filter(filter_metadata: Dict) -> Dict:
+    """
+    tidb_vector only evaluates the first operator of a {key: {op: value}} condition,
+    so conditions with several operators (ranges) are split into an $and list.
+    Keys are checked as in to_sql_filter, tidb_vector puts them into its JSON path as is.
+    """
+    clauses = []
+    for key, condition in filter_metadata.items():
+        if key.lower() in ("$and", "$or"):
+            clauses.append({key: [to_tidb_filter(sub) for sub in condition]})
+        elif isinstance(condition, dict):
+            _checked_key(key)
+            for op, operand in condition.items():
+                if op.lower() not in _COMPARISONS:
+                    raise ValueError(f"Unsupported filter operator: {op}")
+                clauses.append({key: {op: operand}})
+        else:
+            clauses.append({_checked_key(key): condition})
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+class VectorBackend(ABC):
+    """Interface every vector storage backend implements."""
+
+    @abstractmethod
+    def create_collection(self, collection: str) -> None:
+        """Create the collection if it does not exist yet"""
+
+    @abstractmethod
+    def insert(
+        self,
+        collection: str,
+        ids: List[str],
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[dict],
+    ) -> None:
+        """Insert all rows in one write"""
+
+    @abstractmethod
+    def query(
+        self,
+        collection: str,
+        embedding: List[float],
+        k: int,
+        filter_metadata: Optional[Dict] = None,
+    ) -> List[Any]:
+        """Return the k nearest rows (cosine distance, ascending) as QueryResult-like objects"""
+
+    @abstractmethod
+    def delete(self, collection: str, ids: List[str]) -> None:
+        """Delete rows by id"""
+
+    @abstractmethod
+    def get_collection(self, collection: str) -> Any:
+        """Return the backend specific handle of a collection"""
+
+    def flush(self, collection: Optional[str] = None) -> None:
+        """Persist pending writes; no-op for backends that write through"""
+
+
+class TiDBSharedVectorBackend(VectorBackend):
+    """
+    All collections in the shared vector_embeddings table, one row per content item.
+
+    A collection "course_{id}" maps to the rows with that course_id. Writes are upserts on
+    (course_id, content_id) and metadata filters are compiled into JSON predicates, so the
+    LIMIT always applies to matching rows. Course-scoped queries range-scan the course's
+    rows through the (course_id, content_id) key and rank them exactly; the HNSW index
+    created by migrate_to_tidb.py serves unscoped, cross-course ANN queries.
+    """
+
+    def __init__(self):
+        # Imported here so the numpy backend works without a configured database
+        from ..db.database import engine
+        from ..db.models.db_vector import VectorEmbedding
+        self.engine = engine
+        self.model = VectorEmbedding
+
+    @staticmethod
+    def course_id(collection: str) -> int:
+        prefix, _, course_id = collection.partition("_")
+        if prefix != "course" or not course_id.isdigit():
+            raise ValueError(f"Collection {collection!r} is not a course collection")
+        return int(course_id)
+
+    def get_collection(self, collection: str) -> Dict:
+        return {"table": self.model.__tablename__, "course_id": self.course_id(collection)}
+
+    def create_collection(self, collection: str) -> None:
+        # The table is shared, there is nothing to create per course
+        self.course_id(collection)
+
+    def insert(self, collection, ids, texts, embeddings, metadatas) -> None:
+        if not ids:
+            return
+        from sqlalchemy.dialects.mysql import insert
+
+        course_id = self.course_id(collection)
+        rows = [
+            {
+                "course_id": course_id,
+                "chapter_id": (metadata or {}).get("chapter_id"),
+                "content_id": id_,
+                "content_type": (metadata or {}).get("type", "document"),
+                "text_content": text,
+                "embedding_vector": embedding,
+                "embedding_metadata": metadata or {},
+            }
+            for id_, text, embedding, metadata in zip(ids, texts, embeddings, metadatas)
+        ]
+        stmt = insert(self.model.__table__).values(rows)
+        # Re-inserting a content id replaces the row, like the other backends
+        stmt = stmt.on_duplicate_key_update(
+            chapter_id=stmt.inserted.chapter_id,
+            content_type=stmt.inserted.content_type,
+            text_content=stmt.inserted.text_content,
+            embedding_vector=stmt.inserted.embedding_vector,
+            embedding_metadata=stmt.inserted.embedding_metadata,
+        )
+        with self.engine.begin() as conn:
+            conn.execute(stmt)
+
+    def build_query(self, collection, embedding, k, filter_metadata=None):
+        model = self.model
+        distance = model.embedding_vector.cosine_distance(embedding)
+        stmt = (
+            select(model.content_id, model.text_content, model.embedding_metadata, distance)
+            .where(model.course_id == self.course_id(collection))
+            .order_by(distance)
+            .limit(k)
+        )
+        if filter_metadata:
+            stmt = stmt.where(to_sql_filter(model.embedding_metadata, filter_metadata))
+        return stmt
+
+    def query(self, collection, embedding, k, filter_metadata=None) -> List[QueryResult]:
+        if k <= 0:
+            return []
+        stmt = self.build_query(collection, embedding, k, filter_metadata)
+        with self.engine.connect() as conn:
+            rows = conn.execute(stmt).all()
+        return [
+            QueryResult(
+                id=content_id,
+                document=text_content,
+                metadata=metadata or {},
+                distance=float(distance),
+            )
+            for content_id, text_content, metadata, distance in rows
+        ]
+
+    def delete(self, collection, ids) -> None:
+        if not ids:
+            return
+        stmt = delete(self.model).where(
+            self.model.course_id == self.course_id(collection),
+            self.model.content_id.in_(ids),
+        )
+        with self.engine.begin() as conn:
+            conn.execute(stmt)
+
+    def drop_collection(self, collection: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(delete(self.model).where(self.model.course_id == self.course_id(collection)))
+
+
+class TiDBVectorBackend(VectorBackend):
+    """One TiDB table per collection, clients are shared through the vector client registry."""
+
+    def __init__(self):
+        # Imported here so the numpy backend works without the TiDB driver installed
+        from .vector_client_registry import vector_client_registry
+        self.registry = vector_client_registry
+
+    @staticmethod
+    def table_name(collection: str) -> str:
+        return f"vector_collection_{collection}"
+
+    def get_collection(self, collection: str):
+        return self.registry.get_client(self.table_name(collection))
+
+    def create_collection(self, collection: str) -> None:
+        # Creating the (cached) client for this collection creates the table
+        self.get_collection(collection)
+
+    def insert(self, collection, ids, texts, embeddings, metadatas) -> None:
+        from sqlalchemy import insert
+
+        client = self.get_collection(collection)
+        rows = [
+            {"id": id_, "embedding": embedding, "document": text, "meta": metadata or {}}
+            for id_, text, embedding, metadata in zip(ids, texts, embeddings, metadatas)
+        ]
+        # One multi-row INSERT instead of one statement per row
+        with client._bind.begin() as conn:
+            conn.execute(insert(client._table_model).values(rows))
+
+    def query(self, collection, embedding, k, filter_metadata=None):
+        client = self.get_collection(collection)
+        if not filter_metadata:
+            return client.query(embedding, k=k)
+
+        if settings.VECTOR_FILTER_PUSHDOWN:
+            # Filter inside the query (JSON path predicates on the meta column), so the
+            # LIMIT applies to matching rows only and selective filters stay exact
+            try:
+                return client.query(embedding, k=k, filter=to_tidb_filter(filter_metadata))
+            except Exception as e:
+                logger.warning("Filter pushdown failed for %s, falling back to over-fetch: %s", collection, e)
+
+        return self._query_overfetch(client, embedding, k, filter_metadata)
+
+    @staticmethod
+    def _query_overfetch(client, embedding, k, filter_metadata):
+        """Fetch more than k rows and post-filter, widening the fetch until k rows match"""
+        fetch = max(k, k * settings.VECTOR_FILTER_OVERFETCH)
+        while True:
+            results = client.query(embedding, k=fetch)
+            matches = [result for result in results if matches_filter(result.metadata, filter_metadata)]
+            exhausted = len(results) < fetch  # the whole collection was scanned
+            if len(matches) >= k or exhausted or fetch >= settings.VECTOR_FILTER_MAX_FETCH:
+                return matches[:k]
+            fetch = min(fetch * 4, settings.VECTOR_FILTER_MAX_FETCH)
+
+    def delete(self, collection, ids) -> None:
+        self.get_collection(collection).delete(ids=ids)
+
+
+class _LocalCollection:
+    """
+    Rows of one collection; the arrays are over-allocated so inserts are amortized O(1).
+
+    `matrix` holds the (possibly quantized) codes that are scanned for every query,
+    `scales` the per-row int8 scales and `full` the exact float32 vectors used to rescore
+    candidates when the codes are quantized.
+    """
+
+    def __init__(self, dimension: int, mode: str = "none", rescore: bool = False):
+        self.mode = mode
+        self.matrix = np.zeros((0, dimension), dtype=vector_quantization.code_dtype(mode))
+        self.scales = np.zeros(0, dtype=np.float32) if mode == "int8" else None
+        self.full = np.zeros((0, dimension), dtype=np.float32) if mode != "none" and rescore else None
+        self.size = 0
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[dict] = []
+        self.positions: Dict[str, int] = {}
+        self.dirty = False
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {"matrix": self.matrix}
+        if self.scales is not None:
+            arrays["scales"] = self.scales
+        if self.full is not None:
+            arrays["full"] = self.full
+        return arrays
+
+    def ensure_capacity(self, extra: int) -> None:
+        needed = self.size + extra
+        if needed <= self.matrix.shape[0] and all(
+            array.flags.writeable and array.shape[0] >= needed for array in self.arrays().values()
+        ):
+            return
+        capacity = max(needed, 2 * self.matrix.shape[0], 64)
+        for name, array in self.arrays().items():
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[: self.size] = array[: self.size]
+            setattr(self, name, grown)
+
+    def nbytes(self) -> Dict[str, int]:
+        """Bytes used by the vectors of this collection, per array"""
+        return {name: int(array[: self.size].nbytes) for name, array in self.arrays().items()}
+
+
+class NumpyVectorBackend(VectorBackend):
+    """
+    In-process cosine search over normalized vectors.
+
+    Vectors are L2-normalized on insert, so a query is a single matrix-vector product
+    followed by argpartition for the top k. With a storage path, collections are saved as
+    <name>.npy (vectors) and <name>.json (ids, documents, metadata) and lazily reloaded;
+    with mmap enabled the vectors are memory-mapped until the collection is written again.
+
+    With quantization ("float16" or "int8", see vector_quantization) only the compact codes
+    are scanned. If rescoring is enabled the exact float32 vectors are kept as well, in
+    <name>.full.npy, and the best k * rescore_factor candidates are re-ranked against them;
+    once flushed they are memory-mapped, so only the rescored rows are paged in. The copy
+    outweighs the savings (int8 plus float32 is about 1.25x plain float32 storage), which is
+    why rescoring is off by default: enable it for recall, not for size.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = settings.VECTOR_LOCAL_PATH,
+        mmap: bool = settings.VECTOR_LOCAL_MMAP,
+        dimension: int = 768,
+        quantization: str = settings.VECTOR_QUANTIZATION,
+        rescore: bool = settings.VECTOR_RESCORE,
+        rescore_factor: int = settings.VECTOR_RESCORE_FACTOR,
+    ):
+        if quantization not in vector_quantization.QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode: {quantization}")
+        self.path = path or None
+        self.mmap = mmap
+        self.dimension = dimension
+        self.quantization = quantization
+        self.rescore = rescore
+        self.rescore_factor = max(1, rescore_factor)
+        self._collections: Dict[str, _LocalCollection] = {}
+        self._lock = threading.RLock()
+        if self.path:
+            os.makedirs(self.path, exist_ok=True)
+
+    def _new_collection(self, dimension: Optional[int] = None) -> _LocalCollection:
+        return _LocalCollection(dimension or self.dimension, self.quantization, self.rescore)
+
+    # ----- persistence -----
+
+    def _files(self, collection: str):
+        base = os.path.join(self.path, collection)
+        return f"{base}.npy", f"{base}.json"
+
+    def _array_file(self, collection: str, name: str) -> str:
+        matrix_file, _ = self._files(collection)
+        return matrix_file if name == "matrix" else f"{matrix_file[:-4]}.{name}.npy"
+
+    def _load(self, collection: str) -> Optional[_LocalCollection]:
+        if not self.path:
+            return None
+        matrix_file, rows_file = self._files(collection)
+        if not (os.path.exists(matrix_file) and os.path.exists(rows_file)):
+            return None
+        with open(rows_file, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+        mmap_mode = "r" if self.mmap else None
+        stored_mode = rows.get("quantization", "none")
+        arrays = {}
+        for name in rows.get("arrays", ["matrix"]):
+            arrays[name] = np.load(self._array_file(collection, name), mmap_mode=mmap_mode)
+
+        local = self._new_collection(arrays["matrix"].shape[1])
+        if stored_mode == self.quantization and set(arrays) == set(local.arrays()):
+            for name, array in arrays.items():
+                setattr(local, name, array)
+        else:
+            # Stored with other settings: re-encode from the most precise copy available
+            if "full" in arrays:
+                vectors = np.asarray(arrays["full"], dtype=np.float32)
+            else:
+                vectors = vector_quantization.dequantize(arrays["matrix"], arrays.get("scales"))
+            local.ensure_capacity(len(vectors))
+            self._write_rows(local, 0, vectors)
+            local.dirty = True
+        local.size = len(rows["ids"])
+        local.ids = rows["ids"]
+        local.documents = rows["documents"]
+        local.metadatas = rows["metadatas"]
+        local.positions = {id_: i for i, id_ in enumerate(local.ids)}
+        return local
+
+    def _save(self, collection: str, local: _LocalCollection) -> None:
+        matrix_file, rows_file = self._files(collection)
+        arrays = local.arrays()
+        # Write to temp files first so a crash never leaves a half-written collection
+        for name, array in arrays.items():
+            with open(self._array_file(collection, name) + ".tmp", "wb") as f:
+                np.save(f, np.ascontiguousarray(array[: local.size]))
+        with open(rows_file + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "ids": local.ids,
+                    "documents": local.documents,
+                    "metadatas": local.metadatas,
+                    "quantization": local.mode,
+                    "arrays": list(arrays),
+                },
+                f,
+            )
+        for name in arrays:
+            array_file = self._array_file(collection, name)
+            os.replace(array_file + ".tmp", array_file)
+        os.replace(rows_file + ".tmp", rows_file)
+        local.dirty = False
+        if local.full is not None and self.mmap:
+            # The exact vectors are only read for rescored rows; serve them from the page cache
+            local.full = np.load(self._array_file(collection, "full"), mmap_mode="r")
+
+    def _get(self, collection: str, create: bool = True) -> Optional[_LocalCollection]:
+        with self._lock:
+            local = self._collections.get(collection)
+            if local is None:
+                local = self._load(collection)
+                if local is None and create:
+                    local = self._new_collection()
+                if local is not None:
+                    self._collections[collection] = local
+            return local
+
+    def flush(self, collection: Optional[str] = None) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            names = [collection] if collection else list(self._collections)
+            for name in names:
+                local = self._collections.get(name)
+                if local is not None and local.dirty:
+                    self._save(name, local)
+
+    def drop_collection(self, collection: str) -> None:
+        with self._lock:
+            self._collections.pop(collection, None)
+            if self.path:
+                _, rows_file = self._files(collection)
+                files = [rows_file] + [
+                    self._array_file(collection, name) for name in ("matrix", "scales", "full")
+                ]
+                for file in files:
+                    if os.path.exists(file):
+                        os.remove(file)
+
+    def memory_stats(self, collection: str) -> Dict[str, int]:
+        """Bytes of vector data per array; `full` is memory-mapped once the collection is flushed"""
+        with self._lock:
+            local = self._get(collection, create=False)
+            return local.nbytes() if local is not None else {}
+
+    # ----- VectorBackend -----
+
+    def get_collection(self, collection: str) -> _LocalCollection:
+        return self._get(collection)
+
+    def create_collection(self, collection: str) -> None:
+        self._get(collection)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    @staticmethod
+    def _write_rows(local: _LocalCollection, start: int, vectors: np.ndarray) -> None:
+        """Encode normalized vectors into rows [start, start + len) of every array"""
+        codes, scales = vector_quantization.quantize(vectors, local.mode)
+        end = start + len(vectors)
+        local.matrix[start:end] = codes
+        if local.scales is not None:
+            local.scales[start:end] = scales
+        if local.full is not None:
+            local.full[start:end] = vectors
+
+    def insert(self, collection, ids, texts, embeddings, metadatas) -> None:
+        if not ids:
+            return
+        vectors = self._normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1))
+        with self._lock:
+            local = self._get(collection)
+            if local.size == 0 and local.matrix.shape[1] != vectors.shape[1]:
+                local = self._collections[collection] = self._new_collection(vectors.shape[1])
+            # Re-inserting an id replaces the old row, like an upsert
+            existing = [id_ for id_ in ids if id_ in local.positions]
+            if existing:
+                self._delete_rows(local, existing)
+            local.ensure_capacity(len(ids))
+            self._write_rows(local, local.size, vectors)
+            for offset, (id_, text, metadata) in enumerate(zip(ids, texts, metadatas)):
+                local.positions[id_] = local.size + offset
+                local.ids.append(id_)
+                local.documents.append(text)
+                local.metadatas.append(metadata or {})
+            local.size += len(ids)
+            local.dirty = True
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        """Indexes of the k highest scores, best first"""
+        k = min(k, scores.shape[0])
+        if k < scores.shape[0]:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(scores.shape[0])
+        return top[np.argsort(-scores[top], kind="stable")]
+
+    def query(self, collection, embedding, k, filter_metadata=None) -> List[QueryResult]:
+        with self._lock:
+            local = self._get(collection, create=False)
+            if local is None or local.size == 0 or k <= 0:
+                return []
+            # Snapshot; inserts only write behind `size` and deletes replace the arrays
+            size = local.size
+            matrix = local.matrix[:size]
+            scales = local.scales[:size] if local.scales is not None else None
+            full = local.full[:size] if local.full is not None else None
+            ids, documents, metadatas = local.ids, local.documents, local.metadatas
+
+        query = self._normalize(np.asarray(embedding, dtype=np.float32).reshape(-1))
+        scores = vector_quantization.scores(matrix, scales, query)
+
+        if filter_metadata:
+            candidates = np.fromiter(
+                (matches_filter(metadata, filter_metadata) for metadata in metadatas),
+                dtype=bool,
+                count=len(metadatas),
+            ).nonzero()[0]
+            if candidates.size == 0:
+                return []
+            scores = scores[candidates]
+        else:
+            candidates = np.arange(size)
+
+        if full is not None:
+            # Approximate short list from the codes, exact order from the float vectors
+            shortlist = self._top(scores, k * self.rescore_factor)
+            rows = np.sort(candidates[shortlist])  # ascending rows read the mmap sequentially
+            exact = full[rows] @ query
+            order = self._top(exact, k)
+            rows, top_scores = rows[order], exact[order]
+        else:
+            top = self._top(scores, k)
+            rows, top_scores = candidates[top], scores[top]
+
+        return [
+            QueryResult(
+                id=ids[row],
+                document=documents[row],
+                metadata=metadatas[row],
+                distance=float(1.0 - score),
+            )
+            for row, score in zip(rows.tolist(), top_scores.tolist())
+        ]
+
+    @staticmethod
+    def _delete_rows(local: _LocalCollection, ids: List[str]) -> None:
+        rows = sorted({local.positions[id_] for id_ in ids if id_ in local.positions})
+        if not rows:
+            return
+        keep = np.ones(local.size, dtype=bool)
+        keep[rows] = False
+        # New arrays instead of in-place compaction, concurrent queries keep their snapshot
+        for name, array in local.arrays().items():
+            setattr(local, name, array[: local.size][keep])
+        local.ids = [id_ for id_, kept in zip(local.ids, keep) if kept]
+        local.documents = [doc for doc, kept in zip(local.documents, keep) if kept]
+        local.metadatas = [meta for meta, kept in zip(local.metadatas, keep) if kept]
+        local.size = len(local.ids)
+        local.positions = {id_: i for i, id_ in enumerate(local.ids)}
+        local.dirty = True
+
+    def delete(self, collection, ids) -> None:
+        with self._lock:
+            local = self._get(collection, create=False)
+            if local is not None:
+                self._delete_rows(local, ids)
+
+
+_backend: Optional[VectorBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_vector_backend() -> VectorBackend:
+    """Return the process-wide backend configured in settings.VECTOR_BACKEND"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if settings.VECTOR_BACKEND == "numpy":
+                _backend = NumpyVectorBackend()
+            elif settings.VECTOR_BACKEND == "tidb":
+                _backend = TiDBSharedVectorBackend()
+            elif settings.VECTOR_BACKEND == "tidb_tables":
+                _backend = TiDBVectorBackend()
+            else:
+                raise ValueError(f"Unknown VECTOR_BACKEND: {settings.VECTOR_BACKEND}")
+            logger.info("Using %s vector backend", settings.VECTOR_BACKEND)
+        return _backend
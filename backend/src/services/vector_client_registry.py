@@ -0,0 +1,172 @@
+"""
+Process-wide registry for TiDB vector clients.
+
+Creating a TiDBVectorClient builds a new engine with its own connection pool and
+checks the table definition, so it must not happen per paragraph or per query.
+The registry creates one client per collection table, hands the same instance to
+every caller and disposes the pools of clients that are idle or pushed out by the
+LRU size cap.
+"""
+import threading
+import time
+from collections import OrderedDict
+from logging import getLogger
+from typing import Dict, List, Optional
+
+from tidb_vector.integrations import TiDBVectorClient
+
+from ..config import settings
+
+logger = getLogger(__name__)
+
+
+class _RegistryEntry:
+    __slots__ = ("client", "last_used")
+
+    def __init__(self, client: TiDBVectorClient, last_used: float):
+        self.client = client
+        self.last_used = last_used
+
+
+class VectorClientRegistry:
+    """Thread-safe LRU cache of TiDBVectorClient instances keyed by table name."""
+
+    def __init__(
+        self,
+        max_clients: int = settings.VECTOR_CLIENT_CACHE_SIZE,
+        idle_seconds: int = settings.VECTOR_CLIENT_IDLE_SECONDS,
+        vector_dimension: int = 768,
+    ):
+        self.max_clients = max(1, max_clients)
+        self.idle_seconds = idle_seconds
+        self.vector_dimension = vector_dimension
+        self._clients: "OrderedDict[str, _RegistryEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _create_client(self, table_name: str) -> TiDBVectorClient:
+        return TiDBVectorClient(
+            connection_string=settings.SQLALCHEMY_DATABASE_URL,
+            table_name=table_name,
+            vector_dimension=self.vector_dimension,
+            drop_existing_table=False,
+            engine_args={
+                "pool_recycle": settings.DB_POOL_RECYCLE,
+                "pool_pre_ping": settings.DB_POOL_PRE_PING,
+            },
+        )
+
+    @staticmethod
+    def _dispose(table_name: str, client: TiDBVectorClient) -> None:
+        try:
+            client._bind.dispose()
+        except Exception as e:
+            logger.warning("Failed to dispose vector client for %s: %s", table_name, e)
+
+    def _pop_idle(self, now: float) -> List[tuple]:
+        """Remove idle entries; must be called with the lock held."""
+        if self.idle_seconds <= 0:
+            return []
+        expired = []
+        # Entries are kept in LRU order, so the idle ones are at the front
+        while self._clients:
+            table_name, entry = next(iter(self._clients.items()))
+            if now - entry.last_used < self.idle_seconds:
+                break
+            self._clients.popitem(last=False)
+            expired.append((table_name, entry.client))
+        return expired
+
+    def _pop_overflow(self) -> List[tuple]:
+        """Remove least recently used entries above the size cap; lock must be held."""
+        overflow = []
+        while len(self._clients) > self.max_clients:
+            table_name, entry = self._clients.popitem(last=False)
+            overflow.append((table_name, entry.client))
+        return overflow
+
+    def _dispose_all(self, removed: List[tuple]) -> None:
+        for table_name, client in removed:
+            logger.info("Evicting vector client for table %s", table_name)
+            self._dispose(table_name, client)
+
+    def get_client(self, table_name: str) -> TiDBVectorClient:
+        """Return the cached client for a table, creating it on first use."""
+        now = time.monotonic()
+        with self._lock:
+            removed = self._pop_idle(now)
+            self.evictions += len(removed)
+            entry = self._clients.get(table_name)
+            if entry is not None:
+                self._clients.move_to_end(table_name)
+                entry.last_used = now
+                self.hits += 1
+        self._dispose_all(removed)
+        if entry is not None:
+            return entry.client
+
+        # Build the client outside the lock, it talks to the database
+        client = self._create_client(table_name)
+
+        with self._lock:
+            existing = self._clients.get(table_name)
+            if existing is not None:
+                # Another thread created the same client in the meantime
+                self._clients.move_to_end(table_name)
+                existing.last_used = time.monotonic()
+                self.hits += 1
+                removed = [(table_name, client)]
+                client = existing.client
+            else:
+                self.misses += 1
+                self._clients[table_name] = _RegistryEntry(client, time.monotonic())
+                removed = self._pop_overflow()
+                self.evictions += len(removed)
+        self._dispose_all(removed)
+        return client
+
+    def evict(self, table_name: str) -> bool:
+        """Drop a single client from the registry and dispose its pool."""
+        with self._lock:
+            entry = self._clients.pop(table_name, None)
+            if entry is not None:
+                self.evictions += 1
+        if entry is None:
+            return False
+        self._dispose(table_name, entry.client)
+        return True
+
+    def evict_idle(self) -> int:
+        """Dispose all clients that were not used within the idle timeout."""
+        with self._lock:
+            removed = self._pop_idle(time.monotonic())
+            self.evictions += len(removed)
+        self._dispose_all(removed)
+        return len(removed)
+
+    def clear(self) -> None:
+        """Dispose every cached client, e.g. on application shutdown."""
+        with self._lock:
+            removed = [(name, entry.client) for name, entry in self._clients.items()]
+            self._clients.clear()
+        self._dispose_all(removed)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Return registry size and hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._clients),
+                "max_size": self.max_clients,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
+
+
+vector_client_registry = VectorClientRegistry()
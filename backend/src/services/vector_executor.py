@@ -0,0 +1,91 @@
+"""
+Dedicated, bounded thread pool for blocking vector store work.
+
+Embedding requests and database queries are blocking calls. Running them directly inside
+the course creation coroutines stalls every chapter, chat stream and WebSocket on the same
+event loop, and asyncio's default executor is shared with everything else. The vector
+executor gives those calls their own pool whose size is the concurrency ceiling, and keeps
+queue depth and wait time metrics.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from ..config import settings
+
+
+class VectorExecutor:
+    """Runs blocking callables on a fixed-size thread pool and awaits them from async code."""
+
+    def __init__(self, max_workers: int = settings.VECTOR_EXECUTOR_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="vector"
+        )
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the pool without blocking the event loop"""
+        submitted = time.monotonic()
+        with self._lock:
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queued)
+
+        def call():
+            started = time.monotonic()
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self.total_wait_seconds += started - submitted
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self.failed += 1
+                raise
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self.total_run_seconds += time.monotonic() - started
+
+        def on_done(future: Future):
+            # A task cancelled while still waiting in the queue never ran `call`
+            if future.cancelled():
+                with self._lock:
+                    self.queued -= 1
+
+        future = self._executor.submit(call)
+        future.add_done_callback(on_done)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, float]:
+        """Return queue depth, in-flight count and wait/run times"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "max_queue_depth": self.max_queue_depth,
+                "avg_wait_ms": 1000 * self.total_wait_seconds / self.completed if self.completed else 0.0,
+                "avg_run_ms": 1000 * self.total_run_seconds / self.completed if self.completed else 0.0,
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+vector_executor = VectorExecutor()
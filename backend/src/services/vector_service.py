@@ -1,11 +1,17 @@
+import asyncio
 import os
-from typing import List, Dict, Optional
+import sqlite3
+from typing import List, Dict, Optional, Union
 from sqlalchemy.orm import Session
 from sqlalchemy import create_engine, text
 import google.generativeai as genai
-from tidb_vector.integrations import TiDBVectorClient
 from ..config import settings
 from ..db.database import get_db_context
+from .embedding_cache import get_embedding_cache, normalize_text
+from .fake_llm import active_fake_backend
+from .vector_backends import get_vector_backend
+from .vector_client_registry import vector_client_registry
+from .vector_executor import vector_executor
 
 
 class VectorService:
@@ -13,88 +19,176 @@ class VectorService:
         # Configure Google Gemini API for embeddings
         genai.configure(api_key=settings.GOOGLE_API_KEY)
 
-        # Initialize TiDB Vector Client
-        self.vector_client = TiDBVectorClient(
-            # Use the same DATABASE_URL as the main application
-            connection_string=settings.SQLALCHEMY_DATABASE_URL,
-            # Table name for storing embeddings - we'll use course-specific tables
-            table_name="vector_embeddings",
-            # Google's text-embedding model produces 768-dimensional vectors
-            vector_dimension=768,
-            # Don't drop existing table to preserve data
-            drop_existing_table=False,
-        )
+        # Storage backend (TiDB or in-process numpy), selected by settings.VECTOR_BACKEND
+        self.backend = get_vector_backend()
 
         # Embedding model configuration
         self.embedding_model_name = (
             "models/text-embedding-004"  # Latest Google embedding model
         )
+        self.embedding_task_type = "retrieval_document"
+
+        # Local content-addressed cache, consulted before calling the embedding API
+        self.embedding_cache = get_embedding_cache()
 
     def _generate_embedding(self, text: str) -> List[float]:
         """Generate embedding using Google Gemini API"""
+        return self._generate_embeddings([text])[0]
+
+    def _generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for several texts with a single batch request.
+        Texts already in the embedding cache are not sent to the API.
+        """
+        cached = [None] * len(texts)
+        if self.embedding_cache:
+            try:
+                cached = self.embedding_cache.get_many(
+                    self.embedding_model_name, self.embedding_task_type, texts
+                )
+            except sqlite3.Error as e:
+                # A locked or corrupt cache must not fail the ingestion, treat it as a miss
+                print(f"Error reading embedding cache: {e}")
+        missing = [i for i, embedding in enumerate(cached) if embedding is None]
+        if not missing:
+            return cached
+
+        # Identical paragraphs inside one batch are only embedded once
+        unique_texts: Dict[str, str] = {}
+        for i in missing:
+            unique_texts.setdefault(normalize_text(texts[i]), texts[i])
+        missing_texts = list(unique_texts.values())
+
         try:
-            result = genai.embed_content(
+            # The fake model backend (benchmarks, offline runs) also answers embeddings
+            fake_backend = active_fake_backend()
+            embed_content = fake_backend.embed_content if fake_backend else genai.embed_content
+            result = embed_content(
                 model=self.embedding_model_name,
-                content=text,
-                task_type="retrieval_document",  # Optimized for document retrieval
+                content=missing_texts if len(missing_texts) > 1 else missing_texts[0],
+                task_type=self.embedding_task_type,  # Optimized for document retrieval
             )
-            return result["embedding"]
+            embeddings = result["embedding"] if len(missing_texts) > 1 else [result["embedding"]]
         except Exception as e:
-            print(f"Error generating embedding: {e}")
+            print(f"Error generating embeddings: {e}")
             raise
 
+        if self.embedding_cache:
+            try:
+                self.embedding_cache.put_many(
+                    self.embedding_model_name, self.embedding_task_type, missing_texts, embeddings
+                )
+            except Exception as e:
+                print(f"Error writing embedding cache: {e}")
+
+        embedding_by_text = dict(zip(unique_texts.keys(), embeddings))
+        for i in missing:
+            cached[i] = embedding_by_text[normalize_text(texts[i])]
+        return cached
+
+    @staticmethod
+    def _collection_name(course_id: int) -> str:
+        return f"course_{course_id}"
+
     def create_collection(self, collection_id: str):
-        """Create a new collection in TiDB vector store"""
+        """Create a new collection in the vector store"""
         try:
-            # In TiDB, we don't need separate collections - we use the table_name field
-            # Create table if it doesn't exist for this collection
-            table_name = f"vector_collection_{collection_id}"
-
-            # Initialize a new vector client for this specific collection
-            TiDBVectorClient(
-                connection_string=settings.SQLALCHEMY_DATABASE_URL,
-                table_name=table_name,
-                vector_dimension=768,
-                drop_existing_table=False,
-            )
-            print(f"Collection {collection_id} initialized in TiDB")
+            self.backend.create_collection(collection_id)
+            print(f"Collection {collection_id} initialized")
         except Exception as e:
             print(f"Error creating collection {collection_id}: {e}")
 
     def create_collection_by_course_id(self, course_id: int):
         """Create a collection for a specific course"""
-        collection_id = f"course_{course_id}"
-        self.create_collection(collection_id)
+        self.create_collection(self._collection_name(course_id))
 
     def add_content_by_course_id(
         self, course_id: int, content_id: str, text: str, metadata: Dict
     ):
-        """Add content to vector store using TiDB"""
+        """Add content to vector store"""
         try:
             # Generate embedding using Google Gemini
             embedding = self._generate_embedding(text)
 
-            # Get or create TiDB vector client for this course
-            table_name = f"vector_collection_course_{course_id}"
-            course_vector_client = TiDBVectorClient(
-                connection_string=settings.SQLALCHEMY_DATABASE_URL,
-                table_name=table_name,
-                vector_dimension=768,
-                drop_existing_table=False,
-            )
-
             # Insert document with embedding
-            course_vector_client.insert(
+            collection = self._collection_name(course_id)
+            self.backend.insert(
+                collection,
                 ids=[content_id],
                 texts=[text],
                 embeddings=[embedding],
                 metadatas=[metadata],
             )
+            self.backend.flush(collection)
             print(f"Added content {content_id} to course {course_id}")
 
         except Exception as e:
             print(f"Error adding content {content_id} for course {course_id}: {e}")
 
+    def add_many(
+        self,
+        course_id: int,
+        items: List[Dict],
+        batch_size: int = settings.EMBEDDING_BATCH_SIZE,
+    ) -> Dict:
+        """
+        Bulk-add content to the vector store of a course.
+
+        Each item is a dict with "content_id", "text" and "metadata". Items are embedded
+        with one API request per batch and written with one backend insert (a multi-row
+        INSERT for TiDB) per batch.
+        A failing batch is reported and skipped, the remaining batches are still ingested.
+
+        :return: {"inserted": int, "failed": int, "failed_batches": [{"batch", "content_ids", "error"}]}
+        """
+        report = {"inserted": 0, "failed": 0, "failed_batches": []}
+        if not items:
+            return report
+
+        collection = self._collection_name(course_id)
+        try:
+            self.backend.create_collection(collection)
+        except Exception as e:
+            print(f"Error getting collection for course {course_id}: {e}")
+            report["failed"] = len(items)
+            report["failed_batches"].append(
+                {"batch": None, "content_ids": [item["content_id"] for item in items], "error": str(e)}
+            )
+            return report
+
+        batch_size = max(1, batch_size)
+
+        for batch_index, start in enumerate(range(0, len(items), batch_size)):
+            batch = items[start:start + batch_size]
+            content_ids = [item["content_id"] for item in batch]
+            try:
+                embeddings = self._generate_embeddings([item["text"] for item in batch])
+                self.backend.insert(
+                    collection,
+                    ids=content_ids,
+                    texts=[item["text"] for item in batch],
+                    embeddings=embeddings,
+                    metadatas=[item.get("metadata") or {} for item in batch],
+                )
+                report["inserted"] += len(batch)
+            except Exception as e:
+                print(f"Error adding batch {batch_index} ({len(batch)} items) for course {course_id}: {e}")
+                report["failed"] += len(batch)
+                report["failed_batches"].append(
+                    {"batch": batch_index, "content_ids": content_ids, "error": str(e)}
+                )
+
+        try:
+            self.backend.flush(collection)
+        except Exception as e:
+            print(f"Error persisting collection {collection}: {e}")
+
+        print(
+            f"Added {report['inserted']}/{len(items)} items to course {course_id} "
+            f"({len(report['failed_batches'])} failed batches)"
+        )
+        return report
+
     def search_by_course_id(
         self,
         course_id: int,
@@ -102,58 +196,97 @@ class VectorService:
         n_results: int = 5,
         filter_metadata: Optional[Dict] = None,
     ):
-        """Search for similar content using TiDB vector search"""
+        """
+        Search for similar content using vector search.
+        filter_metadata restricts the search to matching rows before the top n_results are taken,
+        e.g. {"document_id": 3, "page_number": {"$gte": 10, "$lte": 20}} (see vector_backends).
+        """
         try:
             # Generate query embedding
             query_embedding = self._generate_embedding(query)
-
-            # Get TiDB vector client for this course
-            table_name = f"vector_collection_course_{course_id}"
-            course_vector_client = TiDBVectorClient(
-                connection_string=settings.SQLALCHEMY_DATABASE_URL,
-                table_name=table_name,
-                vector_dimension=768,
-                drop_existing_table=False,
+            return self._search_by_embedding(
+                course_id, query_embedding, n_results, filter_metadata
             )
 
-            # Perform vector search
-            results = course_vector_client.query(
-                query_embedding,
-                k=n_results,
-                # TiDB vector search supports filtering but syntax may differ
-                # For now, we'll do post-filtering if needed
-            )
+        except Exception as e:
+            print(f"Error searching course {course_id}: {e}")
+            return []
 
-            # Apply metadata filtering if specified
-            if filter_metadata and results:
-                filtered_results = []
-                for result in results:
-                    # Check if result metadata matches filter criteria
-                    if all(
-                        result.metadata.get(k) == v for k, v in filter_metadata.items()
-                    ):
-                        filtered_results.append(result)
-                results = filtered_results[:n_results]
+    def _search_by_embedding(
+        self,
+        course_id: int,
+        query_embedding: List[float],
+        n_results: int = 5,
+        filter_metadata: Optional[Dict] = None,
+    ):
+        """k-NN lookup for an already embedded query"""
+        return self.backend.query(
+            self._collection_name(course_id), query_embedding, n_results, filter_metadata
+        )
+
+    async def search_many_by_course_id(
+        self,
+        course_id: int,
+        queries: List[str],
+        n_results: Union[int, List[int]] = 5,
+        filter_metadata: Optional[Dict] = None,
+    ) -> List[Dict]:
+        """
+        Run several searches against one course at once.
 
-            return results
+        All queries are embedded with one batch request, the k-NN lookups run concurrently
+        on the vector executor and the hits are merged: duplicates (same content id) keep their
+        best score. Returns passages sorted by descending score as
+        {"content_id", "text", "metadata", "score"} dicts, where score = 1 - cosine distance.
 
+        :param n_results: results per query, either one value for all queries or one per query
+        """
+        if not queries:
+            return []
+        if isinstance(n_results, int):
+            n_results = [n_results] * len(queries)
+
+        try:
+            query_embeddings = await vector_executor.run(self._generate_embeddings, queries)
         except Exception as e:
-            print(f"Error searching course {course_id}: {e}")
+            print(f"Error embedding queries for course {course_id}: {e}")
             return []
 
+        lookups = await asyncio.gather(
+            *[
+                vector_executor.run(
+                    self._search_by_embedding, course_id, embedding, k, filter_metadata
+                )
+                for embedding, k in zip(query_embeddings, n_results)
+            ],
+            return_exceptions=True,
+        )
+
+        best: Dict[str, Dict] = {}
+        for results in lookups:
+            if isinstance(results, Exception):
+                print(f"Error searching course {course_id}: {results}")
+                continue
+            for result in results:
+                score = 1.0 - float(result.distance)
+                passage = best.get(result.id)
+                if passage is None or score > passage["score"]:
+                    best[result.id] = {
+                        "content_id": result.id,
+                        "text": result.document,
+                        "metadata": result.metadata,
+                        "score": score,
+                    }
+
+        return sorted(best.values(), key=lambda passage: passage["score"], reverse=True)
+
     def delete_content_by_course_id(self, course_id: int, content_id: str):
         """Delete content from vector store"""
         try:
-            table_name = f"vector_collection_course_{course_id}"
-            course_vector_client = TiDBVectorClient(
-                connection_string=settings.SQLALCHEMY_DATABASE_URL,
-                table_name=table_name,
-                vector_dimension=768,
-                drop_existing_table=False,
-            )
-
             # Delete document by ID
-            course_vector_client.delete(ids=[content_id])
+            collection = self._collection_name(course_id)
+            self.backend.delete(collection, ids=[content_id])
+            self.backend.flush(collection)
             print(f"Deleted content {content_id} from course {course_id}")
 
         except Exception as e:
@@ -163,25 +296,71 @@ class VectorService:
         self, course_id: int, content_id: str, text: str, metadata: Dict
     ):
         """Update existing content by deleting and re-adding"""
-        # TiDB vector client handles updates via delete + insert
+        # Backends handle updates via delete + insert
         self.delete_content_by_course_id(course_id, content_id)
         self.add_content_by_course_id(course_id, content_id, text, metadata)
 
     def get_collection_by_course_id(self, course_id: int):
         """Get collection information by course ID"""
         try:
-            table_name = f"vector_collection_course_{course_id}"
-            course_vector_client = TiDBVectorClient(
-                connection_string=settings.SQLALCHEMY_DATABASE_URL,
-                table_name=table_name,
-                vector_dimension=768,
-                drop_existing_table=False,
-            )
-            return course_vector_client
+            return self.backend.get_collection(self._collection_name(course_id))
         except Exception as e:
             print(f"Error getting collection for course {course_id}: {e}")
             return None
 
+    # ----- async API -----
+    # The blocking calls (embedding HTTP requests, database queries) run on the bounded
+    # vector executor, so they never block the event loop shared by all chapters and chats.
+
+    async def add_content_by_course_id_async(
+        self, course_id: int, content_id: str, text: str, metadata: Dict
+    ):
+        """Async variant of add_content_by_course_id"""
+        return await vector_executor.run(
+            self.add_content_by_course_id, course_id, content_id, text, metadata
+        )
+
+    async def add_many_async(
+        self,
+        course_id: int,
+        items: List[Dict],
+        batch_size: int = settings.EMBEDDING_BATCH_SIZE,
+    ) -> Dict:
+        """Async variant of add_many"""
+        return await vector_executor.run(self.add_many, course_id, items, batch_size)
+
+    async def search_by_course_id_async(
+        self,
+        course_id: int,
+        query: str,
+        n_results: int = 5,
+        filter_metadata: Optional[Dict] = None,
+    ):
+        """Async variant of search_by_course_id"""
+        return await vector_executor.run(
+            self.search_by_course_id, course_id, query, n_results, filter_metadata
+        )
+
+    async def delete_content_by_course_id_async(self, course_id: int, content_id: str):
+        """Async variant of delete_content_by_course_id"""
+        return await vector_executor.run(
+            self.delete_content_by_course_id, course_id, content_id
+        )
+
+    @staticmethod
+    def get_executor_stats() -> Dict:
+        """Queue depth, in-flight calls and wait times of the vector executor"""
+        return vector_executor.stats()
+
+    @staticmethod
+    def get_client_stats() -> Dict:
+        """Hit/miss/eviction counters of the shared vector client registry"""
+        return vector_client_registry.stats()
+
+    def get_embedding_cache_stats(self) -> Optional[Dict]:
+        """Hit rate and bytes saved of the embedding cache (None if disabled)"""
+        return self.embedding_cache.stats() if self.embedding_cache else None
+
     def health_check(self) -> bool:
         """Check if TiDB connection and Google Gemini API are working"""
         try:
@@ -0,0 +1,39 @@
+"""
+Course creation worker process.
+
+Runs queued jobs (course creations) outside the web process, so generation load does not
+compete with request handling. Start any number of them next to the API with
+JOB_EMBEDDED_WORKER=false:
+
+    python -m src.worker        # development, from backend/
+    python -m app.worker        # Docker image
+
+SIGTERM/SIGINT hand the running jobs back to the queue before the process exits.
+"""
+import asyncio
+import logging
+import signal
+
+from .db.database import Base, engine
+from .db import models  # noqa: F401  (registers all tables)
+from .services.agent_service import AgentService
+from .services.job_worker import JobWorker, course_job_handlers
+from .services.notification_service import manager as ws_manager
+
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    Base.metadata.create_all(bind=engine)
+    worker = JobWorker(course_job_handlers(AgentService(), ws_manager))
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, lambda: asyncio.ensure_future(worker.stop()))
+
+    await worker.run()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main())
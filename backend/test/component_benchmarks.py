@@ -0,0 +1,321 @@
+"""
+Micro-benchmarks of the ingestion, retrieval and flashcard building blocks.
+
+Timings depend on the machine and its load, so the unit tests only check behaviour and
+the measurements live here. Run them before and after changing one of the components.
+
+Run from the repository root:
+    python -m backend.test.component_benchmarks                    # all benchmarks
+    python -m backend.test.component_benchmarks vector_query       # selected ones
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+import fitz
+import numpy as np
+
+from ..src.agents.flashcard_agent.pdf_parser import PDFParser
+from ..src.agents.flashcard_agent.testing_agent import TestingFlashcardAgent
+from ..src.services.data_processors.chunker import TextChunker, count_tokens, iter_overlapping_chunks
+from ..src.services.data_processors.document_readers import iter_csv_sections
+from ..src.services.data_processors.paragraph_dedup import ParagraphDeduplicator
+from ..src.services.data_processors.pdf_processor import PDFProcessor
+from ..src.services.llm_scheduler import LLMScheduler, Priority
+from ..src.services.page_renderer import PageRenderer
+from ..src.services.pdf_extraction import PDFExtractionPool, extract_pdf, iter_page_texts
+from ..src.services.vector_backends import NumpyVectorBackend
+from .test_chunker import _make_book_pdf
+from .test_page_renderer import _write_pdf
+from .test_pdf_extraction_cache import _make_text_pdf
+from .test_pdf_layout import _make_slides
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {}
+
+
+def benchmark(fn: Callable[[], None]) -> Callable[[], None]:
+    BENCHMARKS[fn.__name__] = fn
+    return fn
+
+
+@benchmark
+def vector_query() -> None:
+    """Query latency of the numpy vector backend over 20000 vectors"""
+    rng = np.random.default_rng(42)
+    with tempfile.TemporaryDirectory() as path:
+        backend = NumpyVectorBackend(path=path, mmap=True, dimension=32)
+        ids = [str(i) for i in range(20000)]
+        backend.insert("course_1", ids, ids, rng.normal(size=(20000, 32)).tolist(), [{} for _ in ids])
+        queries = rng.normal(size=(50, 32))
+
+        start = time.perf_counter()
+        for query in queries:
+            backend.query("course_1", query.tolist(), k=5)
+        per_query_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    print(f"numpy backend: {per_query_ms:.2f} ms/query over 20000 vectors")
+
+
+@benchmark
+def quantized_recall() -> None:
+    """Recall@5, size and latency of float16/int8 storage over 10000 clustered 768-d vectors"""
+    rng = np.random.default_rng(7)
+
+    def clustered(count, dimension=768, clusters=100):
+        centers = rng.normal(size=(clusters, dimension))
+        labels = rng.integers(0, clusters, count)
+        return (centers[labels] + 0.8 * rng.normal(size=(count, dimension))).astype(np.float32)
+
+    def filled(quantization, rescore=True):
+        backend = NumpyVectorBackend(path=None, dimension=768, quantization=quantization, rescore=rescore)
+        ids = [str(i) for i in range(len(vectors))]
+        backend.insert("course_1", ids, ids, vectors.tolist(), [{} for _ in ids])
+        return backend
+
+    vectors, queries = clustered(10000), clustered(100)
+    reference = filled("none")
+    truth = [{result.id for result in reference.query("course_1", q.tolist(), k=5)} for q in queries]
+    float32_bytes = sum(reference.memory_stats("course_1").values())
+    json_bytes = sum(len(json.dumps(vector.tolist())) for vector in vectors[:100]) * len(vectors) // 100
+
+    for mode, rescore in (("float16", False), ("int8", False), ("int8", True)):
+        backend = filled(mode, rescore)
+        start = time.perf_counter()
+        found = [{result.id for result in backend.query("course_1", q.tolist(), k=5)} for q in queries]
+        per_query_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        recall = np.mean([len(f & t) / 5 for f, t in zip(found, truth)])
+
+        sizes = backend.memory_stats("course_1")
+        total = sum(sizes.values())  # everything kept on disk / in memory, not only the scanned codes
+        print(
+            f"{mode} rescore={rescore}: recall@5={recall:.3f}, {total / 1e6:.1f} MB "
+            f"({', '.join(f'{name} {size / 1e6:.1f}' for name, size in sizes.items())}), "
+            f"{total / float32_bytes:.2f}x float32 ({float32_bytes / 1e6:.1f} MB), "
+            f"{total / json_bytes:.2f}x JSON, {per_query_ms:.2f} ms/query"
+        )
+
+
+@benchmark
+def dedup() -> None:
+    """Paragraph deduplication throughput, 2000 paragraphs of 80 words"""
+    rng = np.random.default_rng(3)
+    vocabulary = [f"word{i}" for i in range(5000)]
+    content = [" ".join(rng.choice(vocabulary, size=80)) for _ in range(200)]
+    paragraphs = [{"text": text} for text in content * 10]
+
+    start = time.perf_counter()
+    ParagraphDeduplicator().deduplicate(paragraphs)
+    per_paragraph_ms = (time.perf_counter() - start) * 1000 / len(paragraphs)
+
+    print(f"paragraph dedup: {per_paragraph_ms:.3f} ms/paragraph")
+
+
+@benchmark
+def pdf_extraction() -> None:
+    """Serial versus page-parallel PDF text extraction"""
+    pool = PDFExtractionPool(max_workers=4, min_pages=64)
+    try:
+        pool.extract(_make_text_pdf(16), parallel=True)  # start the workers
+        for pages in (10, 100, 1000):
+            data = _make_text_pdf(pages)
+
+            start = time.perf_counter()
+            extract_pdf(data)
+            serial_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            pool.extract(data, parallel=True)
+            parallel_ms = (time.perf_counter() - start) * 1000
+
+            print(
+                f"{pages} pages: serial {serial_ms:.0f} ms, "
+                f"{pool.max_workers} processes {parallel_ms:.0f} ms ({os.cpu_count()} CPUs)"
+            )
+    finally:
+        pool.shutdown()
+
+
+@benchmark
+def boilerplate_stripping() -> None:
+    """Tokens and extraction time of slide decks with and without header/footer stripping"""
+    for slides, sentences in ((60, 2), (60, 6), (300, 4)):
+        data = _make_slides(slides, sentences)
+
+        start = time.perf_counter()
+        plain = [page.get_text() for page in fitz.open(stream=data)]
+        plain_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        body = extract_pdf(data).body_pages
+        layout_s = time.perf_counter() - start
+
+        raw_tokens = sum(count_tokens(page) for page in plain)
+        body_tokens = sum(count_tokens(page) for page in body)
+        print(
+            f"{slides} slides x {sentences} sentences: {raw_tokens} -> {body_tokens} tokens "
+            f"(-{1 - body_tokens / raw_tokens:.0%}); extraction {plain_s * 1000:.0f} ms plain, "
+            f"{layout_s * 1000:.0f} ms with stripping"
+        )
+
+
+@benchmark
+def chunking() -> None:
+    """Size distribution and throughput of paragraphs versus token chunks on a 500-page PDF"""
+    extraction = extract_pdf(_make_book_pdf(500))
+    total_tokens = sum(count_tokens(page) for page in extraction.pages)
+    processor = PDFProcessor()
+
+    start = time.perf_counter()
+    paragraphs = [p for page in extraction.pages for p in processor._split_into_paragraphs(page)]
+    paragraph_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    chunks = list(TextChunker(target_tokens=256, overlap_tokens=32).chunk_pages(extraction.pages))
+    chunk_s = time.perf_counter() - start
+
+    for name, sizes, seconds in (
+        ("paragraphs", [count_tokens(p) for p in paragraphs], paragraph_s),
+        ("chunks", [chunk.token_count for chunk in chunks], chunk_s),
+    ):
+        quartiles = statistics.quantiles(sizes, n=4)
+        print(
+            f"{name}: {len(sizes)} pieces, tokens min {min(sizes)} p25 {quartiles[0]:.0f} "
+            f"median {quartiles[1]:.0f} p75 {quartiles[2]:.0f} max {max(sizes)}, "
+            f"stdev {statistics.pstdev(sizes):.1f}; "
+            f"{total_tokens / seconds / 1e6:.2f} M tokens/s"
+        )
+
+
+@benchmark
+def csv_ingestion() -> None:
+    """Streaming a 200000-row CSV upload into chunks"""
+    rows = "\n".join(f"{i},Product {i},{i * 0.25:.2f},Description of product number {i}" for i in range(200000))
+    data = ("id,name,price,description\n" + rows).encode()
+
+    start = time.perf_counter()
+    chunks = list(TextChunker(target_tokens=256, overlap_tokens=32).chunk_pages(iter_csv_sections(data)))
+    seconds = time.perf_counter() - start
+
+    print(f"CSV {len(data) / 1e6:.1f} MB -> {len(chunks)} chunks in {seconds:.2f} s ({len(data) / 1e6 / seconds:.1f} MB/s)")
+
+
+@benchmark
+def page_rendering() -> None:
+    """Page images for ten overlapping chapters of a 40-page deck, per image format"""
+    with tempfile.TemporaryDirectory() as path:
+        pdf_path = _write_pdf(path, 40)
+        chapters = [list(range(start, start + 6)) for start in range(0, 40, 4)]
+        for image_format in ("png", "jpeg", "webp"):
+            renderer = PageRenderer(path=os.path.join(path, image_format), image_format=image_format, pool=None)
+            start = time.perf_counter()
+            paths = [file for chapter in chapters for file in renderer.render(pdf_path, chapter)]
+            seconds = time.perf_counter() - start
+            size = sum(os.path.getsize(file) for file in set(paths))
+            print(
+                f"{image_format}: {len(paths)} page images requested, {renderer.rendered} rendered "
+                f"in {seconds * 1000:.0f} ms, {size / 1024:.0f} KiB on disk"
+            )
+
+
+@benchmark
+def flashcard_streaming() -> None:
+    """Peak memory and time to the first question chunk of a 1000-page PDF, full text versus page stream"""
+    with tempfile.TemporaryDirectory() as path:
+        pdf_path = os.path.join(path, "book.pdf")
+        doc = fitz.open()
+        line = "Normalization removes update anomalies by decomposing relations. "
+        for i in range(1000):
+            doc.new_page().insert_textbox(fitz.Rect(36, 36, 576, 806), f"Page {i + 1}. " + line * 45, fontsize=9)
+        doc.save(pdf_path)
+        doc.close()
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        with open(pdf_path, "rb") as f:
+            pdf_data = PDFParser._to_pdf_data(extract_pdf(f.read()))
+        total_text = " ".join(page["text"] for page in pdf_data["pages"])
+        agent = TestingFlashcardAgent.__new__(TestingFlashcardAgent)  # only the text splitter is used
+        chunks = agent._split_text_into_chunks(total_text, 8000, 500)
+        full_first = time.perf_counter() - start
+        _, full_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del pdf_data, total_text
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        stream = iter_overlapping_chunks(iter_page_texts(pdf_path), 8000, 500)
+        next(stream)
+        stream_first = time.perf_counter() - start
+        streamed = 1 + sum(1 for _ in stream)
+        _, stream_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(
+        f"full text {full_first * 1000:.0f} ms to first chunk, peak {full_peak / 1e6:.1f} MB; "
+        f"stream {stream_first * 1000:.1f} ms to first chunk, peak {stream_peak / 1e6:.2f} MB "
+        f"({len(chunks)} vs {streamed} chunks)"
+    )
+
+
+@benchmark
+def llm_scheduling() -> None:
+    """Chat latency while a 20-chapter course (60 model calls) is being created, scheduled versus FIFO"""
+
+    def chat_waits(chat_priority, chat_user=None):
+        scheduler = LLMScheduler(max_in_flight=4, rate_limits={}, default_rpm=0, burst_seconds=5, aging_seconds=30)
+
+        async def main():
+            waits = []
+
+            async def model_call(priority, user_id, duration, chat=False):
+                queued = time.monotonic()
+                async with scheduler.slot("gemini", priority, user_id):
+                    if chat:
+                        waits.append(time.monotonic() - queued)
+                    await asyncio.sleep(duration)
+
+            course = [
+                asyncio.create_task(model_call(Priority.COURSE_CREATION, "course-user", 0.02))
+                for _ in range(60)
+            ]
+            await asyncio.sleep(0.01)
+            chats = []
+            for i in range(5):
+                chats.append(asyncio.create_task(model_call(chat_priority, chat_user or f"chat-{i}", 0.01, chat=True)))
+                await asyncio.sleep(0.02)
+            await asyncio.gather(*course, *chats)
+            return waits
+
+        return asyncio.run(main()), scheduler.stats()
+
+    waits, stats = chat_waits(Priority.CHAT)
+    # Baseline: one shared FIFO queue, as with a plain semaphore
+    fifo_waits, _ = chat_waits(Priority.COURSE_CREATION, "course-user")
+    print(
+        f"chat wait during course burst: scheduled max {1000 * max(waits):.0f} ms "
+        f"(p95 {stats['priorities']['chat']['p95_wait_ms']:.0f} ms), FIFO max {1000 * max(fifo_waits):.0f} ms; "
+        f"max queue depth {stats['max_queue_depth']}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    for name in args.names or BENCHMARKS:
+        print(f"== {name}: {BENCHMARKS[name].__doc__}")
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+End-to-end course creation benchmark on the fake model backend.
+
+Runs N concurrent AgentService.create_course calls against a fresh SQLite database and
+the in-process numpy vector backend, with every model and embedding call answered by
+services/fake_llm.py (synthetic responses, or recorded fixtures with --mode replay).
+Reports wall time, latency per stage (info, image, planner, explainer, tester),
+peak RSS and event loop lag.
+
+Run from the repository root:
+    python -m backend.test.course_creation_benchmark --courses 8 --chapters 6
+    python -m backend.test.course_creation_benchmark --mode replay --fixtures /path/to/fixtures
+
+Fixtures are recorded by running the app with LLM_BACKEND=record.
+Generated components pass without linting unless --real-eslint is given, which needs the
+ESLint setup of agents/code_checker installed, as for the real service.
+"""
+import argparse
+import asyncio
+import os
+import resource
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List
+from unittest import mock
+
+# The database and the vector backend are chosen when the settings module is imported
+_workdir = tempfile.mkdtemp(prefix="mana_benchmark_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_workdir}/benchmark.db")
+os.environ.setdefault("VECTOR_BACKEND", "numpy")
+os.environ.setdefault("VECTOR_LOCAL_PATH", "")
+os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "false")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+os.environ.setdefault("PDF_CACHE_ENABLED", "false")
+
+from ..src.agents.explainer_agent import agent as explainer_agent_module  # noqa: E402
+from ..src.agents.tester_agent import agent as tester_agent_module  # noqa: E402
+from ..src.api.schemas.course import CourseRequest  # noqa: E402
+from ..src.db import models  # noqa: E402
+from ..src.db.crud import chapters_crud, courses_crud, documents_crud, users_crud  # noqa: E402
+from ..src.db.database import Base, engine, get_db_context  # noqa: E402
+from ..src.services.agent_service import AgentService  # noqa: E402
+from ..src.services.fake_llm import (  # noqa: E402
+    FakeModelBackend,
+    LatencyModel,
+    install_fake_backend,
+    parse_latencies,
+)
+from ..src.services.llm_scheduler import llm_scheduler  # noqa: E402
+from ..src.services.notification_service import WebSocketConnectionManager  # noqa: E402
+from . import sqlite_types  # noqa: E402,F401  (SQLite column types)
+
+STAGES = {
+    "info": "info_agent",
+    "image": "image_agent",
+    "planner": "planner_agent",
+    "explainer": "coding_agent",
+    "tester": "tester_agent",
+}
+
+
+
+class AcceptAllValidator:
+    """Stands in for ESLintValidator (node and ESLint are not needed): every component passes"""
+
+    def validate_jsx(self, code: str) -> Dict:
+        return {"valid": True, "errors": [], "warnings": []}
+
+
+def create_schema() -> None:
+    # The TiDB vector tables are not needed with the numpy backend
+    tables = [
+        table for name, table in Base.metadata.tables.items()
+        if name not in (models.VectorEmbedding.__tablename__, models.VectorIndex.__tablename__)
+    ]
+    Base.metadata.create_all(engine, tables=tables)
+
+
+def lecture_text(paragraphs: int) -> bytes:
+    topics = ["recursion", "sorting", "hash tables", "graphs", "dynamic programming", "complexity"]
+    return "\n\n".join(
+        f"Section {i + 1} on {topics[i % len(topics)]}. "
+        f"This paragraph explains {topics[i % len(topics)]} with example {i} and its trade-offs. "
+        f"Students should be able to apply {topics[(i + 1) % len(topics)]} afterwards."
+        for i in range(paragraphs)
+    ).encode("utf-8")
+
+
+def instrument(service: AgentService, timings: Dict[str, List[float]]) -> None:
+    """Record the duration of every agent run per stage"""
+    for stage, attribute in STAGES.items():
+        agent = getattr(service, attribute)
+        run = agent.run
+
+        async def timed_run(*args, _run=run, _stage=stage, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await _run(*args, **kwargs)
+            finally:
+                timings[_stage].append(time.perf_counter() - start)
+
+        agent.run = timed_run
+
+
+async def monitor_loop_lag(lags: List[float], stop: asyncio.Event, interval: float = 0.01) -> None:
+    """How much later than scheduled the event loop wakes up a sleeping task"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - start - interval))
+
+
+def percentile(values: List[float], share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))] if ordered else 0.0
+
+
+async def run_benchmark(args) -> None:
+    backend = FakeModelBackend(
+        mode=args.mode,
+        fixtures_path=args.fixtures,
+        latencies=parse_latencies(args.latency),
+        list_lengths={"planner_agent.chapters": args.chapters, "tester_agent.questions": args.questions},
+        embedding_latency=LatencyModel.parse(args.embedding_latency),
+        time_scale=args.time_scale,
+        seed=args.seed,
+    )
+    install_fake_backend(backend)
+    create_schema()
+
+    if args.real_eslint:
+        service = AgentService()
+    else:
+        # The explainer and the tester each lint their generated components
+        with mock.patch.object(explainer_agent_module, "ESLintValidator", AcceptAllValidator), \
+                mock.patch.object(tester_agent_module, "ESLintValidator", AcceptAllValidator):
+            service = AgentService()
+    if not args.keep_tools:
+        # Fake models never call tools, so the Unsplash MCP server need not be started
+        service.image_agent.runner.agent.tools = []
+    timings: Dict[str, List[float]] = defaultdict(list)
+    instrument(service, timings)
+    ws_manager = WebSocketConnectionManager()
+
+    document = lecture_text(args.doc_paragraphs)
+    courses = []
+    with get_db_context() as db:
+        for i in range(args.courses):
+            user_id = f"benchmark-user-{i}"
+            users_crud.create_user(db, user_id, user_id, f"{user_id}@example.com", "-")
+            course = courses_crud.create_new_course(db, user_id, 2, f"Algorithms course {i}")
+            document_ids = []
+            if args.doc_paragraphs > 0:
+                doc = documents_crud.create_document(db, None, user_id, "lecture.txt", "text/plain", document)
+                document_ids.append(doc.id)
+            request = CourseRequest(
+                query=f"Algorithms course {i}", time_hours=2, document_ids=document_ids,
+                language="en", difficulty="beginner",
+            )
+            courses.append((user_id, course.id, request))
+
+    lags: List[float] = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(monitor_loop_lag(lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        service.create_course(user_id, course_id, request, f"benchmark-{course_id}", ws_manager)
+        for user_id, course_id, request in courses
+    ), return_exceptions=True)  # failed courses are counted by status below
+    wall = time.perf_counter() - start
+    stop.set()
+    await lag_task
+
+    with get_db_context() as db:
+        statuses = [courses_crud.get_course_by_id(db, course_id).status.value for _, course_id, _ in courses]
+        chapters = sum(chapters_crud.get_chapter_count_by_course(db, course_id) for _, course_id, _ in courses)
+
+    print(f"\n{args.courses} courses ({args.mode}, time scale {args.time_scale}) in {wall:.2f} s "
+          f"-> {args.courses / wall * 60:.1f} courses/min, {chapters} chapters, statuses {sorted(set(statuses))}")
+    print(f"{'stage':<10} {'runs':>5} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for stage in STAGES:
+        values = timings.get(stage, [])
+        if values:
+            print(f"{stage:<10} {len(values):>5} {1000 * statistics.median(values):>9.0f} "
+                  f"{1000 * percentile(values, 0.95):>9.0f} {1000 * max(values):>9.0f}")
+    print(f"event loop lag: p50 {1000 * percentile(lags, 0.5):.1f} ms, p99 {1000 * percentile(lags, 0.99):.1f} ms, "
+          f"max {1000 * max(lags, default=0):.1f} ms")
+    print(f"peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+    print(f"model backend: {backend.stats()}")
+    print(f"scheduler: max queue depth {llm_scheduler.stats()['max_queue_depth']}, "
+          f"granted {llm_scheduler.stats()['granted']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, default=4, help="concurrent course creations")
+    parser.add_argument("--chapters", type=int, default=5, help="chapters per synthetic learning path")
+    parser.add_argument("--questions", type=int, default=3, help="questions per synthetic test")
+    parser.add_argument("--doc-paragraphs", type=int, default=200, help="paragraphs of the uploaded document (0: none)")
+    parser.add_argument("--mode", choices=["synthetic", "replay"], default="synthetic")
+    parser.add_argument("--fixtures", help="fixture directory for --mode replay")
+    parser.add_argument("--latency", default="default=800:0.5,explainer_agent=6000:0.4,tester_agent=4000:0.4",
+                        help='model latency per agent, "agent=median_ms:sigma,..."')
+    parser.add_argument("--embedding-latency", default="150:0.3", help="median_ms:sigma of an embedding request")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="multiply all simulated latencies")
+    parser.add_argument("--keep-tools", action="store_true", help="keep the image agent's MCP toolset")
+    parser.add_argument("--real-eslint", action="store_true", help="lint generated components with ESLint")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args))
+
+
+if __name__ == "__main__":
+    main()
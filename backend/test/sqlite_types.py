@@ -0,0 +1,17 @@
+"""
+MySQL column types compiled for SQLite, the database the tests and benchmarks run against.
+
+The compilers register globally, so importing this module once is enough.
+"""
+from sqlalchemy.dialects.mysql import LONGBLOB, LONGTEXT
+from sqlalchemy.ext.compiler import compiles
+
+
+@compiles(LONGTEXT, "sqlite")
+def _longtext(element, compiler, **kw):
+    return "TEXT"
+
+
+@compiles(LONGBLOB, "sqlite")
+def _longblob(element, compiler, **kw):
+    return "BLOB"
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+from google.adk.agents import LlmAgent
+from google.adk.events import Event
+from google.genai import types
+
+from ..src.agents.agent import StandardAgent, StructuredAgent
+from ..src.agents.utils import create_text_query
+from ..src.services import adk_session_service
+from ..src.services.adk_session_service import BoundedSessionService
+
+
+class _FakeRunner:
+    """Runner replacement that records a (large) answer in the session, like the explainer's React code"""
+
+    def __init__(self, session_service, response, fail=False):
+        self.agent = LlmAgent(name="explainer_agent", model="gemini-2.0-flash")
+        self.session_service = session_service
+        self.response = response
+        self.fail = fail
+        self.live_sessions = []
+
+    async def run_async(self, user_id, session_id, new_message):
+        self.live_sessions.append(self.session_service.stats()["sessions"])
+        if self.fail:
+            raise RuntimeError("Model overloaded")
+        session = await self.session_service.get_session(app_name="test", user_id=user_id, session_id=session_id)
+        event = Event(
+            author=self.agent.name,
+            content=types.Content(role="model", parts=[types.Part(text=self.response)]),
+        )
+        yield await self.session_service.append_event(session, event)
+
+
+class _FakeExplainer(StandardAgent):
+    def __init__(self, session_service, runner):
+        self.app_name = "test"
+        self.session_service = session_service
+        self.runner = runner
+
+
+class _FakePlanner(StructuredAgent):
+    def __init__(self, session_service, runner):
+        self.app_name = "test"
+        self.session_service = session_service
+        self.runner = runner
+
+
+class TestBoundedSessionService(unittest.TestCase):
+    """Agent sessions are deleted after each call, bounded and accounted for"""
+
+    def test_agent_runs_delete_their_sessions(self):
+        sessions = BoundedSessionService(max_sessions=10)
+        code = "export default () => <div>" + "x" * 10000 + "</div>;"
+        explainer = _FakeExplainer(sessions, _FakeRunner(sessions, code))
+        planner = _FakePlanner(sessions, _FakeRunner(sessions, json.dumps({"chapters": []})))
+
+        for _ in range(3):
+            self.assertEqual(asyncio.run(explainer.run("u1", {"query": "Graphs"}, create_text_query("Explain")))["explanation"], code)
+        self.assertEqual(asyncio.run(planner.run("u1", {}, create_text_query("Plan")))["chapters"], [])
+
+        self.assertEqual(explainer.runner.live_sessions, [1, 1, 1])
+        stats = sessions.stats()
+        self.assertEqual((stats["sessions"], stats["approx_bytes"], stats["created"], stats["deleted"]), (0, 0, 4, 4))
+        self.assertEqual(sessions.sessions, {"test": {}})
+
+    def test_failed_runs_delete_their_sessions(self):
+        sessions = BoundedSessionService()
+        explainer = _FakeExplainer(sessions, _FakeRunner(sessions, "", fail=True))
+        with mock.patch("asyncio.sleep", mock.AsyncMock()), self.assertRaises(RuntimeError):
+            asyncio.run(explainer.run("u1", {}, create_text_query("Explain")))
+        self.assertEqual((sessions.stats()["sessions"], sessions.stats()["deleted"]), (0, 2))
+
+    def test_cap_and_expiry(self):
+        sessions = BoundedSessionService(max_sessions=2, ttl_seconds=60)
+        now = [1000.0]
+        with mock.patch.object(adk_session_service.time, "monotonic", lambda: now[0]):
+            first = asyncio.run(sessions.create_session(app_name="test", user_id="u1"))
+            asyncio.run(sessions.create_session(app_name="test", user_id="u1"))
+            asyncio.run(sessions.create_session(app_name="test", user_id="u2"))
+            self.assertIsNone(asyncio.run(sessions.get_session(app_name="test", user_id="u1", session_id=first.id)))
+            self.assertEqual((sessions.stats()["sessions"], sessions.stats()["evicted"]), (2, 1))
+
+            now[0] += 61
+            asyncio.run(sessions.create_session(app_name="test", user_id="u3"))
+            stats = sessions.stats()
+            self.assertEqual((stats["sessions"], stats["expired"], stats["evicted"]), (1, 2, 1))
+            self.assertEqual(list(sessions.sessions["test"]), ["u3"])
+
+    def test_approx_bytes(self):
+        sessions = BoundedSessionService()
+        state = {"chapters_str": "Caption: Graphs\n" * 1000}
+        asyncio.run(sessions.create_session(app_name="test", user_id="u1", state=state))
+        self.assertGreater(sessions.stats()["approx_bytes"], len(state["chapters_str"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
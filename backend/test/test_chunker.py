@@ -0,0 +1,127 @@
+import unittest
+
+import fitz
+
+from ..src.services.data_processors.chunker import TextChunker, count_tokens, split_sentences
+from ..src.services.data_processors.paragraph_dedup import ParagraphDeduplicator
+from ..src.services.pdf_extraction import extract_pdf
+
+
+class TestTextChunker(unittest.TestCase):
+    """Sentence-snapped, overlapping chunks that may cross page breaks"""
+
+    def test_sentence_split(self):
+        text = 'He said "Stop." Then he left. The value is 3.5 today. 2 items remain'
+        self.assertEqual(
+            list(split_sentences(text)),
+            ['He said "Stop."', "Then he left.", "The value is 3.5 today.", "2 items remain"],
+        )
+
+    def test_short_text_is_kept(self):
+        chunks = list(TextChunker(target_tokens=50, overlap_tokens=0).chunk_pages(["Intro", "", "Key idea."]))
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(chunks[0].text, "Intro Key idea.")
+        self.assertEqual((chunks[0].page_start, chunks[0].page_end), (1, 3))
+
+    def test_sentence_cut_by_page_break_is_rejoined(self):
+        pages = ["First sentence. A sentence that con-\n", "tinues on the next page. Last one."]
+        chunker = TextChunker(target_tokens=6, overlap_tokens=0)
+        texts = [chunk.text for chunk in chunker.chunk_pages(pages)]
+        self.assertIn("A sentence that continues on the next page.", texts)
+        self.assertEqual(texts[-1], "Last one.")
+        self.assertTrue(all(chunk.token_count == count_tokens(chunk.text) for chunk in chunker.chunk_pages(pages)))
+
+    def test_chunks_respect_target_and_snap_to_sentences(self):
+        sentences = [f"Sentence number {i} talks about topic {i % 7}." for i in range(200)]
+        pages = [" ".join(sentences[i:i + 20]) for i in range(0, 200, 20)]
+        chunker = TextChunker(target_tokens=60, overlap_tokens=12)
+        chunks = list(chunker.chunk_pages(pages))
+
+        for chunk in chunks:
+            self.assertLessEqual(chunk.token_count, 60)
+            self.assertTrue(chunk.text.endswith("."))
+            self.assertEqual(chunk.token_count, count_tokens(chunk.text))
+        # Consecutive chunks share whole trailing sentences
+        for previous, current in zip(chunks, chunks[1:]):
+            last_sentence = list(split_sentences(previous.text))[-1]
+            self.assertTrue(current.text.startswith(last_sentence))
+        # Every sentence made it into some chunk
+        joined = " ".join(chunk.text for chunk in chunks)
+        self.assertTrue(all(sentence in joined for sentence in sentences))
+        self.assertEqual([chunk.chunk_index for chunk in chunks], list(range(len(chunks))))
+
+    def test_run_on_sentence_is_split_by_words(self):
+        chunks = list(TextChunker(target_tokens=20, overlap_tokens=0).chunk_pages(["word " * 100]))
+        self.assertEqual(len(chunks), 5)
+        self.assertTrue(all(chunk.token_count == 20 for chunk in chunks))
+
+    def test_streams_pages(self):
+        read = []
+
+        def pages():
+            for i in range(1000):
+                read.append(i)
+                yield f"Page {i} has one sentence of text in it."
+
+        first = next(TextChunker(target_tokens=30, overlap_tokens=0).chunk_pages(pages()))
+        self.assertEqual(first.page_start, 1)
+        self.assertLess(len(read), 10)
+
+    def test_repeated_paragraphs_are_dropped_before_packing(self):
+        disclaimer = "These slides are provided for educational use only and may not be redistributed."
+        topics = ["dirty reads", "lost updates", "phantoms", "write skew", "deadlocks"]
+        pages = [
+            f"Lecture {i} shows how {topics[i % 5]} arise when transactions {'ABCDEFGHIJ'[i % 10]} "
+            f"and {'KLMNOPQRST'[i // 2 % 10]} interleave in schedule {i * 7}.\n\n{disclaimer}"
+            for i in range(20)
+        ]
+        chunker = TextChunker(target_tokens=60, overlap_tokens=0, deduplicator=ParagraphDeduplicator())
+        text = " ".join(chunk.text for chunk in chunker.chunk_pages(pages))
+        self.assertEqual(text.count(disclaimer), 1)
+        self.assertTrue(all(f"in schedule {i * 7}." in text for i in range(20)))
+        self.assertEqual(chunker.deduplicator.stats.removed, 19)
+
+        # Packed into chunks first, the disclaimer is mixed with different body text every time
+        chunks = [{"text": chunk.text} for chunk in TextChunker(target_tokens=60, overlap_tokens=0).chunk_pages(pages)]
+        self.assertEqual(ParagraphDeduplicator().deduplicate(chunks), chunks)
+
+    def test_invalid_configuration(self):
+        with self.assertRaises(ValueError):
+            TextChunker(target_tokens=0)
+        with self.assertRaises(ValueError):
+            TextChunker(target_tokens=10, overlap_tokens=10)
+
+
+def _make_book_pdf(pages):
+    doc = fitz.open()
+    paragraph = (
+        "A transaction is a unit of work that is either applied completely or not at all. "
+        "Isolation levels trade consistency for concurrency, and the weaker levels allow "
+        "anomalies such as dirty reads or lost updates. "
+    )
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(
+            fitz.Rect(36, 36, 576, 806),
+            f"Section {i + 1}. " + paragraph * (1 + i % 7) + "A sentence running over the page",
+            fontsize=9,
+        )
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class TestChunkerOnPDF(unittest.TestCase):
+    """Chunks of an extracted PDF stay within the target and may span pages"""
+
+    def test_generated_pdf(self):
+        extraction = extract_pdf(_make_book_pdf(40))
+        chunks = list(TextChunker(target_tokens=256, overlap_tokens=32).chunk_pages(extraction.pages))
+
+        self.assertTrue(all(chunk.token_count <= 256 for chunk in chunks))
+        self.assertGreater(sum(1 for chunk in chunks if chunk.page_end > chunk.page_start), 0)
+        self.assertEqual((chunks[0].page_start, chunks[-1].page_end), (1, 40))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import asyncio
+import unittest
+from collections import Counter
+
+from google.adk.sessions import InMemorySessionService
+
+from ..src.api.schemas.course import CourseRequest
+from ..src.db.crud import chapters_crud, checkpoints_crud, courses_crud, documents_crud, questions_crud
+from ..src.db.database import Base, engine, get_db_context
+from ..src.db.models import (
+    Chapter, Course, CourseCheckpoint, Document, Image, PracticeQuestion, Usage, User,
+)
+from ..src.db.models.db_course import CourseStatus
+from ..src.services.agent_service import AgentService
+from ..src.services.notification_service import WebSocketConnectionManager
+from ..src.services.query_service import QueryService
+from ..src.services.state_service import StateService
+from . import sqlite_types  # noqa: F401  (SQLite column types)
+
+
+class _Crash(BaseException):
+    """Stands in for the worker process dying (escapes create_course's error handling)"""
+
+
+class _FakeAgent:
+    def __init__(self, name, calls, respond):
+        self.name = name
+        self.calls = calls
+        self.respond = respond
+
+    async def run(self, user_id, state, content, debug=False):
+        self.calls[self.name] += 1
+        return self.respond(content.parts[0].text)
+
+
+class _FakeContentService:
+    def __init__(self):
+        self.ingested = []
+
+    async def process_course_documents(self, course_id, documents, on_document_done=None):
+        for document in documents:
+            self.ingested.append(document.id)
+            if on_document_done:
+                on_document_done(document)
+
+    async def get_rag_infos(self, course_id, topic):
+        return [{"text": f"Notes on {topic['caption']}"}]
+
+
+CHAPTERS = [
+    {"caption": f"Chapter {i}", "content": [f"Point {i}.1", f"Point {i}.2"], "time": 30, "note": None}
+    for i in range(1, 4)
+]
+
+
+class TestResumableCourseCreation(unittest.TestCase):
+    """Checkpointed course creation continues after an interruption without repeating finished work"""
+
+    def setUp(self):
+        tables = [model.__table__ for model in (User, Course, Chapter, PracticeQuestion, CourseCheckpoint, Document, Image, Usage)]
+        Base.metadata.create_all(engine, tables=tables)
+        self.calls = Counter()
+        self.crash_on = "Chapter 3"
+
+        def tester(text):
+            if self.crash_on and self.crash_on in text:
+                raise _Crash()
+            return {"success": True, "questions": [{"question": "Why?", "correct_answer": "Because."}]}
+
+        service = AgentService.__new__(AgentService)
+        service.app_name = "test"
+        service.session_service = InMemorySessionService()
+        service.state_manager = StateService()
+        service.query_service = QueryService(service.state_manager)
+        service.contentService = _FakeContentService()
+        service.info_agent = _FakeAgent("info", self.calls, lambda _: {"title": "Graphs", "description": "All about graphs"})
+        service.image_agent = _FakeAgent("image", self.calls, lambda _: {"explanation": "https://images.example/graph.png"})
+        service.planner_agent = _FakeAgent("planner", self.calls, lambda _: {"chapters": CHAPTERS})
+        service.coding_agent = _FakeAgent("explainer", self.calls, lambda _: {"explanation": "export default () => null;"})
+        service.tester_agent = _FakeAgent("tester", self.calls, tester)
+        self.service = service
+
+        with get_db_context() as db:
+            self.course_id = courses_crud.create_new_course(db, "u1", 2, "Graphs").id
+            document = documents_crud.create_document(db, None, "u1", "notes.txt", "text/plain", b"Graphs have nodes.")
+            self.request = CourseRequest(
+                query="Graphs", time_hours=2, document_ids=[document.id], language="en", difficulty="beginner"
+            )
+
+    def create(self):
+        return self.service.create_course("u1", self.course_id, self.request, "task", WebSocketConnectionManager())
+
+    def test_resume_skips_completed_stages(self):
+        with self.assertRaises(_Crash):
+            asyncio.run(self.create())
+
+        with get_db_context() as db:
+            checkpoint = checkpoints_crud.get_checkpoint(db, self.course_id)
+            self.assertTrue(checkpoint["info_done"] and checkpoint["ingestion_done"])
+            self.assertEqual(len(checkpoint["planner_chapters"]), 3)
+            self.assertEqual({i: p["tester"] for i, p in checkpoint["chapter_progress"].items()}, {1: True, 2: True, 3: False})
+        self.assertEqual(self.calls, Counter(info=1, image=4, planner=1, explainer=3, tester=3))
+
+        self.crash_on = None
+        self.calls.clear()
+        resumed = asyncio.run(self.service.resume_course("u1", self.course_id, "task-2", WebSocketConnectionManager()))
+
+        self.assertTrue(resumed)
+        # Only chapter 3's questions were missing
+        self.assertEqual(self.calls, Counter(tester=1))
+        self.assertEqual(len(self.service.contentService.ingested), 1)
+        with get_db_context() as db:
+            course = courses_crud.get_course_by_id(db, self.course_id)
+            self.assertEqual((course.status, course.chapter_count, course.title), (CourseStatus.FINISHED, 3, "Graphs"))
+            chapters = chapters_crud.get_chapters_by_course_id(db, self.course_id)
+            self.assertEqual([chapter.index for chapter in chapters], [1, 2, 3])
+            self.assertEqual([len(questions_crud.get_questions_by_chapter_id(db, c.id)) for c in chapters], [1, 1, 1])
+            self.assertIsNone(checkpoints_crud.get_checkpoint(db, self.course_id))
+
+    def test_unfinished_chapters_are_regenerated(self):
+        with self.assertRaises(_Crash):
+            asyncio.run(self.create())
+        with get_db_context() as db:
+            # As if the explainer of chapter 2 had not finished before the crash
+            checkpoints_crud.update_checkpoint(db, self.course_id, chapter_progress={
+                "1": checkpoints_crud.get_checkpoint(db, self.course_id)["chapter_progress"][1]
+            })
+
+        self.crash_on = None
+        self.calls.clear()
+        asyncio.run(self.service.resume_course("u1", self.course_id, "task-2", WebSocketConnectionManager()))
+
+        self.assertEqual(self.calls, Counter(explainer=2, image=2, tester=2))
+        with get_db_context() as db:
+            chapters = chapters_crud.get_chapters_by_course_id(db, self.course_id)
+            self.assertEqual([chapter.index for chapter in chapters], [1, 2, 3])
+
+    def test_nothing_to_resume(self):
+        self.assertFalse(asyncio.run(self.service.resume_course("u1", 10 ** 6, "task", WebSocketConnectionManager())))
+
+
+if __name__ == "__main__":
+    unittest.main()
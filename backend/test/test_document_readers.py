@@ -0,0 +1,102 @@
+import io
+import json
+import unittest
+import zipfile
+
+from ..src.services.data_processors.chunker import TextChunker
+from ..src.services.data_processors.document_readers import (
+    iter_csv_sections,
+    iter_document_sections,
+    iter_docx_paragraphs,
+    iter_json_values,
+    iter_lines,
+    iter_text_sections,
+)
+
+
+def _make_docx(paragraphs):
+    body = "".join(
+        f'<w:p><w:r><w:t xml:space="preserve">{text}</w:t></w:r></w:p>' for text in paragraphs
+    )
+    xml = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{body}<w:p/></w:body></w:document>"
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("word/document.xml", xml)
+    return buffer.getvalue()
+
+
+class TestDocumentReaders(unittest.TestCase):
+    """Streaming text sections for TXT, CSV, JSON and DOCX uploads"""
+
+    def test_lines_survive_chunk_borders(self):
+        text = "".join(f"line {i} ünï\r\n" for i in range(2000)) + "last"
+        lines = list(iter_lines(text.encode("utf-8")))
+        self.assertEqual("".join(lines), text)
+        self.assertEqual(len(lines), 2001)
+
+    def test_text_sections(self):
+        data = "\n".join(f"Line {i}." for i in range(450)).encode()
+        sections = list(iter_text_sections(data, lines_per_section=200))
+        self.assertEqual(len(sections), 3)
+        self.assertTrue(sections[2].startswith("Line 400."))
+
+    def test_csv_rows_carry_their_header(self):
+        data = b'name,price,notes\nWidget,3.50,"comma, inside"\n\nGadget,,x,extra\n'
+        sections = list(iter_csv_sections(data))
+        self.assertEqual(
+            sections,
+            ["name: Widget; price: 3.50; notes: comma, inside.\n\nname: Gadget; notes: x; extra."],
+        )
+        self.assertEqual(list(iter_csv_sections(b"")), [])
+
+    def test_json_items_are_streamed(self):
+        document = {"title": "Course", "data": [{"id": i, "tags": ["a", "b"]} for i in range(3)], "n": 12345}
+        text = json.dumps(document)
+        # Feed three characters at a time, numbers are split across chunks
+        chunks = [text[i:i + 3] for i in range(0, len(text), 3)]
+        items = list(iter_json_values(chunks))
+        self.assertEqual(
+            items,
+            [("title", "Course")]
+            + [(f"data[{i}]", {"id": i, "tags": ["a", "b"]}) for i in range(3)]
+            + [("n", 12345)],
+        )
+        self.assertEqual(list(iter_json_values(['[1, 2', '0, {"a": null}]'])), [("[0]", 1), ("[1]", 20), ("[2]", {"a": None})])
+        self.assertEqual(list(iter_json_values(['{"a": 1}\n{"a"', ': 2}\n'])), [("a", 1), ("[1]", {"a": 2})])
+
+    def test_json_is_parsed_lazily(self):
+        consumed = []
+
+        def chunks():
+            yield "["
+            for i in range(10000):
+                consumed.append(i)
+                yield json.dumps({"row": i}) + ","
+            yield "{}]"
+
+        values = iter_json_values(chunks())
+        self.assertEqual(next(values), ("[0]", {"row": 0}))
+        self.assertLess(len(consumed), 3)
+
+    def test_json_sections(self):
+        data = json.dumps([{"q": "What is SQL?", "tags": ["db"]}, {"q": None}]).encode()
+        self.assertEqual(list(iter_document_sections("application/json", data)), ["[0].q: What is SQL?\n[0].tags[0]: db"])
+
+    def test_docx_paragraphs(self):
+        data = _make_docx(["First paragraph.", "Second &amp; last."])
+        self.assertEqual(list(iter_docx_paragraphs(data)), ["First paragraph.", "Second & last."])
+        self.assertIsNone(iter_document_sections("application/msword", data))
+
+    def test_large_csv_is_chunked_to_the_last_row(self):
+        rows = "\n".join(f"{i},Product {i},{i * 0.25:.2f},Description of product number {i}" for i in range(5000))
+        data = ("id,name,price,description\n" + rows).encode()
+        chunks = list(TextChunker(target_tokens=256, overlap_tokens=32).chunk_pages(iter_csv_sections(data)))
+        self.assertIn("id: 4999;", chunks[-1].text)
+
+
+if __name__ == "__main__":
+    unittest.main()
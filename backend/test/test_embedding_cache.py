@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from ..src.services import vector_service as vector_service_module
+from ..src.services.embedding_cache import EmbeddingCache
+from ..src.services.vector_service import VectorService
+
+MODEL = "models/text-embedding-004"
+TASK = "retrieval_document"
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    """Hits, misses, keying and eviction of the persistent embedding cache"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "embeddings.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hits_and_misses(self):
+        cache = EmbeddingCache(path=self.path, max_entries=100)
+        cache.put_many(MODEL, TASK, ["Graphs have nodes.", "Trees are graphs."], [[0.5, 1.0], [0.25, -2.0]])
+
+        # Whitespace differences share one entry
+        self.assertEqual(
+            cache.get_many(MODEL, TASK, ["Graphs  have\nnodes.", "Unknown", "Trees are graphs."]),
+            [[0.5, 1.0], None, [0.25, -2.0]],
+        )
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["hits"], stats["misses"]), (2, 2, 1))
+        self.assertEqual(stats["bytes_saved"], len("Graphs  have\nnodes.") + len("Trees are graphs."))
+
+        # Entries survive a restart
+        self.assertEqual(EmbeddingCache(path=self.path).get(MODEL, TASK, "Graphs have nodes."), [0.5, 1.0])
+
+    def test_keyed_by_model_and_task_type(self):
+        cache = EmbeddingCache(path=self.path, max_entries=100)
+        cache.put(MODEL, TASK, "Graphs have nodes.", [1.0])
+        self.assertIsNone(cache.get("models/other-embedding", TASK, "Graphs have nodes."))
+        self.assertIsNone(cache.get(MODEL, "retrieval_query", "Graphs have nodes."))
+        self.assertEqual(cache.get(MODEL, TASK, "Graphs have nodes."), [1.0])
+
+    def test_least_recently_used_are_evicted(self):
+        cache = EmbeddingCache(path=self.path, max_entries=10)
+        texts = [f"Paragraph {i}" for i in range(10)]
+        with mock.patch("time.time", side_effect=range(1, 100)):
+            cache.put_many(MODEL, TASK, texts, [[float(i)] for i in range(10)])
+            cache.get(MODEL, TASK, "Paragraph 0")  # now the most recently used
+            cache.put(MODEL, TASK, "Paragraph 10", [10.0])
+
+        # Evicted down to 90% of the cap, oldest first
+        self.assertEqual(cache.stats()["entries"], 9)
+        self.assertEqual(cache.stats()["evictions"], 2)
+        self.assertIsNotNone(cache.get(MODEL, TASK, "Paragraph 0"))
+        self.assertEqual(cache.get_many(MODEL, TASK, ["Paragraph 1", "Paragraph 2"]), [None, None])
+
+    def test_replaced_entries_do_not_evict(self):
+        cache = EmbeddingCache(path=self.path, max_entries=5)
+        for i in range(20):
+            cache.put(MODEL, TASK, "Graphs have nodes.", [float(i)])
+        self.assertEqual(cache.stats()["evictions"], 0)
+        self.assertEqual(cache.get(MODEL, TASK, "Graphs have nodes."), [19.0])
+
+
+class _BrokenCache:
+    def __init__(self):
+        self.stored = []
+
+    def get_many(self, model, task_type, texts):
+        raise sqlite3.OperationalError("database is locked")
+
+    def put_many(self, model, task_type, texts, embeddings):
+        self.stored.extend(texts)
+
+
+class TestEmbeddingCacheFailures(unittest.TestCase):
+    """A failing cache is treated as a miss instead of failing the ingestion"""
+
+    def test_unreadable_cache_is_a_miss(self):
+        service = VectorService.__new__(VectorService)
+        service.embedding_model_name = MODEL
+        service.embedding_task_type = TASK
+        service.embedding_cache = _BrokenCache()
+        fake_backend = SimpleNamespace(embed_content=lambda model, content, task_type: {"embedding": [[1.0], [2.0]]})
+
+        with mock.patch.object(vector_service_module, "active_fake_backend", lambda: fake_backend):
+            embeddings = service._generate_embeddings(["Graphs have nodes.", "Trees are graphs."])
+
+        self.assertEqual(embeddings, [[1.0], [2.0]])
+        self.assertEqual(service.embedding_cache.stored, ["Graphs have nodes.", "Trees are graphs."])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import math
+import random
+import tempfile
+import unittest
+
+from google.adk.models import LlmRequest
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from ..src.agents.planner_agent import PlannerAgent
+from ..src.agents.planner_agent.schema import LearningPath
+from ..src.agents.tester_agent.schema import McQuestion, Test, TextFieldQuestion
+from ..src.agents.utils import create_text_query
+from ..src.services.fake_llm import (
+    REACT_COMPONENT,
+    FakeModelBackend,
+    FixtureRecorder,
+    LatencyModel,
+    hashed_embedding,
+    install_fake_backend,
+    parse_latencies,
+    request_agent,
+    request_key,
+    uninstall_fake_backend,
+)
+
+
+def _request(agent, schema=None, text="Plan a course"):
+    return LlmRequest(
+        model="gemini-2.0-flash-001",
+        contents=[types.Content(role="user", parts=[types.Part(text=text)])],
+        config=types.GenerateContentConfig(
+            system_instruction=f'You are an agent. Your internal name is "{agent}".',
+            response_schema=schema,
+        ),
+    )
+
+
+class TestFakeModelBackend(unittest.TestCase):
+    """Synthesized and replayed responses of the fake model backend"""
+
+    def test_synthesized_responses_match_output_schema(self):
+        backend = FakeModelBackend(list_lengths={"planner_agent.chapters": 7})
+        path = LearningPath.model_validate_json(backend.synthesize("planner_agent", _request("planner_agent", LearningPath)))
+        self.assertEqual(len(path.chapters), 7)
+        self.assertTrue(all(chapter.time > 0 and chapter.content for chapter in path.chapters))
+
+        test = Test.model_validate_json(backend.synthesize("tester_agent", _request("tester_agent", Test)))
+        self.assertEqual({type(question) for question in test.questions}, {McQuestion, TextFieldQuestion})
+        self.assertTrue(all(question.question == REACT_COMPONENT for question in test.questions))
+
+    def test_free_text_templates(self):
+        backend = FakeModelBackend(templates={"info_agent": "Hello"})
+        self.assertEqual(backend.synthesize("explainer_agent", _request("explainer_agent")), REACT_COMPONENT)
+        self.assertTrue(backend.synthesize("image_agent", _request("image_agent")).startswith("https://"))
+        self.assertEqual(backend.synthesize("info_agent", _request("info_agent")), "Hello")
+
+    def test_request_identity(self):
+        self.assertEqual(request_agent(_request("grader_agent")), "grader_agent")
+        self.assertEqual(request_key(_request("a")), request_key(_request("a")))
+        self.assertNotEqual(request_key(_request("a")), request_key(_request("a", text="Other")))
+
+    def test_record_then_replay(self):
+        with tempfile.TemporaryDirectory() as path:
+            recorder = FixtureRecorder(path)
+            recorder.record(_request("planner_agent", text="first"), '{"chapters": []}', 0.5)
+            recorder.record(_request("planner_agent", text="second"), '{"chapters": [1]}', 0.2)
+            backend = FakeModelBackend(mode="replay", fixtures_path=path, time_scale=0)
+
+            async def respond(agent, text):
+                return await backend.respond(_request(agent, LearningPath, text=text))
+
+            # The recorded request, then the agent's recordings in turn, then synthesis
+            self.assertEqual(asyncio.run(respond("planner_agent", "second")), '{"chapters": [1]}')
+            self.assertEqual(asyncio.run(respond("planner_agent", "new")), '{"chapters": []}')
+            self.assertEqual(asyncio.run(respond("planner_agent", "newer")), '{"chapters": [1]}')
+            LearningPath.model_validate_json(asyncio.run(respond("info_agent", "no recordings")))
+            stats = backend.stats()
+            self.assertEqual((stats["replayed"], stats["synthesized"]), (3, 1))
+
+    def test_latency_model(self):
+        rng = random.Random(1)
+        model = LatencyModel.parse("200:0.5")
+        samples = sorted(model.sample(rng) for _ in range(2001))
+        self.assertAlmostEqual(samples[1000], 0.2, delta=0.02)
+        self.assertGreater(samples[-1], 2 * samples[1000])
+        self.assertEqual(LatencyModel.parse("50").sample(rng), 0.05)
+        self.assertEqual(set(parse_latencies("default=800:0.5, explainer_agent=6000")), {"default", "explainer_agent"})
+
+    def test_hashed_embeddings(self):
+        a = hashed_embedding("binary search on sorted arrays")
+        b = hashed_embedding("sorted arrays allow binary search")
+        c = hashed_embedding("photosynthesis in plant cells")
+        self.assertEqual(len(a), 768)
+        self.assertAlmostEqual(math.sqrt(sum(x * x for x in a)), 1.0)
+        dot = lambda x, y: sum(i * j for i, j in zip(x, y))
+        self.assertGreater(dot(a, b), dot(a, c))
+
+        backend = FakeModelBackend()
+        self.assertEqual(len(backend.embed_content("m", "one")["embedding"]), 768)
+        self.assertEqual(len(backend.embed_content("m", ["one", "two"])["embedding"]), 2)
+
+
+class TestFakeLlmInAgents(unittest.TestCase):
+    """The agents' gemini-* models resolve to the installed fake backend"""
+
+    def tearDown(self):
+        uninstall_fake_backend()
+
+    def test_planner_agent_runs_on_fake_backend(self):
+        backend = FakeModelBackend(
+            latencies={"default": LatencyModel(0)}, list_lengths={"chapters": 4}
+        )
+        install_fake_backend(backend)
+        planner = PlannerAgent("test", InMemorySessionService())
+        response = asyncio.run(planner.run(
+            user_id="u1", state={}, content=create_text_query("I want to learn graph algorithms")
+        ))
+        self.assertEqual(response["status"], "success")
+        self.assertEqual(len(response["chapters"]), 4)
+        self.assertEqual(backend.stats()["calls"], {"planner_agent": 1})
+
+    def test_replayed_fixture_in_agent(self):
+        recorded = {"chapters": [{"caption": "Recorded", "content": ["a"], "time": 30, "note": None}]}
+        with tempfile.TemporaryDirectory() as path:
+            with open(f"{path}/planner_agent.jsonl", "w") as f:
+                f.write(json.dumps({"agent": "planner_agent", "key": "-", "text": json.dumps(recorded), "latency_ms": 1}) + "\n")
+            install_fake_backend(FakeModelBackend(mode="replay", fixtures_path=path))
+            planner = PlannerAgent("test", InMemorySessionService())
+            response = asyncio.run(planner.run(user_id="u1", state={}, content=create_text_query("anything")))
+        self.assertEqual(response["chapters"][0]["caption"], "Recorded")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+
+import fitz
+
+from ..src.agents.flashcard_agent.pdf_parser import PDFParser
+from ..src.agents.flashcard_agent.testing_agent import TestingFlashcardAgent
+from ..src.services.data_processors.chunker import iter_overlapping_chunks
+
+
+class _RecordingAgent(TestingFlashcardAgent):
+    """TestingFlashcardAgent whose model call only records what it was asked"""
+
+    def __init__(self, pages_read, delay=0.0):
+        self.pages_read = pages_read
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _generate_chunk_questions(self, chunk, difficulty, chunk_questions):
+        self.calls.append((len(self.pages_read), chunk_questions))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        return [chunk_questions]
+
+
+class TestOverlappingChunks(unittest.TestCase):
+    """Character chunks cut from a page stream"""
+
+    def test_overlap_and_sentence_snapping(self):
+        text = " ".join(f"Sentence {i} is here." for i in range(2000))
+        chunks = list(iter_overlapping_chunks([text], chunk_size=1000, overlap=100))
+        self.assertTrue(all(len(chunk) <= 1000 for chunk in chunks))
+        self.assertTrue(all(chunk.endswith(".") for chunk in chunks))
+        for previous, current in zip(chunks, chunks[1:]):
+            self.assertIn(current[:50], previous[-120:])
+        self.assertTrue(chunks[-1].endswith("Sentence 1999 is here."))
+
+    def test_pages_are_pulled_lazily(self):
+        read = []
+
+        def pages():
+            for i in range(1000):
+                read.append(i)
+                yield f"Page {i}. " * 50
+
+        first = next(iter_overlapping_chunks(pages(), chunk_size=2000, overlap=200))
+        self.assertTrue(first.startswith("Page 0."))
+        self.assertLessEqual(len(read), 6)
+
+    def test_short_input(self):
+        self.assertEqual(list(iter_overlapping_chunks(["a", "b"], 100, 10)), ["a b"])
+        self.assertEqual(list(iter_overlapping_chunks([], 100, 10)), [])
+        with self.assertRaises(ValueError):
+            list(iter_overlapping_chunks(["x"], 100, 50))
+
+
+class TestStreamingQuestionGeneration(unittest.TestCase):
+    """Question generation that starts before the document is fully read"""
+
+    def _pages(self, count, read):
+        for i in range(count):
+            read.append(i)
+            yield f"Page {i}. " + "Dense text about B-trees. " * 50  # > 1000 chars: 2 questions
+
+    def test_first_call_before_all_pages_are_read(self):
+        read = []
+        agent = _RecordingAgent(read, delay=0.01)
+        questions = asyncio.run(agent.generate_questions_from_pages(
+            self._pages(300, read), "medium", total_pages=300, chunk_size=8000, overlap=500
+        ))
+
+        self.assertLess(agent.calls[0][0], 20)
+        self.assertLessEqual(agent.max_in_flight, 3)
+        self.assertEqual(sum(questions), 600)  # 2 per dense page
+
+    def test_question_bounds(self):
+        agent = _RecordingAgent([])
+        questions = asyncio.run(agent.generate_questions_from_pages(["Short page."], "easy", min_questions=5))
+        self.assertEqual(questions, [5])
+
+        read = []
+        agent = _RecordingAgent(read)
+        questions = asyncio.run(agent.generate_questions_from_pages(self._pages(1000, read), "easy", max_questions=50))
+        self.assertEqual(sum(questions), 50)
+        self.assertLess(len(read), 1000)  # reading stops once the cap is reached
+
+    def test_pages_are_read_and_closed_on_one_thread(self):
+        threads = set()
+        closed = []
+
+        def pages():
+            try:
+                for i in range(200):
+                    threads.add(threading.get_ident())
+                    yield f"Page {i}. " + "Dense text about B-trees. " * 50
+            finally:
+                closed.append(threading.get_ident())
+
+        agent = _RecordingAgent([])
+        asyncio.run(agent.generate_questions_from_pages(pages(), "easy", max_questions=20))
+        self.assertEqual(len(threads), 1)
+        self.assertEqual(closed, list(threads))  # closed early, once the cap was reached
+
+    def test_sample_chunk_of_a_pdf(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, "book.pdf")
+            doc = fitz.open()
+            topics = ["normalization", "indexing", "transactions", "recovery"]
+            for i in range(20):
+                text = f"Chapter {i + 1} covers {topics[i % 4]}. " * 20
+                doc.new_page().insert_textbox(fitz.Rect(72, 200, 540, 600), text, fontsize=11)
+            doc.save(pdf_path)
+            doc.close()
+
+            sample = PDFParser().first_chunk(pdf_path, 100)
+        self.assertTrue(sample.startswith("Chapter 1 covers normalization."))
+        self.assertLessEqual(len(sample), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,238 @@
+import asyncio
+import json
+import unittest
+
+from google.adk.sessions import InMemorySessionService
+
+from ..src.api.schemas.course import CourseRequest
+from ..src.db.crud import courses_crud, jobs_crud
+from ..src.db.database import Base, engine, get_db_context
+from ..src.db.models import (
+    Chapter, Course, CourseCheckpoint, Document, Image, Job, JobStatus, PracticeQuestion, Usage, User,
+)
+from ..src.db.models.db_course import CourseStatus
+from ..src.services.agent_service import AgentService
+from ..src.services.job_worker import JobWorker, course_job_handlers, enqueue_course_creation
+from ..src.services.notification_service import WebSocketConnectionManager
+from ..src.services.query_service import QueryService
+from ..src.services.state_service import StateService
+from . import sqlite_types  # noqa: F401  (SQLite column types)
+
+
+def _tables():
+    return [
+        model.__table__
+        for model in (User, Course, Chapter, PracticeQuestion, Job, CourseCheckpoint, Document, Image, Usage)
+    ]
+
+
+class _JobQueueTest(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(engine, tables=_tables())
+        with get_db_context() as db:
+            db.query(Job).delete()
+            db.commit()
+
+    def enqueue(self, user_id="u1", course_id=None, max_attempts=1, **payload):
+        with get_db_context() as db:
+            return jobs_crud.enqueue_job(db, "test", user_id, payload, course_id, max_attempts).id
+
+    def job(self, job_id):
+        with get_db_context() as db:
+            job = jobs_crud.get_job_by_id(db, job_id)
+            db.expunge(job)
+            return job
+
+    async def wait_for(self, condition, timeout=2.0):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not condition():
+            self.assertLess(loop.time(), deadline, "condition not reached")
+            await asyncio.sleep(0.01)
+
+
+class TestJobsCrud(_JobQueueTest):
+    """Claims, leases and cancellation of the jobs table"""
+
+    def claim(self, worker_id="w1", max_per_user=2, lease_seconds=60):
+        with get_db_context() as db:
+            return jobs_crud.claim_next_job(db, worker_id, lease_seconds, max_per_user)
+
+    def test_claims_in_order_with_per_user_cap(self):
+        a1, a2, a3 = (self.enqueue("a") for _ in range(3))
+        b1 = self.enqueue("b")
+        claimed = [self.claim(f"w{i}").id for i in range(3)]
+        # The third job of user a waits until one of theirs finishes
+        self.assertEqual(claimed, [a1, a2, b1])
+        self.assertIsNone(self.claim())
+
+        job = self.job(a1)
+        self.assertEqual((job.status, job.attempts, job.worker_id), (JobStatus.RUNNING, 1, "w0"))
+        with get_db_context() as db:
+            self.assertTrue(jobs_crud.finish_job(db, a1, "w0", JobStatus.SUCCEEDED))
+        self.assertEqual(self.claim().id, a3)
+
+    def test_only_owner_heartbeats_and_finishes(self):
+        job_id = self.enqueue()
+        self.claim("w1")
+        with get_db_context() as db:
+            self.assertIs(jobs_crud.heartbeat_job(db, job_id, "w1", 60), False)
+            self.assertIsNone(jobs_crud.heartbeat_job(db, job_id, "w2", 60))
+            self.assertFalse(jobs_crud.finish_job(db, job_id, "w2", JobStatus.FAILED))
+            jobs_crud.request_cancel(db, job_id)
+            self.assertIs(jobs_crud.heartbeat_job(db, job_id, "w1", 60), True)
+
+    def test_cancel_queued_job(self):
+        job_id = self.enqueue()
+        with get_db_context() as db:
+            self.assertEqual(jobs_crud.request_cancel(db, job_id).status, JobStatus.CANCELLED)
+        self.assertIsNone(self.claim())
+
+    def test_expired_leases_are_retried_then_failed(self):
+        job_id = self.enqueue(max_attempts=2)
+        self.claim("w1", lease_seconds=-1)
+        with get_db_context() as db:
+            self.assertEqual([job.status for job in jobs_crud.expire_leases(db)], [JobStatus.QUEUED])
+            self.assertIsNone(jobs_crud.heartbeat_job(db, job_id, "w1", 60))  # w1 lost the job
+
+        self.assertEqual(self.claim("w2", lease_seconds=-1).attempts, 2)
+        with get_db_context() as db:
+            failed = jobs_crud.expire_leases(db)
+        self.assertEqual([job.status for job in failed], [JobStatus.FAILED])
+        self.assertIn("w2", failed[0].error)
+
+    def test_release_does_not_count_attempt(self):
+        job_id = self.enqueue()
+        self.claim("w1")
+        with get_db_context() as db:
+            self.assertTrue(jobs_crud.release_job(db, job_id, "w1"))
+        job = self.job(job_id)
+        self.assertEqual((job.status, job.attempts, job.worker_id), (JobStatus.QUEUED, 0, None))
+
+
+class TestJobWorker(_JobQueueTest):
+    """JobWorker concurrency, cancellation and shutdown"""
+
+    def setUp(self):
+        super().setUp()
+        self.started = []
+        self.release = None
+
+    def worker(self, **kwargs):
+        async def handler(job):
+            self.started.append(json.loads(job.payload)["name"])
+            await self.release.wait()
+
+        options = dict(concurrency=2, max_per_user=5, lease_seconds=10, heartbeat_seconds=0.02, poll_seconds=0.01)
+        options.update(kwargs)
+        return JobWorker({"test": handler}, **options)
+
+    def test_runs_jobs_up_to_concurrency(self):
+        ids = [self.enqueue(name=f"job{i}") for i in range(3)]
+
+        async def scenario():
+            self.release = asyncio.Event()
+            worker = self.worker()
+            worker.start()
+            await self.wait_for(lambda: len(self.started) == 2)
+            await asyncio.sleep(0.05)
+            self.assertEqual(self.started, ["job0", "job1"])
+            self.release.set()
+            await self.wait_for(lambda: worker.stats()["succeeded"] == 3)
+            await worker.stop()
+
+        asyncio.run(scenario())
+        self.assertEqual({self.job(job_id).status for job_id in ids}, {JobStatus.SUCCEEDED})
+
+    def test_cancel_running_course_job(self):
+        with get_db_context() as db:
+            course_id = courses_crud.create_new_course(db, "cancel-user", 1, "Cancelled course").id
+        job_id = self.enqueue(course_id=course_id, name="course")
+
+        async def scenario():
+            self.release = asyncio.Event()
+            worker = self.worker()
+            worker.start()
+            await self.wait_for(lambda: self.started)
+            with get_db_context() as db:
+                jobs_crud.request_cancel(db, job_id)
+            await self.wait_for(lambda: worker.stats()["cancelled"] == 1)
+            await worker.stop()
+
+        asyncio.run(scenario())
+        self.assertEqual(self.job(job_id).status, JobStatus.CANCELLED)
+        with get_db_context() as db:
+            course = courses_crud.get_course_by_id(db, course_id)
+            self.assertEqual(course.status, CourseStatus.FAILED)
+            self.assertIn("cancelled", course.error_msg)
+
+    def test_shutdown_hands_jobs_back(self):
+        job_id = self.enqueue(name="long")
+
+        async def scenario():
+            self.release = asyncio.Event()
+            worker = self.worker()
+            worker.start()
+            await self.wait_for(lambda: self.started)
+            await worker.stop()
+            self.assertEqual(worker.stats()["released"], 1)
+
+        asyncio.run(scenario())
+        job = self.job(job_id)
+        self.assertEqual((job.status, job.attempts), (JobStatus.QUEUED, 0))
+
+    def test_handler_error_fails_job(self):
+        job_id = self.enqueue()
+
+        async def failing(job):
+            raise RuntimeError("boom")
+
+        async def scenario():
+            worker = JobWorker({"test": failing}, poll_seconds=0.01)
+            worker.start()
+            await self.wait_for(lambda: worker.stats()["failed"] == 1)
+            await worker.stop()
+
+        asyncio.run(scenario())
+        job = self.job(job_id)
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertIn("boom", job.error)
+
+
+class _FailingContentService:
+    async def process_course_documents(self, course_id, documents, on_document_done=None):
+        raise RuntimeError("Vector store unavailable")
+
+
+class TestCourseJobs(_JobQueueTest):
+    """Course creation jobs record the outcome of AgentService.create_course"""
+
+    def test_failed_course_creation_fails_job(self):
+        service = AgentService.__new__(AgentService)
+        service.app_name = "test"
+        service.session_service = InMemorySessionService()
+        service.state_manager = StateService()
+        service.query_service = QueryService(service.state_manager)
+        service.contentService = _FailingContentService()
+
+        request = CourseRequest(query="Graphs", time_hours=2, language="en", difficulty="beginner")
+        with get_db_context() as db:
+            course_id = courses_crud.create_new_course(db, "u1", 2, "Graphs").id
+            job_id = enqueue_course_creation(db, "u1", course_id, request, "task").id
+
+        async def scenario():
+            worker = JobWorker(course_job_handlers(service, WebSocketConnectionManager()), poll_seconds=0.01)
+            worker.start()
+            await self.wait_for(lambda: worker.stats()["failed"] == 1)
+            await worker.stop()
+
+        asyncio.run(scenario())
+        job = self.job(job_id)
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertIn("Vector store unavailable", job.error)
+        with get_db_context() as db:
+            self.assertEqual(courses_crud.get_course_by_id(db, course_id).status, CourseStatus.FAILED)
+
+
+if __name__ == "__main__":
+    unittest.main()
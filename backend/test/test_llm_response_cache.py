@@ -0,0 +1,161 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from google.adk.agents import LlmAgent
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+from pydantic import BaseModel
+
+from ..src.agents import agent as agent_module
+from ..src.agents.agent import StructuredAgent
+from ..src.agents.utils import create_text_query
+from ..src.services.llm_response_cache import LLMResponseCache, make_key
+
+
+class _Grading(BaseModel):
+    points: int
+    explanation: str
+
+
+def _llm_agent(name="grader_agent", model="gemini-2.0-flash", instruction="Grade the answer of {student}."):
+    return LlmAgent(name=name, model=model, instruction=instruction, output_schema=_Grading)
+
+
+class _FakeRunner:
+    """Runner replacement answering every message with a fixed JSON response"""
+
+    def __init__(self, agent, response):
+        self.agent = agent
+        self.response = response
+        self.calls = 0
+
+    async def run_async(self, user_id, session_id, new_message):
+        self.calls += 1
+        content = types.Content(role="model", parts=[types.Part(text=json.dumps(self.response))])
+        yield SimpleNamespace(
+            author=self.agent.name, content=content, actions=None, is_final_response=lambda: True
+        )
+
+
+class _FakeGrader(StructuredAgent):
+    def __init__(self, runner):
+        self.app_name = "test"
+        self.session_service = InMemorySessionService()
+        self.runner = runner
+
+
+class TestLLMResponseCache(unittest.TestCase):
+    """Keys, expiry, eviction and agent integration of the LLM response cache"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "llm.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _cache(self, **kwargs):
+        options = dict(agents=["grader_agent"], ttl_seconds=3600, max_entries=100)
+        options.update(kwargs)
+        return LLMResponseCache(self.path, **options)
+
+    def test_key_depends_on_every_input(self):
+        content = create_text_query("The answer is 42.")
+        base = make_key(_llm_agent(), {"student": "Ada"}, content)
+        self.assertEqual(base, make_key(_llm_agent(), {"student": "Ada"}, create_text_query("The answer is 42.")))
+        variants = [
+            make_key(_llm_agent(name="info_agent"), {"student": "Ada"}, content),
+            make_key(_llm_agent(model="gemini-2.5-pro"), {"student": "Ada"}, content),
+            make_key(_llm_agent(instruction="Grade strictly: {student}."), {"student": "Ada"}, content),
+            make_key(_llm_agent(instruction=lambda _: "Grade the answer of {student}!"), {"student": "Ada"}, content),
+            make_key(_llm_agent(), {"student": "Bob"}, content),
+            make_key(_llm_agent(), {"student": "Ada"}, create_text_query("The answer is 43.")),
+        ]
+        self.assertEqual(len({base, *variants}), len(variants) + 1)
+
+    def test_key_hashes_binary_parts(self):
+        def content(data):
+            return types.Content(role="user", parts=[
+                types.Part(text="Describe the image"),
+                types.Part(inline_data=types.Blob(mime_type="image/png", data=data)),
+            ])
+
+        image = os.urandom(1 << 20)
+        key = make_key(_llm_agent(), {}, content(image))
+        self.assertEqual(key, make_key(_llm_agent(), {}, content(bytes(image))))
+        self.assertNotEqual(key, make_key(_llm_agent(), {}, content(image[:-1] + b"\0")))
+
+    def test_get_put_and_agent_flags(self):
+        cache = self._cache()
+        self.assertIsNone(cache.key_for(_llm_agent(name="chat_agent"), {}, create_text_query("hi")))
+        key = cache.key_for(_llm_agent(), {}, create_text_query("hi"))
+        self.assertIsNone(cache.get(key, "grader_agent"))
+        cache.put(key, "grader_agent", {"status": "success", "points": 3})
+        response = cache.get(key, "grader_agent")
+        self.assertEqual(response, {"status": "success", "points": 3})
+        response["points"] = 0  # callers get their own copy
+        self.assertEqual(cache.get(key, "grader_agent")["points"], 3)
+
+        # Persistent across instances
+        self.assertIsNotNone(self._cache().get(key, "grader_agent"))
+        stats = cache.stats()["agents"]["grader_agent"]
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 1))
+
+    def test_ttl_expiry(self):
+        cache = self._cache(ttl_seconds=10)
+        cache.put("k", "grader_agent", {"status": "success"})
+        with mock.patch("time.time", return_value=time.time() + 11):
+            self.assertIsNone(cache.get("k", "grader_agent"))
+        self.assertEqual(cache.stats()["expired"], 1)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_size_bounded_lru_eviction(self):
+        cache = self._cache(max_entries=10)
+        for i in range(10):
+            cache.put(f"k{i}", "grader_agent", {"i": i})
+        cache.get("k0", "grader_agent")  # recently used survives
+        cache.put("k10", "grader_agent", {"i": 10})
+        self.assertLessEqual(cache.stats()["entries"], 10)
+        self.assertIsNotNone(cache.get("k0", "grader_agent"))
+        self.assertIsNone(cache.get("k1", "grader_agent"))
+        self.assertGreater(cache.stats()["evictions"], 0)
+
+    def test_structured_agent_run_uses_cache(self):
+        cache = self._cache()
+        runner = _FakeRunner(_llm_agent(), {"points": 2, "explanation": "Partially correct"})
+        grader = _FakeGrader(runner)
+
+        async def grade(answer, student="Ada"):
+            return await grader.run(user_id="u1", state={"student": student}, content=create_text_query(answer))
+
+        with mock.patch.object(agent_module, "get_llm_response_cache", return_value=cache):
+            first = asyncio.run(grade("Paris"))
+            second = asyncio.run(grade("Paris"))
+            asyncio.run(grade("Paris", student="Bob"))
+            asyncio.run(grade("Lyon"))
+
+        self.assertEqual(first, {"points": 2, "explanation": "Partially correct", "status": "success"})
+        self.assertEqual(second, first)
+        self.assertEqual(runner.calls, 3)
+        stats = cache.stats()["agents"]["grader_agent"]
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 3))
+
+    def test_disabled_agent_is_not_cached(self):
+        cache = self._cache(agents=["info_agent"])
+        runner = _FakeRunner(_llm_agent(), {"points": 1, "explanation": "-"})
+        grader = _FakeGrader(runner)
+        with mock.patch.object(agent_module, "get_llm_response_cache", return_value=cache):
+            for _ in range(2):
+                asyncio.run(grader.run(user_id="u1", state={}, content=create_text_query("x")))
+        self.assertEqual(runner.calls, 2)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
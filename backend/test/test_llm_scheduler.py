@@ -0,0 +1,278 @@
+import asyncio
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from google.adk.agents import LlmAgent
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from ..src.agents import agent as agent_module
+from ..src.agents.agent import StandardAgent
+from ..src.agents.utils import create_text_query
+from ..src.services.llm_scheduler import LLMScheduler, Priority, TokenBucket, llm_context, parse_rate_limits
+
+
+def _scheduler(**kwargs):
+    options = dict(max_in_flight=1, rate_limits={}, default_rpm=0, burst_seconds=5, aging_seconds=0)
+    options.update(kwargs)
+    return LLMScheduler(**options)
+
+
+async def _run(scheduler, order, name, priority=Priority.COURSE_CREATION, user_id="system", model="m", duration=0.0):
+    async with scheduler.slot(model, priority, user_id):
+        order.append(name)
+        await asyncio.sleep(duration)
+
+
+async def _gated(scheduler, jobs):
+    """Queue all jobs behind one running blocker and return the order they were granted in"""
+    order = []
+    gate = asyncio.Event()
+
+    async def blocker():
+        async with scheduler.slot("m", Priority.CHAT, "blocker"):
+            await gate.wait()
+
+    blocking = asyncio.create_task(blocker())
+    await asyncio.sleep(0)
+    tasks = []
+    for job in jobs:
+        tasks.append(asyncio.create_task(_run(scheduler, order, **job)))
+        await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(blocking, *tasks)
+    return order
+
+
+class _FakeRunner:
+    """Runner replacement that records when its model call was granted"""
+
+    def __init__(self, order, name):
+        self.agent = LlmAgent(name="flashcard_agent", model="m")
+        self.order = order
+        self.name = name
+
+    async def run_async(self, user_id, session_id, new_message):
+        self.order.append(self.name)
+        content = types.Content(role="model", parts=[types.Part(text="Answer")])
+        yield SimpleNamespace(author=self.agent.name, content=content, actions=None, is_final_response=lambda: True)
+
+
+class _FakeFlashcardAgent(StandardAgent):
+    priority = Priority.FLASHCARDS
+
+    def __init__(self, runner):
+        self.app_name = "test"
+        self.session_service = InMemorySessionService()
+        self.runner = runner
+
+
+class TestLLMScheduler(unittest.TestCase):
+    """Admission order, limits and metrics of the LLM scheduler"""
+
+    def test_in_flight_cap(self):
+        scheduler = _scheduler(max_in_flight=3)
+        running = 0
+        peak = 0
+
+        async def job():
+            nonlocal running, peak
+            async with scheduler.slot("m"):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        async def main():
+            await asyncio.gather(*(job() for _ in range(12)))
+
+        asyncio.run(main())
+        self.assertEqual(peak, 3)
+        self.assertEqual(scheduler.stats()["in_flight"], 0)
+        self.assertEqual(scheduler.stats()["granted"], 12)
+
+    def test_priority_order(self):
+        scheduler = _scheduler()
+        order = asyncio.run(_gated(scheduler, [
+            {"name": "flashcards", "priority": Priority.FLASHCARDS},
+            {"name": "course", "priority": Priority.COURSE_CREATION},
+            {"name": "grading", "priority": Priority.GRADING},
+            {"name": "chat", "priority": Priority.CHAT},
+        ]))
+        self.assertEqual(order, ["chat", "grading", "course", "flashcards"])
+
+    def test_round_robin_between_users(self):
+        scheduler = _scheduler()
+        jobs = [{"name": f"a{i}", "user_id": "a"} for i in range(4)]
+        jobs += [{"name": f"b{i}", "user_id": "b"} for i in range(2)]
+        order = asyncio.run(_gated(scheduler, jobs))
+        self.assertEqual(order, ["a0", "b0", "a1", "b1", "a2", "a3"])
+
+    def test_aging_prevents_starvation(self):
+        scheduler = _scheduler(aging_seconds=0.05)
+
+        async def main():
+            order = []
+            gate = asyncio.Event()
+
+            async def blocker():
+                async with scheduler.slot("m", Priority.CHAT, "blocker"):
+                    await gate.wait()
+
+            blocking = asyncio.create_task(blocker())
+            await asyncio.sleep(0)
+            old = asyncio.create_task(_run(scheduler, order, "flashcards", Priority.FLASHCARDS))
+            await asyncio.sleep(0.2)  # ages by four classes
+            new = asyncio.create_task(_run(scheduler, order, "course", Priority.COURSE_CREATION))
+            await asyncio.sleep(0)
+            gate.set()
+            await asyncio.gather(blocking, old, new)
+            return order
+
+        self.assertEqual(asyncio.run(main()), ["flashcards", "course"])
+
+    def test_rate_limit_delays_grants(self):
+        # 600 rpm = 10 per second, bucket of 2
+        scheduler = _scheduler(max_in_flight=10, rate_limits={"slow": 600}, burst_seconds=0.2)
+
+        async def main():
+            order = []
+            start = time.monotonic()
+            await asyncio.gather(*(_run(scheduler, order, i, model="slow") for i in range(5)))
+            return time.monotonic() - start
+
+        elapsed = asyncio.run(main())
+        # 2 immediately, 3 more at 100 ms intervals
+        self.assertGreaterEqual(elapsed, 0.25)
+        self.assertLess(elapsed, 1.0)
+        self.assertGreater(scheduler.stats()["rate_limited"], 0)
+
+    def test_rate_limit_is_per_model(self):
+        scheduler = _scheduler(max_in_flight=10, rate_limits={"slow": 6}, burst_seconds=10)
+
+        async def main():
+            order = []
+            await _run(scheduler, order, "slow-1", model="slow")
+            slow = asyncio.create_task(_run(scheduler, order, "slow-2", model="slow"))
+            await asyncio.wait_for(_run(scheduler, order, "fast", model="fast"), 1)
+            slow.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await slow
+            return order
+
+        self.assertEqual(asyncio.run(main()), ["slow-1", "fast"])
+        self.assertEqual(scheduler.stats()["queued"], 0)
+
+    def test_cancelled_waiter_leaves_queue(self):
+        scheduler = _scheduler()
+
+        async def main():
+            order = []
+            gate = asyncio.Event()
+
+            async def blocker():
+                async with scheduler.slot("m"):
+                    await gate.wait()
+
+            blocking = asyncio.create_task(blocker())
+            await asyncio.sleep(0)
+            waiting = asyncio.create_task(_run(scheduler, order, "cancelled"))
+            await asyncio.sleep(0)
+            self.assertEqual(scheduler.stats()["queued"], 1)
+            waiting.cancel()
+            await asyncio.sleep(0)
+            gate.set()
+            await blocking
+            await _run(scheduler, order, "next")
+            return order
+
+        self.assertEqual(asyncio.run(main()), ["next"])
+        stats = scheduler.stats()
+        self.assertEqual((stats["in_flight"], stats["queued"]), (0, 0))
+
+    def test_failed_run_releases_slot(self):
+        scheduler = _scheduler()
+
+        async def main():
+            with self.assertRaises(RuntimeError):
+                async with scheduler.slot("m"):
+                    raise RuntimeError("model error")
+            await asyncio.wait_for(_run(scheduler, [], "next"), 1)
+
+        asyncio.run(main())
+        self.assertEqual(scheduler.stats()["in_flight"], 0)
+
+    def test_context_overrides_user_and_priority(self):
+        scheduler = _scheduler()
+
+        async def main():
+            gate = asyncio.Event()
+
+            async def blocker():
+                async with scheduler.slot("m"):
+                    await gate.wait()
+
+            blocking = asyncio.create_task(blocker())
+            await asyncio.sleep(0)
+            with llm_context(user_id="deck-1", priority=Priority.FLASHCARDS):
+                waiting = asyncio.create_task(_run(scheduler, [], "x", Priority.CHAT, "someone"))
+            await asyncio.sleep(0)
+            stats = scheduler.stats()["priorities"]
+            gate.set()
+            await asyncio.gather(blocking, waiting)
+            return stats
+
+        stats = asyncio.run(main())
+        self.assertEqual(stats["flashcards"]["queued"], 1)
+        self.assertEqual(stats["chat"]["queued"], 0)
+
+    def test_chat_context_raises_agent_priority(self):
+        scheduler = _scheduler()
+
+        async def main():
+            order = []
+            gate = asyncio.Event()
+
+            async def blocker():
+                async with scheduler.slot("m", Priority.CHAT, "blocker"):
+                    await gate.wait()
+
+            async def agent_in_chat():
+                agent = _FakeFlashcardAgent(_FakeRunner(order, "chat agent"))
+                with llm_context(priority=Priority.CHAT):
+                    await agent.run("u1", {}, create_text_query("Explain"))
+
+            blocking = asyncio.create_task(blocker())
+            await asyncio.sleep(0)
+            grading = asyncio.create_task(_run(scheduler, order, "grading", Priority.GRADING, "u2"))
+            await asyncio.sleep(0)
+            chat = asyncio.create_task(agent_in_chat())
+            for _ in range(5):  # let the agent reach the scheduler
+                await asyncio.sleep(0)
+            gate.set()
+            await asyncio.gather(blocking, grading, chat)
+            return order
+
+        with mock.patch.object(agent_module, "llm_scheduler", scheduler), \
+                mock.patch.object(agent_module, "get_llm_response_cache", lambda: None):
+            order = asyncio.run(main())
+        # Priority.CHAT is 0 and must not be mistaken for "no context"
+        self.assertEqual(order, ["chat agent", "grading"])
+
+    def test_parse_rate_limits_and_bucket(self):
+        self.assertEqual(
+            parse_rate_limits("gemini-2.0-flash=1000, gemini-2.5-pro=150,"),
+            {"gemini-2.0-flash": 1000.0, "gemini-2.5-pro": 150.0},
+        )
+        bucket = TokenBucket(60, 2)
+        now = bucket.updated
+        bucket.take(now)
+        bucket.take(now)
+        self.assertAlmostEqual(bucket.delay(now), 1.0)
+        self.assertEqual(bucket.delay(now + 1.0), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import io
+import os
+import tempfile
+import threading
+import unittest
+
+import fitz
+import numpy as np
+from PIL import Image
+
+from ..src.services.page_renderer import PageRenderer
+from ..src.services.pdf_extraction import PDFExtractionPool
+
+
+def _photo():
+    """A smooth, slightly noisy image, like a photo on a lecture slide"""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:300, 0:400]
+    rgb = np.stack([x * 0.6, y * 0.8, (x + y) * 0.3], axis=-1) + rng.normal(0, 6, (300, 400, 3))
+    buffer = io.BytesIO()
+    Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _write_pdf(directory, pages):
+    doc = fitz.open()
+    photo = _photo()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), f"Slide {i + 1}\n" + "Normal forms and joins. " * 60, fontsize=11)
+        page.insert_image(fitz.Rect(100, 480, 500, 780), stream=photo)
+    path = os.path.join(directory, "slides.pdf")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+class TestPageRenderer(unittest.TestCase):
+    """Cached PyMuPDF page rendering for learning flashcards"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.pdf_path = _write_pdf(self.tmp_dir.name, 12)
+        self.cache_dir = os.path.join(self.tmp_dir.name, "images")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_overlapping_chapters_render_pages_once(self):
+        renderer = PageRenderer(path=self.cache_dir, pool=None)
+        first = renderer.render(self.pdf_path, [0, 1, 2, 3])
+        second = renderer.render(self.pdf_path, [2, 3, 4, 99])
+
+        self.assertEqual(first[2:], second[:2])
+        self.assertEqual(len(second), 3)
+        self.assertEqual(renderer.stats(), {"hits": 2, "rendered": 5})
+        self.assertTrue(all(os.path.exists(path) for path in first + second))
+
+        # A new renderer (e.g. after a restart) reuses the stored images
+        restarted = PageRenderer(path=self.cache_dir, pool=None)
+        restarted.render(self.pdf_path, [0, 4])
+        self.assertEqual(restarted.stats(), {"hits": 2, "rendered": 0})
+
+    def test_formats_and_width(self):
+        sizes = {}
+        for image_format in ("png", "jpeg", "webp"):
+            renderer = PageRenderer(path=self.cache_dir, image_format=image_format, width=600, pool=None)
+            path = renderer.render(self.pdf_path, [0])[0]
+            sizes[image_format] = os.path.getsize(path)
+            with Image.open(path) as image:
+                self.assertEqual(image.width, 600)
+        self.assertLess(sizes["jpeg"], sizes["png"])
+        self.assertLess(sizes["webp"], sizes["png"])
+
+        with self.assertRaises(ValueError):
+            PageRenderer(path=self.cache_dir, image_format="gif")
+
+    def test_parallel_matches_serial(self):
+        pool = PDFExtractionPool(max_workers=2)
+        try:
+            parallel = PageRenderer(path=os.path.join(self.tmp_dir.name, "a"), pool=pool, min_parallel_pages=2)
+            serial = PageRenderer(path=os.path.join(self.tmp_dir.name, "b"), pool=None)
+            for a, b in zip(parallel.render(self.pdf_path, range(12)), serial.render(self.pdf_path, range(12))):
+                with open(a, "rb") as fa, open(b, "rb") as fb:
+                    self.assertEqual(fa.read(), fb.read())
+        finally:
+            pool.shutdown()
+
+    def test_concurrent_renders(self):
+        # Requests render on helper threads at the same time, PyMuPDF calls must not interleave
+        directories = [os.path.join(self.tmp_dir.name, f"deck_{i}") for i in range(4)]
+        pdf_paths = []
+        for directory in directories:
+            os.makedirs(directory)
+            pdf_paths.append(_write_pdf(directory, 3 + len(pdf_paths)))
+        expected = [
+            PageRenderer(path=os.path.join(directory, "serial"), pool=None).render(path, range(6))
+            for directory, path in zip(directories, pdf_paths)
+        ]
+
+        renderer = PageRenderer(path=os.path.join(self.tmp_dir.name, "shared"), pool=None)
+        results = {}
+        threads = [
+            threading.Thread(target=lambda i=i: results.setdefault(i, renderer.render(pdf_paths[i], range(6))))
+            for i in range(len(pdf_paths))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for i, serial_files in enumerate(expected):
+            self.assertEqual(len(results[i]), 3 + i)
+            for a, b in zip(results[i], serial_files):
+                with open(a, "rb") as fa, open(b, "rb") as fb:
+                    self.assertEqual(fa.read(), fb.read())
+
+    def test_disk_size_cap(self):
+        renderer = PageRenderer(path=self.cache_dir, max_disk_bytes=1, pool=None)
+        renderer.render(self.pdf_path, [0, 1])
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+import numpy as np
+
+from ..src.services.data_processors.paragraph_dedup import ParagraphDeduplicator
+
+
+def _paragraphs(texts):
+    return [{"text": text, "page_number": page} for page, text in enumerate(texts, start=1)]
+
+
+class TestParagraphDeduplicator(unittest.TestCase):
+    """Exact and MinHash near-duplicate elimination"""
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        vocabulary = [f"word{i}" for i in range(5000)]
+        self.content = [" ".join(rng.choice(vocabulary, size=80)) for _ in range(200)]
+
+    def test_exact_duplicates_ignore_case_and_whitespace(self):
+        deduplicator = ParagraphDeduplicator()
+        kept = deduplicator.deduplicate(
+            _paragraphs([self.content[0], "  " + self.content[0].upper(), self.content[1]])
+        )
+        self.assertEqual([p["page_number"] for p in kept], [1, 3])
+        self.assertEqual(deduplicator.stats.exact_duplicates, 1)
+
+    def test_footer_with_changing_page_number(self):
+        footer = (
+            "Copyright 2024 University of Example. All rights reserved. Lecture notes for "
+            "Introduction to Databases, distributed to enrolled students only. Page {} of 40"
+        )
+        texts = []
+        for page in range(40):
+            texts.extend([self.content[page], footer.format(page + 1)])
+
+        deduplicator = ParagraphDeduplicator(threshold=0.8)
+        kept = deduplicator.deduplicate(_paragraphs(texts))
+
+        self.assertEqual(len(kept), 41)
+        self.assertEqual(deduplicator.stats.near_duplicates, 39)
+        self.assertEqual(deduplicator.stats.as_dict()["unique_out"], 41)
+
+    def test_distinct_paragraphs_are_kept(self):
+        deduplicator = ParagraphDeduplicator()
+        kept = deduplicator.deduplicate(_paragraphs(self.content))
+        self.assertEqual(len(kept), len(self.content))
+        self.assertEqual(deduplicator.stats.removed, 0)
+
+    def test_threshold_is_tunable(self):
+        base = self.content[0].split()
+        edited = " ".join(base[:60] + self.content[1].split()[:20])  # ~60% shingle overlap
+
+        strict = ParagraphDeduplicator(threshold=0.9)
+        loose = ParagraphDeduplicator(threshold=0.4)
+
+        self.assertEqual(len(strict.deduplicate(_paragraphs([self.content[0], edited]))), 2)
+        self.assertEqual(len(loose.deduplicate(_paragraphs([self.content[0], edited]))), 1)
+
+    def test_state_spans_documents(self):
+        deduplicator = ParagraphDeduplicator()
+        deduplicator.deduplicate(_paragraphs(self.content[:10]))
+        kept = deduplicator.deduplicate(_paragraphs(self.content[5:15]))
+        self.assertEqual(len(kept), 5)
+        self.assertEqual(deduplicator.stats.paragraphs_in, 20)
+        self.assertEqual(deduplicator.stats.unique_out, 15)
+
+    def test_body_text_differing_in_figures_is_kept(self):
+        texts = [
+            f"In {year} the company reported revenue of {revenue} million euros and an operating loss of "
+            f"{loss} million euros, mainly caused by restructuring costs in the European division."
+            for year, revenue, loss in ((2019, 120, 15), (2020, 340, 2), (2021, 410, 7))
+        ]
+        deduplicator = ParagraphDeduplicator()
+        self.assertEqual(len(deduplicator.deduplicate(_paragraphs(texts))), 3)
+        self.assertEqual(deduplicator.stats.near_duplicates, 0)
+
+    def test_short_lines_ignore_numbers(self):
+        deduplicator = ParagraphDeduplicator()
+        kept = deduplicator.deduplicate(_paragraphs(["Lecture 3 - Databases WS 2024", "Lecture 4 - Databases WS 2024", "12 / 40"]))
+        self.assertEqual([p["page_number"] for p in kept], [1, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+
+import fitz
+
+from ..src.services.pdf_extraction import PDFExtractionPool, extract_pdf, iter_page_texts, page_ranges
+from ..src.services.pdf_extraction_cache import PDFExtractionCache
+
+
+def _make_pdf(pages, title="Lecture"):
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {i + 1} of {title}")
+    doc.set_metadata({"title": title, "author": "Tester"})
+    doc.set_toc([[1, "Intro", 1], [1, "Outro", pages]])
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class TestPDFExtractionCache(unittest.TestCase):
+    """Parse-once behaviour of the shared PDF extraction cache"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.pdf = _make_pdf(3)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_extraction_content(self):
+        extraction = PDFExtractionCache(path=self.tmp_dir.name).get(self.pdf)
+        self.assertEqual(extraction.page_count, 3)
+        self.assertIn("Page 2 of Lecture", extraction.pages[1])
+        self.assertEqual(extraction.toc, [[1, "Intro", 1], [1, "Outro", 3]])
+        self.assertEqual(extraction.metadata["author"], "Tester")
+
+    def test_parsed_once_in_memory_and_on_disk(self):
+        cache = PDFExtractionCache(path=self.tmp_dir.name)
+        first = cache.get(self.pdf)
+        self.assertIs(cache.get(self.pdf), first)
+        self.assertEqual((cache.misses, cache.memory_hits), (1, 1))
+
+        # A new process (fresh cache object) reads the stored entry instead of parsing
+        restarted = PDFExtractionCache(path=self.tmp_dir.name)
+        reloaded = restarted.get(self.pdf)
+        self.assertEqual((restarted.misses, restarted.disk_hits), (0, 1))
+        self.assertEqual(reloaded.pages, first.pages)
+        self.assertEqual(reloaded.toc, first.toc)
+
+    def test_get_file(self):
+        pdf_path = os.path.join(self.tmp_dir.name, "upload.pdf")
+        with open(pdf_path, "wb") as f:
+            f.write(self.pdf)
+        cache = PDFExtractionCache(path=None)
+        self.assertEqual(cache.get_file(pdf_path).page_count, 3)
+        cache.get(self.pdf)
+        self.assertEqual(cache.misses, 1)
+
+    def test_concurrent_callers_parse_once(self):
+        cache = PDFExtractionCache(path=self.tmp_dir.name)
+        threads = [threading.Thread(target=cache.get, args=(self.pdf,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(cache.misses, 1)
+
+    def test_disk_size_cap(self):
+        cache = PDFExtractionCache(path=self.tmp_dir.name, memory_entries=0, max_disk_bytes=1)
+        cache.get(self.pdf)
+        cache.get(_make_pdf(2, title="Other"))
+        stored = [name for name in os.listdir(self.tmp_dir.name) if name.endswith(".json.gz")]
+        self.assertEqual(len(stored), 0)
+
+
+def _make_text_pdf(pages):
+    """Pages full of text, so extraction time is dominated by the text layer"""
+    doc = fitz.open()
+    line = "Relational algebra defines selection, projection, joins and set operations. "
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), f"Page {i + 1}. " + line * 40, fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class TestPDFExtractionPool(unittest.TestCase):
+    """Page-parallel extraction on a process pool versus the serial path"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = PDFExtractionPool(max_workers=4, min_pages=64)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown()
+
+    def test_page_ranges_cover_all_pages_in_order(self):
+        ranges = page_ranges(1000, workers=4)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], 1000)
+        self.assertTrue(all(a[1] == b[0] for a, b in zip(ranges, ranges[1:])))
+        self.assertEqual(page_ranges(5, workers=4), [(0, 5)])
+
+    def test_parallel_matches_serial(self):
+        data = _make_text_pdf(100)
+        serial = extract_pdf(data)
+        parallel = self.pool.extract(data, parallel=True)
+        self.assertEqual(parallel.pages, serial.pages)
+        self.assertEqual(parallel.sha256, serial.sha256)
+        self.assertIn("Page 73.", parallel.pages[72])
+
+    def test_concurrent_serial_extractions(self):
+        documents = [_make_text_pdf(pages) for pages in range(5, 13)]
+        expected = [extract_pdf(data).pages for data in documents]
+        results = {}
+
+        def extract(index):
+            data = documents[index]
+            results[index] = (self.pool.extract(data, parallel=False).pages, list(iter_page_texts(data)))
+
+        threads = [threading.Thread(target=extract, args=(i,)) for i in range(len(documents)) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for index, pages in enumerate(expected):
+            self.assertEqual(results[index], (pages, pages))
+
+    def test_async_api(self):
+        data = _make_text_pdf(70)
+        extraction = asyncio.run(self.pool.extract_async(data))
+        self.assertEqual(extraction.page_count, 70)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import tempfile
+import unittest
+
+import fitz
+
+from ..src.services.data_processors.chunker import count_tokens
+from ..src.services.pdf_extraction import extract_pdf, iter_page_texts
+from ..src.services.pdf_extraction_cache import PDFExtractionCache
+
+TOPICS = ["Relational algebra", "Joins", "Normal forms", "Transactions", "Indexes", "Recovery"]
+
+
+def _make_slides(count, body_sentences=4):
+    """A landscape slide deck: course header, slide title, short body, footer with slide number"""
+    doc = fitz.open()
+    for i in range(count):
+        page = doc.new_page(width=842, height=595)
+        page.insert_text((40, 30), f"Database Systems WS 2024/25 - Lecture {i // 10 + 1}", fontsize=10)
+        page.insert_text((40, 110), f"{TOPICS[i % len(TOPICS)]} part {i}", fontsize=24)
+        body = " ".join(f"Point {j} on {TOPICS[i % len(TOPICS)].lower()} for slide {i}." for j in range(body_sentences))
+        page.insert_textbox(fitz.Rect(40, 140, 800, 480), body, fontsize=14)
+        page.insert_text((40, 575), "Technical University of Munich | Chair of Database Systems", fontsize=9)
+        page.insert_text((780, 575), f"{i + 1} / {count}", fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class TestBoilerplateStripping(unittest.TestCase):
+    """Running headers, footers and page numbers detected from block positions"""
+
+    def test_headers_footers_and_numbers_are_removed(self):
+        extraction = extract_pdf(_make_slides(12))
+        raw, body = extraction.pages[4], extraction.body_pages[4]
+
+        self.assertEqual(extraction.pages[4], fitz.open(stream=_make_slides(12))[4].get_text())
+        self.assertIn("Database Systems WS", raw)
+        self.assertIn("Technical University", raw)
+        self.assertNotIn("Database Systems WS", body)
+        self.assertNotIn("Technical University", body)
+        self.assertNotIn("5 / 12", body)
+        self.assertIn("Indexes part 4", body)
+        self.assertIn("Point 3 on indexes for slide 4.", body)
+
+    def test_rare_band_text_is_kept(self):
+        doc = fitz.open()
+        for i in range(10):
+            page = doc.new_page()
+            page.insert_text((72, 40), "Appendix A" if i == 7 else f"Chapter title {chr(65 + i)}")
+            page.insert_text((72, 400), f"Body of page {i}.")
+            page.insert_text((300, 820), str(i + 1))
+        extraction = extract_pdf(doc.tobytes())
+        self.assertIn("Appendix A", extraction.body_pages[7])
+        self.assertIn("Chapter title C", extraction.body_pages[2])
+        self.assertNotIn("8", extraction.body_pages[7].replace("Body of page 7.", ""))
+
+    def test_short_documents_are_untouched(self):
+        extraction = extract_pdf(_make_slides(2))
+        self.assertIn("Technical University", extraction.body_pages[0])
+        self.assertNotIn("1 / 2", extraction.body_pages[0])  # bare page numbers always go
+
+    def test_streaming_matches_full_extraction(self):
+        data = _make_slides(40)
+        self.assertEqual(list(iter_page_texts(data, strip=True)), extract_pdf(data).body_pages)
+        self.assertEqual(list(iter_page_texts(data)), extract_pdf(data).pages)
+
+    def test_bands_survive_the_disk_cache(self):
+        data = _make_slides(12)
+        with tempfile.TemporaryDirectory() as path:
+            PDFExtractionCache(path=path).get(data)
+            reloaded = PDFExtractionCache(path=path).get(data)
+            self.assertEqual(reloaded.body_pages, extract_pdf(data).body_pages)
+
+    def test_stripping_reduces_tokens(self):
+        extraction = extract_pdf(_make_slides(60, body_sentences=2))
+        raw_tokens = sum(count_tokens(page) for page in extraction.pages)
+        body_tokens = sum(count_tokens(page) for page in extraction.body_pages)
+        self.assertLess(body_tokens, raw_tokens * 0.8)
+
+
+if __name__ == "__main__":
+    unittest.main()
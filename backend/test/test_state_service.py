@@ -0,0 +1,113 @@
+import asyncio
+import copy
+import json
+import unittest
+
+from google.adk.sessions import InMemorySessionService
+
+from ..src.db.crud import courses_crud
+from ..src.db.database import Base, engine
+from ..src.db.models import Course, CourseStateRecord
+from ..src.services.state_service import CourseState, StateService
+from . import sqlite_types  # noqa: F401  (SQLite column types)
+
+
+CHAPTERS = [
+    {"caption": f"Chapter {i}", "content": [f"Point {i}.1", f"Point {i}.2"], "time": 30, "note": None}
+    for i in range(1, 4)
+]
+
+
+def _legacy_chapters_str(chapters):
+    chapters_str = ""
+    for chapter in chapters:
+        chapters_str += \
+        f"""
+            \n
+            Caption: {chapter['caption']}
+            Content Summary: \n{json.dumps(chapter['content'], indent=2)}
+            """
+    return chapters_str
+
+
+class TestStateService(unittest.TestCase):
+    """Snapshots, bounds and the shared backend of the course state store"""
+
+    def setUp(self):
+        Base.metadata.create_all(engine, tables=[Course.__table__, CourseStateRecord.__table__])
+
+    def _service(self, **kwargs):
+        service = StateService(**{"backend": "memory", "max_courses": 10, **kwargs})
+        service.create_state("u1", 1, CourseState(query="Graphs", language="en"))
+        service.save_chapters("u1", 1, CHAPTERS[:2])
+        service.save_chapters("u1", 1, CHAPTERS[2:])
+        return service
+
+    def test_snapshots_are_shared_and_read_only(self):
+        service = self._service()
+        state = service.get_state("u1", 1)
+        self.assertIs(service.get_state("u1", 1), state)
+        with self.assertRaises(TypeError):
+            state["query"] = "Other"
+        with self.assertRaises(TypeError):
+            state["chapters"][0]["caption"] = "Other"
+
+        service.update_state("u1", 1, code="export default () => null;")
+        updated = service.get_state("u1", 1)
+        self.assertIsNot(updated, state)
+        self.assertEqual((state["code"], updated["code"]), ("", "export default () => null;"))
+        self.assertIs(updated["chapters"], state["chapters"])
+
+    def test_same_content_as_before(self):
+        state = self._service().get_state("u1", 1)
+        self.assertEqual(state["chapters_str"], _legacy_chapters_str(CHAPTERS))
+        expected = CourseState(query="Graphs", language="en", chapters=CHAPTERS, chapters_str=_legacy_chapters_str(CHAPTERS))
+        self.assertEqual(json.loads(json.dumps(state)), expected.model_dump())
+
+        plain = copy.deepcopy(state)
+        plain["chapters"][0]["caption"] = "Changed"
+        self.assertEqual(state["chapters"][0]["caption"], "Chapter 1")
+
+    def test_adk_session_from_snapshot(self):
+        state = self._service().get_state("u1", 1)
+        sessions = InMemorySessionService()
+        session = asyncio.run(sessions.create_session(app_name="test", user_id="u1", state=state))
+        self.assertEqual(session.state["chapters"][2]["caption"], "Chapter 3")
+        session.state["chapters"].append({})  # the session's copy is an ordinary dict
+
+    def test_bounded_and_evicted(self):
+        service = self._service(max_courses=2)
+        service.create_state("u1", 2, CourseState(query="Two"))
+        service.get_state("u1", 1)
+        service.create_state("u1", 3, CourseState(query="Three"))
+        stats = service.stats()
+        self.assertEqual((stats["courses"], stats["evictions"]), (2, 1))
+        self.assertGreater(stats["approx_bytes"], len(_legacy_chapters_str(CHAPTERS)))
+
+        service.evict("u1", 1)
+        self.assertEqual(service.stats()["courses"], 1)
+
+    def test_finished_course_falls_back_to_course_row(self):
+        from ..src.db.database import get_db_context
+
+        with get_db_context() as db:
+            course_id = courses_crud.create_new_course(db, "u1", 3, "Dynamic programming", language="de").id
+        service = StateService(backend="memory")
+        state = service.get_state("u1", course_id)
+        self.assertEqual((state["query"], state["language"], state["time_hours"]), ("Dynamic programming", "de", 3))
+        self.assertEqual(service.get_state("u1", 10 ** 6)["query"], "")
+
+    def test_database_backend_is_shared(self):
+        first = self._service(backend="database")
+        second = StateService(backend="database")
+        self.assertEqual(second.get_state("u1", 1)["chapters_str"], _legacy_chapters_str(CHAPTERS))
+
+        first.update_state("u1", 1, errors="Line 3: missing import")
+        self.assertEqual(second.get_state("u1", 1)["errors"], "Line 3: missing import")
+
+        second.evict("u1", 1)
+        self.assertEqual(first.get_state("u1", 1)["chapters"], ())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+import fitz
+
+from ..src.services.data_processors.text_preview import iter_text_chunks, text_preview
+from ..src.services.pdf_extraction import iter_page_texts
+
+
+class TestTextPreview(unittest.TestCase):
+    """Early-terminating previews for the info agent query"""
+
+    def _naive(self, text, lines=10):
+        return "\n".join(text.strip().splitlines()[:lines])
+
+    def test_matches_full_decode(self):
+        text = "\n\n  " + "\n".join(f"line {i} with ünïcödé" for i in range(500))
+        data = text.encode("utf-8")
+        # Tiny chunks split multi-byte characters across chunk borders
+        self.assertEqual(text_preview(iter_text_chunks(data, chunk_size=7)), self._naive(text))
+        self.assertEqual(text_preview(iter_text_chunks(b"")), "")
+
+    def test_stops_reading_early(self):
+        consumed = []
+
+        def chunks():
+            for i in range(10000):
+                consumed.append(i)
+                yield f"row {i}\n"
+
+        preview = text_preview(chunks(), max_lines=3)
+
+        self.assertEqual(preview, "row 0\nrow 1\nrow 2")
+        self.assertLessEqual(len(consumed), 4)
+
+    def test_char_limit(self):
+        preview = text_preview(iter_text_chunks(b"x" * 100000, chunk_size=1024), max_chars=500)
+        self.assertEqual(len(preview), 500)
+
+    def test_pdf_pages_are_parsed_lazily(self):
+        doc = fitz.open()
+        for i in range(50):
+            doc.new_page().insert_text((72, 72), "\n".join(f"page {i} line {j}" for j in range(4)))
+        data = doc.tobytes()
+        doc.close()
+
+        pages = iter_page_texts(data)
+        preview = text_preview(pages, max_lines=6)
+
+        self.assertEqual(preview.splitlines()[0], "page 0 line 0")
+        self.assertEqual(preview.splitlines()[-1], "page 1 line 1")
+        # The generator stopped after the second page
+        self.assertEqual(sum(1 for _ in pages), 48)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,304 @@
+import json
+import tempfile
+import unittest
+
+import numpy as np
+
+from ..src.services.vector_backends import (
+    NumpyVectorBackend,
+    QueryResult,
+    TiDBSharedVectorBackend,
+    TiDBVectorBackend,
+    matches_filter,
+    to_sql_filter,
+    to_tidb_filter,
+)
+from ..src.services.vector_quantization import dequantize, quantize
+
+
+class TestNumpyVectorBackend(unittest.TestCase):
+    """Correctness checks for the in-process reference vector backend"""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(42)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.backend = NumpyVectorBackend(path=self.tmp_dir.name, mmap=True, dimension=32)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _insert_random(self, collection, count, dimension=32):
+        vectors = self.rng.normal(size=(count, dimension)).astype(np.float32)
+        ids = [f"doc_{i}" for i in range(count)]
+        self.backend.insert(
+            collection,
+            ids=ids,
+            texts=[f"text {i}" for i in range(count)],
+            embeddings=vectors.tolist(),
+            metadatas=[{"document_id": i % 3, "page_number": i} for i in range(count)],
+        )
+        return ids, vectors
+
+    @staticmethod
+    def _brute_force(vectors, query, k):
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        scores = normalized @ (query / np.linalg.norm(query))
+        return list(np.argsort(-scores)[:k])
+
+    def test_top_k_matches_brute_force(self):
+        ids, vectors = self._insert_random("course_1", 500)
+        query = self.rng.normal(size=32)
+
+        results = self.backend.query("course_1", query.tolist(), k=10)
+
+        expected = [ids[i] for i in self._brute_force(vectors, query, 10)]
+        self.assertEqual([result.id for result in results], expected)
+        distances = [result.distance for result in results]
+        self.assertEqual(distances, sorted(distances))
+
+    def test_k_larger_than_collection(self):
+        self._insert_random("course_1", 3)
+        results = self.backend.query("course_1", self.rng.normal(size=32).tolist(), k=10)
+        self.assertEqual(len(results), 3)
+
+    def test_unknown_collection_returns_empty(self):
+        self.assertEqual(self.backend.query("course_404", [1.0] * 32, k=5), [])
+
+    def test_filter_is_exact(self):
+        ids, vectors = self._insert_random("course_1", 300)
+        query = self.rng.normal(size=32)
+
+        results = self.backend.query("course_1", query.tolist(), k=5, filter_metadata={"document_id": 1})
+
+        candidates = [i for i in range(300) if i % 3 == 1]
+        expected = [ids[candidates[i]] for i in self._brute_force(vectors[candidates], query, 5)]
+        self.assertEqual([result.id for result in results], expected)
+
+    def test_range_filter(self):
+        self._insert_random("course_1", 100)
+        results = self.backend.query(
+            "course_1",
+            self.rng.normal(size=32).tolist(),
+            k=50,
+            filter_metadata={"document_id": 2, "page_number": {"$gte": 10, "$lt": 30}},
+        )
+        pages = sorted(result.metadata["page_number"] for result in results)
+        self.assertEqual(pages, [i for i in range(10, 30) if i % 3 == 2])
+
+    def test_delete_and_upsert(self):
+        self._insert_random("course_1", 10)
+        self.backend.delete("course_1", ["doc_0", "doc_5"])
+        self.backend.insert("course_1", ["doc_1"], ["replaced"], [[1.0] * 32], [{}])
+
+        results = self.backend.query("course_1", [1.0] * 32, k=20)
+
+        result_ids = [result.id for result in results]
+        self.assertEqual(len(result_ids), 8)
+        self.assertNotIn("doc_0", result_ids)
+        self.assertNotIn("doc_5", result_ids)
+        self.assertEqual(results[0].id, "doc_1")
+        self.assertEqual(results[0].document, "replaced")
+
+    def test_persist_and_reload(self):
+        ids, vectors = self._insert_random("course_1", 50)
+        query = self.rng.normal(size=32)
+        before = [result.id for result in self.backend.query("course_1", query.tolist(), k=5)]
+        self.backend.flush()
+
+        reloaded = NumpyVectorBackend(path=self.tmp_dir.name, mmap=True, dimension=32)
+        after = [result.id for result in reloaded.query("course_1", query.tolist(), k=5)]
+        self.assertEqual(before, after)
+
+        # Writing to a memory-mapped collection must work as well
+        reloaded.insert("course_1", ["new"], ["new"], [query.tolist()], [{}])
+        self.assertEqual(reloaded.query("course_1", query.tolist(), k=1)[0].id, "new")
+
+
+class TestQuantizedNumpyVectorBackend(unittest.TestCase):
+    """float16/int8 storage, exact rescoring and the recall/size trade-off"""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(7)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _clustered(self, count, dimension=768, clusters=100):
+        # Paragraph embeddings cluster by topic, which is what makes ranking hard
+        centers = self.rng.normal(size=(clusters, dimension))
+        labels = self.rng.integers(0, clusters, count)
+        return (centers[labels] + 0.8 * self.rng.normal(size=(count, dimension))).astype(np.float32)
+
+    def _backend(self, quantization, rescore=True, path=None, dimension=768):
+        return NumpyVectorBackend(
+            path=path, mmap=True, dimension=dimension, quantization=quantization, rescore=rescore
+        )
+
+    def _fill(self, backend, vectors):
+        ids = [str(i) for i in range(len(vectors))]
+        backend.insert("course_1", ids, ids, vectors.tolist(), [{"page_number": i} for i in range(len(ids))])
+
+    def test_int8_round_trip_error(self):
+        vectors = self.rng.normal(size=(50, 64)).astype(np.float32)
+        codes, scales = quantize(vectors, "int8")
+        self.assertEqual(codes.dtype, np.int8)
+        error = np.abs(dequantize(codes, scales) - vectors)
+        self.assertTrue(np.all(error <= scales[:, None] / 2 + 1e-6))
+
+    def test_persist_reload_and_reencode(self):
+        vectors = self._clustered(300, dimension=32)
+        backend = self._backend("int8", path=self.tmp_dir.name, dimension=32)
+        self._fill(backend, vectors)
+        query = vectors[5]
+        before = [result.id for result in backend.query("course_1", query.tolist(), k=5)]
+        backend.flush()
+        self.assertEqual(before[0], "5")
+
+        reloaded = self._backend("int8", path=self.tmp_dir.name, dimension=32)
+        local = reloaded.get_collection("course_1")
+        self.assertEqual(local.matrix.dtype, np.int8)
+        self.assertIsInstance(local.full, np.memmap)
+        self.assertEqual([result.id for result in reloaded.query("course_1", query.tolist(), k=5)], before)
+
+        # Changing the setting re-encodes from the exact vectors
+        as_float = self._backend("none", path=self.tmp_dir.name, dimension=32)
+        self.assertEqual(as_float.get_collection("course_1").matrix.dtype, np.float32)
+        self.assertEqual([result.id for result in as_float.query("course_1", query.tolist(), k=5)], before)
+
+    def test_filter_and_delete_with_rescoring(self):
+        vectors = self._clustered(200, dimension=32)
+        backend = self._backend("int8", dimension=32)
+        self._fill(backend, vectors)
+        backend.delete("course_1", ["10"])
+
+        results = backend.query(
+            "course_1", vectors[10].tolist(), k=3, filter_metadata={"page_number": {"$lt": 20}}
+        )
+
+        self.assertEqual(len(results), 3)
+        self.assertNotIn("10", [result.id for result in results])
+        self.assertTrue(all(result.metadata["page_number"] < 20 for result in results))
+
+    def test_recall_and_size(self):
+        vectors = self._clustered(3000)
+        queries = self._clustered(50)
+
+        reference = self._backend("none")
+        self._fill(reference, vectors)
+        truth = [{result.id for result in reference.query("course_1", q.tolist(), k=5)} for q in queries]
+        float32_bytes = sum(reference.memory_stats("course_1").values())
+        json_bytes = sum(len(json.dumps(vector.tolist())) for vector in vectors[:100]) * len(vectors) // 100
+
+        recall = {}
+        for mode, rescore in (("float16", False), ("int8", False), ("int8", True)):
+            backend = self._backend(mode, rescore=rescore)
+            self._fill(backend, vectors)
+            found = [{result.id for result in backend.query("course_1", q.tolist(), k=5)} for q in queries]
+            recall[mode, rescore] = np.mean([len(f & t) / 5 for f, t in zip(found, truth)])
+
+            if mode == "int8":
+                total = sum(backend.memory_stats("course_1").values())  # codes, scales and float32 copy
+                if rescore:
+                    self.assertGreater(total, float32_bytes)
+                else:
+                    self.assertGreater(float32_bytes / total, 3.95)
+                    self.assertGreater(json_bytes / total, 4)
+
+        self.assertGreaterEqual(recall["float16", False], 0.99)
+        self.assertGreaterEqual(recall["int8", False], 0.9)
+        self.assertGreaterEqual(recall["int8", True], 0.99)
+
+
+class TestMetadataFilters(unittest.TestCase):
+    """Filter evaluation and the TiDB over-fetch fallback"""
+
+    def test_matches_filter(self):
+        metadata = {"document_id": 3, "page_number": 12, "type": "pdf_paragraph"}
+        self.assertTrue(matches_filter(metadata, None))
+        self.assertTrue(matches_filter(metadata, {"document_id": 3}))
+        self.assertFalse(matches_filter(metadata, {"document_id": 4}))
+        self.assertTrue(matches_filter(metadata, {"page_number": {"$gte": 10, "$lte": 12}}))
+        self.assertFalse(matches_filter(metadata, {"page_number": {"$gt": 12}}))
+        self.assertTrue(matches_filter(metadata, {"$or": [{"document_id": 1}, {"document_id": {"$in": [3]}}]}))
+        self.assertFalse(matches_filter(metadata, {"missing": {"$gt": 1}}))
+
+    def test_to_tidb_filter_splits_ranges(self):
+        self.assertEqual(to_tidb_filter({"document_id": 3}), {"document_id": 3})
+        self.assertEqual(
+            to_tidb_filter({"document_id": 3, "page_number": {"$gte": 1, "$lte": 5}}),
+            {"$and": [{"document_id": 3}, {"page_number": {"$gte": 1}}, {"page_number": {"$lte": 5}}]},
+        )
+
+    def test_overfetch_widens_until_k_matches(self):
+        rows = [
+            QueryResult(id=str(i), document="", metadata={"document_id": 1 if i % 50 == 0 else 0}, distance=i)
+            for i in range(1000)
+        ]
+        fetches = []
+
+        class FakeClient:
+            def query(self, embedding, k, **kwargs):
+                fetches.append(k)
+                return rows[:k]
+
+        results = TiDBVectorBackend._query_overfetch(FakeClient(), [0.0], 3, {"document_id": 1})
+
+        self.assertEqual([result.id for result in results], ["0", "50", "100"])
+        self.assertEqual(fetches, [12, 48, 192])
+
+
+class TestTiDBSharedVectorBackend(unittest.TestCase):
+    """SQL generated for the shared vector_embeddings table"""
+
+    def setUp(self):
+        from sqlalchemy.dialects import mysql
+        from ..src.db.models.db_vector import VectorEmbedding
+
+        self.dialect = mysql.dialect()
+        self.backend = TiDBSharedVectorBackend.__new__(TiDBSharedVectorBackend)
+        self.backend.model = VectorEmbedding
+
+    def _sql(self, statement):
+        return str(statement.compile(dialect=self.dialect, compile_kwargs={"literal_binds": True}))
+
+    def test_collection_maps_to_course_id(self):
+        self.assertEqual(TiDBSharedVectorBackend.course_id("course_42"), 42)
+        for name in ("course_", "course_x", "flashcards_1"):
+            with self.assertRaises(ValueError):
+                TiDBSharedVectorBackend.course_id(name)
+
+    def test_query_is_scoped_and_filtered_in_sql(self):
+        statement = self.backend.build_query(
+            "course_7",
+            [0.5] * 768,
+            k=5,
+            filter_metadata={"document_id": 3, "page_number": {"$gte": 10, "$lt": 20}},
+        )
+        sql = " ".join(self._sql(statement).split())
+
+        self.assertIn("VEC_COSINE_DISTANCE(vector_embeddings.embedding_vector", sql)
+        self.assertIn("vector_embeddings.course_id = 7", sql)
+        self.assertIn("json_extract(vector_embeddings.embedding_metadata, '$.document_id') = 3", sql)
+        self.assertIn("json_extract(vector_embeddings.embedding_metadata, '$.page_number') >= 10", sql)
+        self.assertIn("json_extract(vector_embeddings.embedding_metadata, '$.page_number') < 20", sql)
+        self.assertIn("ORDER BY cosine_distance", sql)
+        self.assertTrue(sql.endswith("LIMIT 5"))
+
+    def test_metadata_keys_cannot_alter_the_json_path(self):
+        from ..src.db.models.db_vector import VectorEmbedding
+
+        column = VectorEmbedding.embedding_metadata
+        self.assertIn("'$.chapter_id_2'", self._sql(to_sql_filter(column, {"chapter_id_2": 1})))
+        for key in ("a.b", "a[0]", "*", 'x" OR "1', "page\n", ""):
+            with self.assertRaises(ValueError):
+                to_sql_filter(column, {"$or": [{"document_id": 1}, {key: 1}]})
+            with self.assertRaises(ValueError):
+                to_tidb_filter({"$or": [{"document_id": 1}, {key: 1}]})
+            with self.assertRaises(ValueError):
+                to_tidb_filter({"document_id": 1, "$and": [{key: {"$gte": 1, "$lte": 5}}]})
+        self.assertEqual(to_tidb_filter({"chapter_id_2": {"$in": [1]}}), {"chapter_id_2": {"$in": [1]}})
+
+
+if __name__ == "__main__":
+    unittest.main()
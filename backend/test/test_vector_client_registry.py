@@ -0,0 +1,79 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from ..src.services import vector_client_registry as registry_module
+from ..src.services.vector_client_registry import VectorClientRegistry
+
+
+class _FakeBind:
+    def __init__(self):
+        self.disposed = 0
+
+    def dispose(self):
+        self.disposed += 1
+
+
+class _FakeRegistry(VectorClientRegistry):
+    """Registry whose clients only have a connection pool to dispose"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.created = []
+
+    def _create_client(self, table_name):
+        client = SimpleNamespace(table_name=table_name, _bind=_FakeBind())
+        self.created.append(client)
+        return client
+
+
+class TestVectorClientRegistry(unittest.TestCase):
+    """Reuse, LRU eviction and disposal of the per-collection vector clients"""
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(registry_module.time, "monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_clients_are_reused(self):
+        registry = _FakeRegistry(max_clients=4, idle_seconds=0)
+        self.assertIs(registry.get_client("course_1"), registry.get_client("course_1"))
+        stats = registry.stats()
+        self.assertEqual((stats["size"], stats["hits"], stats["misses"]), (1, 1, 1))
+
+    def test_lru_eviction(self):
+        registry = _FakeRegistry(max_clients=2, idle_seconds=0)
+        first = registry.get_client("course_1")
+        second = registry.get_client("course_2")
+        registry.get_client("course_1")
+        registry.get_client("course_3")
+
+        # course_2 was the least recently used
+        self.assertEqual((first._bind.disposed, second._bind.disposed), (0, 1))
+        self.assertEqual(list(registry._clients), ["course_1", "course_3"])
+        self.assertEqual(registry.stats()["evictions"], 1)
+        self.assertIsNot(registry.get_client("course_2"), second)
+
+    def test_evict_idle_disposes_pools(self):
+        registry = _FakeRegistry(max_clients=4, idle_seconds=60)
+        idle = registry.get_client("course_1")
+        self.now += 30
+        active = registry.get_client("course_2")
+        self.now += 40
+
+        self.assertEqual(registry.evict_idle(), 1)
+        self.assertEqual((idle._bind.disposed, active._bind.disposed), (1, 0))
+        self.assertEqual(list(registry._clients), ["course_2"])
+
+    def test_clear(self):
+        registry = _FakeRegistry(max_clients=4, idle_seconds=0)
+        clients = [registry.get_client(f"course_{i}") for i in range(3)]
+        registry.clear()
+        self.assertEqual([client._bind.disposed for client in clients], [1, 1, 1])
+        self.assertEqual(registry.stats()["size"], 0)
+        self.assertFalse(registry.evict("course_1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
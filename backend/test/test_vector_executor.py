@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import unittest
+
+from ..src.services.vector_executor import VectorExecutor
+
+
+class TestVectorExecutor(unittest.TestCase):
+    """Results, errors and queue metrics of the vector thread pool"""
+
+    def setUp(self):
+        self.executor = VectorExecutor(max_workers=1)
+        self.addCleanup(self.executor.shutdown)
+
+    def test_results_and_failures(self):
+        def fail():
+            raise ValueError("bad vector")
+
+        async def main():
+            self.assertEqual(await self.executor.run(sum, [1, 2, 3]), 6)
+            with self.assertRaises(ValueError):
+                await self.executor.run(fail)
+
+        asyncio.run(main())
+        stats = self.executor.stats()
+        self.assertEqual((stats["completed"], stats["failed"], stats["queued"], stats["running"]), (2, 1, 0, 0))
+
+    def test_queue_depth(self):
+        release = threading.Event()
+
+        async def main():
+            blocked = [asyncio.ensure_future(self.executor.run(release.wait)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            stats = self.executor.stats()
+            self.assertEqual((stats["running"], stats["queued"]), (1, 2))
+            release.set()
+            await asyncio.gather(*blocked)
+
+        asyncio.run(main())
+        stats = self.executor.stats()
+        self.assertEqual((stats["completed"], stats["queued"]), (3, 0))
+        self.assertGreaterEqual(stats["max_queue_depth"], 2)
+        self.assertGreater(stats["avg_wait_ms"], 0)
+
+    def test_cancelled_while_queued(self):
+        release = threading.Event()
+
+        async def main():
+            running = asyncio.ensure_future(self.executor.run(release.wait))
+            waiting = asyncio.ensure_future(self.executor.run(release.wait))
+            await asyncio.sleep(0.05)
+            waiting.cancel()
+            await asyncio.sleep(0.05)
+            release.set()
+            await running
+
+        asyncio.run(main())
+        stats = self.executor.stats()
+        self.assertEqual((stats["queued"], stats["running"], stats["completed"]), (0, 0, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
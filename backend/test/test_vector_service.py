@@ -0,0 +1,131 @@
+import asyncio
+import unittest
+
+from ..src.services.vector_backends import NumpyVectorBackend
+from ..src.services.vector_service import VectorService
+
+TOPICS = {"graphs": [1.0, 0.0, 0.0], "trees": [0.0, 1.0, 0.0], "sorting": [0.0, 0.0, 1.0]}
+
+
+def _embed(text):
+    """Vector of the first topic word in the text, nudged by the number in it"""
+    topic, _, number = text.partition(" ")
+    nudge = 0.01 * int(number or 0)
+    return [value + nudge for value in TOPICS[topic]]
+
+
+class _FakeVectorService(VectorService):
+    """VectorService over an in-memory numpy backend with deterministic embeddings"""
+
+    def __init__(self, backend=None, fail_on=None):
+        self.backend = backend or NumpyVectorBackend(path=None, dimension=3, quantization="none")
+        self.embedding_cache = None
+        self.fail_on = fail_on
+        self.embedding_calls = []
+
+    def _generate_embeddings(self, texts):
+        self.embedding_calls.append(list(texts))
+        if self.fail_on is not None and self.fail_on in texts:
+            raise RuntimeError("Embedding quota exceeded")
+        return [_embed(text) for text in texts]
+
+
+class _NoCollections(NumpyVectorBackend):
+    def create_collection(self, collection):
+        raise RuntimeError("Database unavailable")
+
+
+def _items(topic, count, document_id=1):
+    return [
+        {"content_id": f"{topic}_{i}", "text": f"{topic} {i}", "metadata": {"document_id": document_id}}
+        for i in range(count)
+    ]
+
+
+class TestAddMany(unittest.TestCase):
+    """Batched ingestion reports failing batches and keeps the others"""
+
+    def test_batches_are_split_by_batch_size(self):
+        service = _FakeVectorService()
+        report = service.add_many(1, _items("graphs", 7), batch_size=3)
+
+        self.assertEqual(report, {"inserted": 7, "failed": 0, "failed_batches": []})
+        self.assertEqual([len(batch) for batch in service.embedding_calls], [3, 3, 1])
+        self.assertEqual(len(service.search_by_course_id(1, "graphs", n_results=10)), 7)
+
+    def test_failing_batch_is_reported_and_skipped(self):
+        service = _FakeVectorService(fail_on="trees 1")
+        items = _items("graphs", 2) + _items("trees", 2) + _items("sorting", 2)
+        report = service.add_many(1, items, batch_size=2)
+
+        self.assertEqual((report["inserted"], report["failed"]), (4, 2))
+        self.assertEqual(len(report["failed_batches"]), 1)
+        failed = report["failed_batches"][0]
+        self.assertEqual((failed["batch"], failed["content_ids"]), (1, ["trees_0", "trees_1"]))
+        self.assertIn("quota", failed["error"])
+
+        # The batches before and after the failure are searchable
+        self.assertEqual(service.search_by_course_id(1, "graphs", n_results=1)[0].id, "graphs_0")
+        self.assertEqual(service.search_by_course_id(1, "sorting", n_results=1)[0].id, "sorting_0")
+        hits = service.search_by_course_id(1, "trees", n_results=10)
+        self.assertFalse(any(hit.id.startswith("trees") for hit in hits))
+
+    def test_collection_failure_fails_all_items(self):
+        service = _FakeVectorService(backend=_NoCollections(path=None, dimension=3, quantization="none"))
+        report = service.add_many(1, _items("graphs", 3))
+
+        self.assertEqual((report["inserted"], report["failed"]), (0, 3))
+        self.assertEqual(report["failed_batches"][0]["batch"], None)
+        self.assertEqual(report["failed_batches"][0]["content_ids"], ["graphs_0", "graphs_1", "graphs_2"])
+        self.assertEqual(service.embedding_calls, [])
+
+    def test_no_items(self):
+        self.assertEqual(_FakeVectorService().add_many(1, []), {"inserted": 0, "failed": 0, "failed_batches": []})
+
+
+class TestSearchMany(unittest.TestCase):
+    """Several queries against one course, embedded together and merged"""
+
+    def setUp(self):
+        self.service = _FakeVectorService()
+        items = _items("graphs", 5) + _items("trees", 3) + _items("sorting", 3, document_id=2)
+        self.service.add_many(1, items)
+        self.service.embedding_calls.clear()
+
+    def search(self, queries, **kwargs):
+        return asyncio.run(self.service.search_many_by_course_id(1, queries, **kwargs))
+
+    def test_queries_are_embedded_once_and_merged(self):
+        passages = self.search(["graphs", "graphs 3"], n_results=3)
+
+        self.assertEqual(self.service.embedding_calls, [["graphs", "graphs 3"]])
+        # graphs_2 is among the top 3 of both queries and kept once, with its better score
+        ids = [passage["content_id"] for passage in passages]
+        self.assertEqual(sorted(ids), ["graphs_0", "graphs_1", "graphs_2", "graphs_3", "graphs_4"])
+        scores = [passage["score"] for passage in passages]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        best = max(
+            1.0 - result.distance
+            for query in ("graphs", "graphs 3")
+            for result in self.service._search_by_embedding(1, _embed(query), 3)
+            if result.id == "graphs_2"
+        )
+        self.assertAlmostEqual(next(p["score"] for p in passages if p["content_id"] == "graphs_2"), best)
+        self.assertEqual(passages[0]["text"], passages[0]["content_id"].replace("_", " "))
+
+    def test_results_per_query_and_filter(self):
+        passages = self.search(["graphs", "sorting"], n_results=[1, 2])
+        self.assertEqual(sorted(p["content_id"] for p in passages), ["graphs_0", "sorting_0", "sorting_1"])
+
+        passages = self.search(["graphs", "trees"], n_results=2, filter_metadata={"document_id": 2})
+        self.assertEqual(len(passages), 2)
+        self.assertTrue(all(p["metadata"]["document_id"] == 2 for p in passages))
+
+    def test_embedding_failure_returns_nothing(self):
+        self.service.fail_on = "trees"
+        self.assertEqual(self.search(["graphs", "trees"]), [])
+        self.assertEqual(self.search([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()